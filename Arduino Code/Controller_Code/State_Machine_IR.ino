@@ -309,8 +309,12 @@ void loop() {
     
     // Move Z axis up for 0.5mm increments
     case MOVE_Z:
-      Serial.println("STAT(Moving Z axis up - step ");
-      Serial.println(zStepCount + 1);
+      // Report the new ring and height so the host can resync after a reconnect
+      Serial.print("STAT(Moving Z axis up - step ");
+      Serial.print(zStepCount + 1);
+      Serial.print(" z=");
+      Serial.print(z_axis_total_distance + 0.5);
+      Serial.println(")");
 
       // Move Z up for 0.5mm increment
       // With 2mm pitch rod and 400 steps/rev (1/2 microstepping), each step = 0.005mm
@@ -0,0 +1,127 @@
+"""
+Per frame cost of the live plot as a scan grows past a million points
+Feeds DataGrapher batches of a synthetic scan (rings of a cylinder climbing
+in z, like the scanner's) and times each frame: updateModel adding the
+batch to the decimated preview, and the renderer (splat, or agg as
+[Display] backend = agg ships) drawing the published cloud. Reported per band of total points so far; the cost should
+stay flat once the preview has reached its point budget.
+
+Usage: python benchmarks/bench_grapher.py [--points 2000000] [--batch 256]
+       [--budget 100000] [--voxel 1.0] [--size 640x480] [--renderer splat|agg] [--check]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PyQt5.QtCore import QCoreApplication, Qt
+
+from grapher import DataGrapher
+from render import RENDERERS
+
+# Upper edges of the reporting bands, in points fed so far
+BANDS = (100000, 250000, 500000, 1000000, 2000000, 4000000, 8000000)
+
+
+def scan_points(count, steps_per_rev=200, radius=80.0, ring_height=0.5, seed=1):
+    """
+    Function to make a scanner-like cloud
+    Input: count, steps_per_rev (points per ring), radius, ring_height, seed
+    Output: count x 3 float32 array, one ring after another up the z axis
+    """
+    index = np.arange(count)
+    angle = (index % steps_per_rev) * (2 * np.pi / steps_per_rev)
+    noise = np.random.default_rng(seed).normal(0.0, 0.5, count)
+    points = np.empty((count, 3), dtype=np.float32)
+    points[:, 0] = (radius + noise) * np.cos(angle)
+    points[:, 1] = (radius + noise) * np.sin(angle)
+    points[:, 2] = (index // steps_per_rev) * ring_height
+    return points
+
+
+def summary(values):
+    values = np.asarray(values) * 1000.0
+    return "p50 %6.3f  p95 %6.3f  max %7.3f" % (
+        np.percentile(values, 50), np.percentile(values, 95), values.max())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--points", type=int, default=2000000, help="points to feed in total")
+    parser.add_argument("--batch", type=int, default=256, help="points per frame, [Communication] batch_count")
+    parser.add_argument("--budget", type=int, default=100000, help="[Display] point_budget")
+    parser.add_argument("--voxel", type=float, default=1.0, help="[Display] voxel_size")
+    parser.add_argument("--size", default="640x480", help="rendered frame size")
+    parser.add_argument("--renderer", choices=sorted(RENDERERS), default="splat", help="frame renderer to time")
+    parser.add_argument("--check", action="store_true",
+                        help="exit 1 if the last band's median frame is over twice the first full-budget band's")
+    args = parser.parse_args()
+    width, height = (int(value) for value in args.size.lower().split("x"))
+
+    app = QCoreApplication(sys.argv)  # noqa: F841, signals need an application
+
+    # No database, batches arrive through the queue as from the main window
+    grapher = DataGrapher(":memory:", 0, point_budget=args.budget, voxel_size=args.voxel)
+    grapher.running = True
+    frames = []
+    grapher.pointsReady.connect(lambda *frame: frames.append(frame), Qt.DirectConnection)
+    renderer = RENDERERS[args.renderer]()
+
+    points = scan_points(args.points)
+    bands = [band for band in BANDS if band < args.points] + [args.points]
+    update_times = {band: [] for band in bands}
+    render_times = {band: [] for band in bands}
+    preview_sizes = {band: 0 for band in bands}
+
+    band_index = 0
+    for start in range(0, args.points, args.batch):
+        batch = points[start:start + args.batch]
+        while start >= bands[band_index]:
+            band_index += 1
+        band = bands[band_index]
+
+        grapher.data_queue.put(batch)
+        begin = time.perf_counter()
+        grapher.updateModel([])
+        update_times[band].append(time.perf_counter() - begin)
+
+        if frames:
+            cloud, mins, maxs = frames.pop()
+            frames.clear()
+            begin = time.perf_counter()
+            renderer.render(cloud, mins, maxs, width, height, 30.0, 20.0)
+            render_times[band].append(time.perf_counter() - begin)
+            preview_sizes[band] = len(cloud)
+
+    if hasattr(renderer, "close"):
+        renderer.close()
+
+    print(f"{args.points:,} points in batches of {args.batch}, budget {args.budget:,}, "
+          f"{width}x{height} {args.renderer} frames")
+    print(f"{'points up to':>13}  {'preview':>8}  {'updateModel ms':<34}  {'render ms':<34}")
+    for band in bands:
+        if update_times[band]:
+            render = summary(render_times[band]) if render_times[band] else "no frames"
+            print(f"{band:>13,}  {preview_sizes[band]:>8,}  {summary(update_times[band]):<34}  {render:<34}")
+
+    if args.check:
+        # Frame = update + render, compared once the preview is at its budget
+        full = [band for band in bands if band > args.budget and update_times[band] and render_times[band]]
+        if len(full) < 2:
+            print("check: not enough points past the budget to compare")
+            return 1
+        first, last = (
+            np.median(update_times[band]) + np.median(render_times[band]) for band in (full[0], full[-1])
+        )
+        ratio = last / first
+        print(f"check: median frame {first * 1000:.3f} ms -> {last * 1000:.3f} ms ({ratio:.2f}x)")
+        return 0 if ratio <= 2.0 else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
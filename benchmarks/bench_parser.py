@@ -0,0 +1,99 @@
+"""
+Micro-benchmark of the serial line parser
+Compares the original per-line regex + decode path in Worker against
+protocol.parse_frame on raw bytes.
+
+Usage: python benchmarks/bench_parser.py [--lines 3000000] [--repeat 3]
+"""
+import argparse
+import gc
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from protocol import parse_frame, STAT, DATA
+
+
+def legacy_parse(raw):
+    """
+    Function reproducing the original Worker parsing path
+    Input: raw (bytes line from the port)
+    Output: (STAT, message), (DATA, (x, y, z)) or None
+    """
+    serial_returned = raw.decode("utf-8").strip()
+    if not serial_returned:
+        return None
+    stat_match = re.match(r"STAT\((.*)\)", serial_returned)
+    if stat_match:
+        return STAT, stat_match.group(1)
+    pattern = r"^DATA\(\s*(-?\d+(\.\d+)?),\s*(-?\d+(\.\d+)?),\s*(-?\d+(\.\d+)?)\s*\)$"
+    match = re.match(pattern, serial_returned.strip())
+    if match:
+        nums = match.groups()
+        return DATA, (float(nums[0]), float(nums[2]), float(nums[4]))
+    return None
+
+
+def synthetic_lines(count, seed=0):
+    """
+    Function to build a synthetic serial stream
+    Input: count (number of lines), seed (random seed)
+    Output: List of byte lines, mostly DATA frames with some STAT and junk
+    """
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.98:
+            lines.append(b"DATA(%.2f,%.2f,%.3f)\r\n" % (
+                rng.uniform(0, 300), rng.uniform(0, 628), i * 0.0025))
+        elif roll < 0.99:
+            lines.append(b"STAT(Scanning...)\r\n")
+        else:
+            lines.append(b"Received: 1\r\n")
+    return lines
+
+
+def bench(name, func, lines, repeat=3):
+    """
+    Function to time a parser over the line set
+    Input: name (label), func (parser), lines (byte lines), repeat (runs, best is kept)
+    Output: Prints lines/sec and returns the best time
+
+    Results are thrown away and the cyclic GC is off while timing: millions
+    of kept result tuples make the collector rescan everything allocated
+    so far, which charges whichever parser runs second for the first one's
+    results.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            for line in lines:
+                func(line)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    print(f"{name:>12}: {best:7.3f} s  {len(lines) / best:12,.0f} lines/s")
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=3_000_000)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per parser, best is reported")
+    args = parser.parse_args()
+
+    lines = synthetic_lines(args.lines)
+    if any(legacy_parse(line) != parse_frame(line) for line in lines):
+        sys.exit("Parsers disagree on the synthetic stream")
+
+    legacy_time = bench("legacy", legacy_parse, lines, args.repeat)
+    fast_time = bench("parse_frame", parse_frame, lines, args.repeat)
+    print(f"{'speedup':>12}: {legacy_time / fast_time:.2f}x")
@@ -0,0 +1,174 @@
+"""
+End-to-end throughput benchmark of the scan pipeline without hardware
+Drives Worker -> ring buffer -> DataWriter (SQLite) / DataGrapher
+against a SimulatedDevice and reports sustained points/sec, end-to-end
+latency percentiles and dropped lines.
+
+Usage: python benchmarks/bench_pipeline.py [--rate 2000] [--seconds 10]
+       [--baud 115200] [--replay Data/2025-02-02_19-57-32-scanData.csv]
+       [--transport blocking|asyncio] [--metrics] [--capacity 262144]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PyQt5.QtCore import QCoreApplication, QObject, QThread, QTimer
+
+from worker import Worker, TRANSPORTS
+from grapher import DataGrapher
+from ingest import DataWriter
+from store import ScanStore
+from simulator import SimulatedDevice, synthetic_frames, recorded_frames
+from metrics import Metrics, format_overlay
+from ringbuffer import RingBuffer
+
+
+class PipelineSink(QObject):
+    """ Stands in for MainWindow.updateBatchReady and records timings """
+
+    def __init__(self, worker, grapher, cursor, sent_times, sequence_in_x):
+        super().__init__()
+        self.worker = worker
+        self.grapher = grapher
+        # Own drop_oldest cursor, sees every row unless it falls behind
+        self.cursor = cursor
+        self.sent_times = sent_times
+        self.sequence_in_x = sequence_in_x
+
+        self.received = 0
+        self.latencies = []
+        self.frames = 0
+        self.flush_latencies = []
+
+    def on_ready(self):
+        """
+        Function matching MainWindow.updateBatchReady
+        Input: batch_ready from the worker
+        Output: Grapher woken, latency recorded
+        """
+        self.worker.ready_pending = False
+        now = time.perf_counter()
+        points = self.cursor.read()
+        if self.sequence_in_x:
+            # x carries the frame number, so latency is exact even with drops
+            for seq in points[:, 0].astype(np.int64).tolist():
+                if 0 <= seq < len(self.sent_times):
+                    self.latencies.append(now - self.sent_times[seq])
+        self.received += len(points)
+
+        if not self.grapher.update_pending:
+            self.grapher.update_pending = True
+            self.grapher.newData.emit([])
+
+    def on_frame(self, points, mins, maxs):
+        self.frames += 1
+
+    def on_stats(self, rate, latency):
+        self.flush_latencies.append(latency)
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) * 1000.0 if len(values) else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=float, default=2000.0, help="DATA frames per second, 0 = unpaced")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--baud", type=int, default=115200, help="0 = no line budget")
+    parser.add_argument("--replay", help="CSV file to replay instead of a synthetic stream")
+    parser.add_argument("--transport", default="blocking", choices=TRANSPORTS, help="Worker serial transport")
+    parser.add_argument("--metrics", action="store_true", help="collect and print pipeline metrics")
+    parser.add_argument("--capacity", type=int, default=262144, help="ring buffer rows")
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+
+    # Fresh database with the production schema
+    db_dir = tempfile.mkdtemp()
+    db_path = os.path.join(db_dir, "bench.db")
+    store = ScanStore(db_path)
+    store.create_schema()
+    scan_id = store.create_scan("benchmark")
+
+    sequence_in_x = not args.replay
+    frames = recorded_frames(args.replay) if args.replay else synthetic_frames(sequence_in_x=True)
+    device = SimulatedDevice(frames, rate=args.rate, baud=args.baud)
+    port = device.open()
+    device.start()
+
+    ring = RingBuffer(args.capacity, columns=4)
+    metrics = Metrics() if args.metrics else None
+    worker = Worker(port, args.baud or 115200, 1, transport=args.transport, metrics=metrics, ring=ring)
+    writer = DataWriter(db_path, scan_id, metrics=metrics, cursor=ring.subscribe("storage", "block"))
+    grapher = DataGrapher(db_path, scan_id, metrics=metrics, cursor=ring.subscribe("render", "drop_oldest"))
+    sink = PipelineSink(worker, grapher, ring.subscribe("bench"), device.sent_times, sequence_in_x)
+
+    threads = []
+    for obj in (writer, grapher, worker):
+        thread = QThread()
+        obj.moveToThread(thread)
+        thread.started.connect(obj.run)
+        threads.append(thread)
+
+    worker.batch_ready.connect(sink.on_ready)
+    worker.error_text.connect(lambda text: print("worker:", text))
+    grapher.newData.connect(grapher.updateModel)
+    grapher.pointsReady.connect(sink.on_frame)
+    writer.stats.connect(sink.on_stats)
+
+    for thread in threads:
+        thread.start()
+
+    # Wait for the start command so the port settle time is excluded
+    device.started.wait(10.0)
+
+    def finish():
+        worker.stopRequested.emit()
+        threads[2].quit()
+        threads[2].wait()
+        writer.stopRequested.emit()
+        grapher.stopRequested.emit()
+        for thread in threads[:2]:
+            thread.quit()
+            thread.wait()
+        app.quit()
+
+    # Stop the device first and give the pipeline a second to drain
+    QTimer.singleShot(int(args.seconds * 1000), lambda: setattr(device, "running", False))
+    QTimer.singleShot(int(args.seconds * 1000) + 1000, finish)
+    app.exec_()
+    device.stop()
+
+    times = device.sent_times
+    elapsed = times[-1] - times[0] if len(times) > 1 else float("nan")
+
+    stored = store.next_seq(scan_id)
+    sent = len(device.sent_times)
+    print(f"sent DATA frames   : {sent}")
+    print(f"received points    : {sink.received}")
+    print(f"stored rows        : {stored}")
+    print(f"dropped lines      : {sent - sink.received}")
+    print(f"rejected lines     : {worker.reader.rejected}")
+    print(f"sustained rate     : {sink.received / elapsed:,.0f} points/s")
+    print(f"graph frames       : {sink.frames}")
+    print(f"ring dropped       : " + ", ".join(f"{name} {dropped}" for name, (_, dropped) in ring.stats().items()))
+    if sink.latencies:
+        print("serial->handler ms : p50 %.2f  p95 %.2f  p99 %.2f  max %.2f" % (
+            percentile(sink.latencies, 50), percentile(sink.latencies, 95),
+            percentile(sink.latencies, 99), max(sink.latencies) * 1000.0))
+    if sink.flush_latencies:
+        print("db flush ms        : p50 %.2f  p95 %.2f" % (
+            np.percentile(sink.flush_latencies, 50), np.percentile(sink.flush_latencies, 95)))
+    if metrics is not None:
+        print(format_overlay(metrics.snapshot()))
+
+
+if __name__ == "__main__":
+    main()
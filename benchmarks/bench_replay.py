@@ -0,0 +1,211 @@
+"""
+Frame by frame replay benchmark of the ingest and plot path
+Replays a stored scan or CSV export through ReplayWorker -> ring buffer ->
+DataWriter (SQLite) / DataGrapher and records, per worker batch, when it
+was emitted, stored and plotted. Batches are cut from the recorded times,
+so two runs (before and after a change) line up batch for batch.
+
+Usage: python benchmarks/bench_replay.py (--scan ID [--db Data/scan_data.db] | --csv FILE)
+       [--speed 0] [--csv-rate 1000] [--filters] [--capacity 262144]
+       [--out timeline.csv] [--baseline old-timeline.csv]
+"""
+import argparse
+import configparser
+import csv
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PyQt5.QtCore import QCoreApplication, QThread, Qt
+
+from replay import Recording, ReplayWorker
+from grapher import DataGrapher
+from ingest import DataWriter
+from store import ScanStore
+from calibration import Calibration
+from filters import FilterPipeline
+from ringbuffer import RingBuffer
+
+FIELDS = ["batch", "rows", "points", "due_ms", "emitted_ms", "stored_ms", "plotted_ms"]
+
+
+def reached(marks, points):
+    """
+    Function to find when each batch was fully consumed
+    Input: marks (list of (perf_counter time, rows consumed so far)),
+           points (rows each batch brings the total to)
+    Output: Array of times, nan where the consumer never got there
+    """
+    if not marks:
+        return np.full(len(points), np.nan)
+    times, counts = np.array(marks, dtype=np.float64).T
+    counts = np.maximum.accumulate(counts)
+    index = np.searchsorted(counts, points, side="left")
+    found = index < len(times)
+    result = np.full(len(points), np.nan)
+    result[found] = times[index[found]]
+    return result
+
+
+def percentiles(values):
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return "n/a"
+    return "p50 %.2f  p95 %.2f  p99 %.2f  max %.2f" % (
+        np.percentile(values, 50), np.percentile(values, 95), np.percentile(values, 99), values.max())
+
+
+def load_timeline(filename):
+    with open(filename, newline="") as file:
+        return {int(row["batch"]): row for row in csv.DictReader(file)}
+
+
+def compare(rows, baseline):
+    """
+    Function to print the per batch change against an earlier run
+    Input: rows (this run's timeline dicts), baseline (batch -> row of the earlier run)
+    Output: Latency deltas printed, mismatched batches reported
+    """
+    mismatched = [row["batch"] for row in rows
+                  if row["batch"] in baseline and int(baseline[row["batch"]]["points"]) != row["points"]]
+    if mismatched or len(baseline) != len(rows):
+        print(f"baseline mismatch  : {len(baseline)} vs {len(rows)} batches, "
+              f"{len(mismatched)} with different point counts")
+    for column in ("stored_ms", "plotted_ms"):
+        deltas = [row[column] - float(baseline[row["batch"]][column]) for row in rows
+                  if row["batch"] in baseline and baseline[row["batch"]][column] not in ("", "nan")]
+        print(f"{column[:-3] + ' delta ms':<19}: {percentiles(deltas)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--scan", type=int, help="stored scan to replay")
+    source.add_argument("--csv", help="CSV export or raw capture to replay")
+    parser.add_argument("--db", default=os.path.join(ROOT, "Data", "scan_data.db"), help="database holding --scan")
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = real time, 0 = as fast as possible")
+    parser.add_argument("--csv-rate", type=float, default=1000.0, help="rows per second for CSV files and imported scans")
+    parser.add_argument("--filters", action="store_true", help="apply [Filters] from config.ini")
+    parser.add_argument("--capacity", type=int, default=262144, help="ring buffer rows")
+    parser.add_argument("--out", help="write the per batch timeline to this CSV")
+    parser.add_argument("--baseline", help="timeline CSV of an earlier run to compare against")
+    args = parser.parse_args()
+
+    config = configparser.ConfigParser()
+    config.read(os.path.join(ROOT, "Config", "config.ini"))
+    if args.scan is not None:
+        recording = Recording.from_store(args.db, args.scan, rate=args.csv_rate)
+    else:
+        recording = Recording.from_csv(args.csv, args.csv_rate)
+
+    app = QCoreApplication(sys.argv)
+
+    # Fresh database with the production schema, the source is only read
+    db_dir = tempfile.mkdtemp()
+    db_path = os.path.join(db_dir, "bench.db")
+    store = ScanStore(db_path)
+    store.create_schema()
+    scan_id = store.create_scan("replay benchmark")
+
+    ring = RingBuffer(args.capacity, columns=4)
+    worker = ReplayWorker(
+        recording, args.speed,
+        batch_count=config.getint("Communication", "batch_count", fallback=256),
+        batch_interval=config.getfloat("Communication", "batch_interval", fallback=0.05),
+        calibration=Calibration.from_config(config),
+        filters=FilterPipeline.from_config(config) if args.filters else None,
+        ring=ring
+    )
+    writer = DataWriter(db_path, scan_id, cursor=ring.subscribe("storage", "block"))
+    grapher = DataGrapher(db_path, scan_id, cursor=ring.subscribe("render", "drop_oldest"))
+
+    # Consumer progress stamped on the consumer's own thread
+    stored, plotted = [], []
+    writer.stats.connect(lambda *_: stored.append((time.perf_counter(), writer.next_seq)), Qt.DirectConnection)
+    writer.stopped.connect(lambda: stored.append((time.perf_counter(), writer.next_seq)), Qt.DirectConnection)
+    grapher.pointsReady.connect(lambda *_: plotted.append((time.perf_counter(), grapher.cursor.position)),
+                                Qt.DirectConnection)
+
+    threads = []
+    for obj in (writer, grapher, worker):
+        thread = QThread()
+        obj.moveToThread(thread)
+        thread.started.connect(obj.run)
+        threads.append(thread)
+
+    def on_ready():
+        # Stands in for MainWindow.updateBatchReady
+        worker.ready_pending = False
+        if not grapher.update_pending:
+            grapher.update_pending = True
+            grapher.newData.emit([])
+
+    def finish():
+        threads[2].quit()
+        threads[2].wait()
+        # Let the plot catch up with the last batch before stopping it
+        on_ready()
+        writer.stopRequested.emit()
+        threads[0].quit()
+        threads[0].wait()
+        grapher.stopRequested.emit()
+        threads[1].quit()
+        threads[1].wait()
+        app.quit()
+
+    worker.batch_ready.connect(on_ready)
+    worker.error_text.connect(lambda text: print("worker:", text))
+    worker.stopped.connect(finish)
+    grapher.newData.connect(grapher.updateModel)
+
+    for thread in threads:
+        thread.start()
+    app.exec_()
+
+    timeline = np.array(worker.timeline, dtype=np.float64).reshape(-1, 5)
+    points = timeline[:, 2]
+    emitted = worker.started + timeline[:, 4]
+    # Batches the filters emptied have nothing to wait for
+    empty = np.diff(points, prepend=0.0) <= 0
+    stored_at = reached(stored, points)
+    plotted_at = reached(plotted, points)
+    stored_at[empty] = plotted_at[empty] = np.nan
+
+    rows = [{
+        "batch": int(index), "rows": int(count), "points": int(total),
+        "due_ms": due * 1000.0, "emitted_ms": offset * 1000.0,
+        "stored_ms": (stored_time - emit) * 1000.0, "plotted_ms": (plot_time - emit) * 1000.0,
+    } for (index, count, total, due, offset), emit, stored_time, plot_time
+        in zip(timeline.tolist(), emitted.tolist(), stored_at.tolist(), plotted_at.tolist())]
+
+    elapsed = timeline[-1, 4] if len(timeline) else float("nan")
+    lateness = (timeline[:, 4] - timeline[:, 3]) * 1000.0 if args.speed else []
+    print(f"recording          : {recording.name}, {len(recording)} {'raw readings' if recording.raw else 'points'}, "
+          f"{recording.duration:.2f} s recorded")
+    print(f"batches            : {len(rows)} at speed {args.speed or 'max'}")
+    print(f"points out         : {int(points[-1]) if len(points) else 0}, stored {store.next_seq(scan_id)}")
+    print(f"replay rate        : {len(recording) / elapsed:,.0f} rows/s over {elapsed:.2f} s")
+    if args.speed:
+        print(f"behind schedule ms : {percentiles(lateness)}")
+    print(f"emit->stored ms    : {percentiles((stored_at - emitted) * 1000.0)}")
+    print(f"emit->plotted ms   : {percentiles((plotted_at - emitted) * 1000.0)}")
+    print(f"ring dropped       : " + ", ".join(f"{name} {dropped}" for name, (_, dropped) in ring.stats().items()))
+
+    if args.out:
+        with open(args.out, "w", newline="") as file:
+            writer_csv = csv.DictWriter(file, fieldnames=FIELDS)
+            writer_csv.writeheader()
+            writer_csv.writerows(rows)
+    if args.baseline:
+        compare(rows, load_timeline(args.baseline))
+
+
+if __name__ == "__main__":
+    main()
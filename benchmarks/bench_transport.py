@@ -0,0 +1,100 @@
+"""
+Idle CPU and wake latency of the Worker serial transports
+Runs Worker against a SimulatedDevice once per transport and reports the
+process CPU used while the port is quiet, and the delay from a frame
+being written to its batch reaching the handler.
+
+Usage: python benchmarks/bench_transport.py [--rate 200] [--seconds 5]
+       [--idle 5] [--transport blocking asyncio]
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PyQt5.QtCore import QCoreApplication, QThread, QTimer
+
+from worker import Worker, TRANSPORTS
+from simulator import SimulatedDevice, synthetic_frames
+
+
+def run_transport(app, transport, rate, seconds, idle):
+    """
+    Function to measure one transport
+    Input: app (QCoreApplication), transport name, rate (frames/s),
+           seconds of streaming, idle seconds after the stream ends
+    Output: (latencies in seconds, idle CPU percent, received points)
+    """
+    frames = itertools.islice(synthetic_frames(sequence_in_x=True), int(rate * seconds) + 1)
+    device = SimulatedDevice(frames, rate=rate, baud=0)
+    port = device.open()
+    device.start()
+
+    # Emit every frame on its own so the latency is the wake-up delay
+    worker = Worker(port, 115200, 1, batch_count=1, transport=transport)
+    thread = QThread()
+    worker.moveToThread(thread)
+    thread.started.connect(worker.run)
+
+    latencies = []
+    received = [0]
+    # Frames sent while the worker still waits after its start command
+    warmup = int(rate * 0.25)
+
+    def on_batch(points):
+        now = time.perf_counter()
+        for seq in points[:, 0].astype(np.int64).tolist():
+            if warmup <= seq < len(device.sent_times):
+                latencies.append(now - device.sent_times[seq])
+        received[0] += len(points)
+
+    worker.distance_batch.connect(on_batch)
+    worker.error_text.connect(lambda text: None)
+    thread.start()
+    device.started.wait(10.0)
+
+    # The device thread ends with its frames, the port then stays quiet
+    idle_cpu = []
+
+    def idle_start():
+        idle_cpu.append((time.process_time(), time.perf_counter()))
+
+    def idle_end():
+        cpu, wall = idle_cpu[0]
+        idle_cpu.append(100.0 * (time.process_time() - cpu) / (time.perf_counter() - wall))
+        worker.stopRequested.emit()
+        thread.quit()
+        thread.wait()
+        app.quit()
+
+    QTimer.singleShot(int((seconds + 0.5) * 1000), idle_start)
+    QTimer.singleShot(int((seconds + 0.5 + idle) * 1000), idle_end)
+    app.exec_()
+    device.stop()
+    return latencies, idle_cpu[-1], received[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=float, default=200.0, help="DATA frames per second")
+    parser.add_argument("--seconds", type=float, default=5.0, help="seconds of streaming")
+    parser.add_argument("--idle", type=float, default=5.0, help="seconds of quiet port")
+    parser.add_argument("--transport", nargs="+", default=list(TRANSPORTS), choices=TRANSPORTS)
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+    for transport in args.transport:
+        latencies, idle_cpu, received = run_transport(app, transport, args.rate, args.seconds, args.idle)
+        ms = np.asarray(latencies) * 1000.0
+        print(f"{transport:>9}: received {received:6d}  idle CPU {idle_cpu:5.2f}%  "
+              f"latency ms p50 {np.percentile(ms, 50):.3f}  p95 {np.percentile(ms, 95):.3f}  "
+              f"p99 {np.percentile(ms, 99):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import numpy as np
+
+# [Calibration] keys and their defaults, matching State_Machine_IR.ino
+DEFAULTS = {
+    "steps_per_rev": 200,        # full steps per platform motor revolution
+    "microstepping": 2,          # driver microstep jumper (1, 2, 4, ...)
+    "z_steps_per_rev": 200,      # full steps per lead screw revolution
+    "lead_screw_pitch": 2.0,     # mm of Z travel per lead screw revolution
+    "sensor_offset": 150.0,      # mm from the sensor to the platform centre
+    "distance_scale": 10.0,      # mm per raw distance unit (the sensors report cm)
+    "max_radius": 200.0,         # mm, readings further out are background
+}
+
+
+class Calibration:
+    """ Scanner geometry used to turn raw readings into Cartesian points """
+
+    def __init__(self, **values):
+        unknown = set(values) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown calibration keys: {', '.join(sorted(unknown))}")
+        for key, default in DEFAULTS.items():
+            setattr(self, key, type(default)(values.get(key, default)))
+        if self.steps_per_rev <= 0 or self.microstepping <= 0 or self.z_steps_per_rev <= 0:
+            raise ValueError("Step counts must be positive")
+
+    @classmethod
+    def from_config(cls, config, section="Calibration"):
+        """
+        Function to read the calibration from a config file
+        Input: config (ConfigParser), section name
+        Output: Calibration, missing keys fall back to DEFAULTS
+        """
+        if not config.has_section(section):
+            return cls()
+        return cls(**{key: config.get(section, key) for key in DEFAULTS if config.has_option(section, key)})
+
+    @property
+    def radians_per_step(self):
+        """ Platform rotation per microstep """
+        return 2.0 * np.pi / (self.steps_per_rev * self.microstepping)
+
+    @property
+    def mm_per_z_step(self):
+        """ Z travel per lead screw microstep """
+        return self.lead_screw_pitch / (self.z_steps_per_rev * self.microstepping)
+
+    def to_cartesian(self, raw):
+        """
+        Function to convert raw readings to points in one vectorized pass
+        Input: raw (N x 3 array of distance, platform step, z step)
+        Output: (M x 3 float64 points, N boolean mask of the rows kept)
+
+        Same geometry as the firmware: the radius is the sensor offset minus
+        the measured distance, and rows outside (0, max_radius] are dropped.
+        """
+        raw = np.asarray(raw, dtype=np.float64).reshape(-1, 3)
+        radius = self.sensor_offset - raw[:, 0] * self.distance_scale
+        keep = (radius > 0) & (radius <= self.max_radius)
+
+        radius = radius[keep]
+        angle = raw[keep, 1] * self.radians_per_step
+        points = np.empty((len(radius), 3))
+        np.multiply(np.sin(angle), radius, out=points[:, 0])
+        np.multiply(np.cos(angle), radius, out=points[:, 1])
+        np.multiply(raw[keep, 2], self.mm_per_z_step, out=points[:, 2])
+        return points, keep
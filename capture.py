@@ -0,0 +1,284 @@
+import os
+import csv
+import time
+import struct
+import numpy as np
+
+# File layout:
+#   64 byte header: magic, version, capacity, count, start time
+#   x float32[capacity] | y float32[capacity] | z float32[capacity] | t uint32[capacity]
+# t is milliseconds since the start time. Only the first `count` entries of
+# each column are valid; capacity grows by doubling.
+MAGIC = b"OSCAP\x00\x00\x01"
+VERSION = 1
+HEADER = struct.Struct("<8sIQQd")
+HEADER_SIZE = 64
+COLUMNS = (("x", np.float32), ("y", np.float32), ("z", np.float32), ("t", np.uint32))
+
+
+def _column_offsets(capacity):
+    """
+    Function to get the byte offset of every column
+    Input: capacity (rows per column)
+    Output: List of (name, dtype, offset) and the total file size
+    """
+    offsets = []
+    offset = HEADER_SIZE
+    for name, dtype in COLUMNS:
+        offsets.append((name, dtype, offset))
+        offset += capacity * np.dtype(dtype).itemsize
+    return offsets, offset
+
+
+def _read_header(path):
+    """
+    Function to read and check a capture header
+    Input: path (capture file)
+    Output: (capacity, count, start time)
+    """
+    with open(path, "rb") as file:
+        magic, version, capacity, count, start = HEADER.unpack(file.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} capture file")
+    return capacity, count, start
+
+
+class CaptureWriter:
+    """ Append-only columnar capture file backed by a memory map """
+
+    def __init__(self, path, capacity=1 << 20):
+        self.path = path
+        self.start = time.time()
+
+        # Reopen an existing capture and keep appending to it
+        if os.path.exists(path):
+            self.capacity, self.count, self.start = _read_header(path)
+        else:
+            self.capacity = max(1024, int(capacity))
+            self.count = 0
+            _, size = _column_offsets(self.capacity)
+            with open(path, "wb") as file:
+                file.truncate(size)
+
+        self._map()
+        self._write_header()
+
+    def _map(self):
+        """
+        Function to memory map the file and build the column views
+        Input: None
+        Output: self.columns with one writable view per column
+        """
+        self.mmap = np.memmap(self.path, dtype=np.uint8, mode="r+")
+        offsets, _ = _column_offsets(self.capacity)
+        self.columns = {
+            name: np.ndarray((self.capacity,), dtype=dtype, buffer=self.mmap, offset=offset)
+            for name, dtype, offset in offsets
+        }
+
+    def _write_header(self):
+        """
+        Function to store the current count in the mapped header
+        Input: None
+        Output: Header bytes updated in place
+        """
+        self.mmap[:HEADER.size] = np.frombuffer(
+            HEADER.pack(MAGIC, VERSION, self.capacity, self.count, self.start), dtype=np.uint8
+        )
+
+    def _grow(self, needed):
+        """
+        Function to double the capacity until needed rows fit
+        Input: needed (rows required)
+        Output: File extended and columns moved to their new offsets
+        """
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+
+        old_offsets, _ = _column_offsets(self.capacity)
+        new_offsets, size = _column_offsets(capacity)
+        self.mmap.flush()
+        del self.columns, self.mmap
+        with open(self.path, "r+b") as file:
+            file.truncate(size)
+
+        # Move the columns last to first so nothing is overwritten early
+        data = np.memmap(self.path, dtype=np.uint8, mode="r+")
+        for (name, dtype, old), (_, _, new) in reversed(list(zip(old_offsets, new_offsets))):
+            length = self.count * np.dtype(dtype).itemsize
+            data[new:new + length] = data[old:old + length]
+        data.flush()
+        del data
+
+        self.capacity = capacity
+        self._map()
+
+    def append(self, points, timestamps=None):
+        """
+        Function to append points straight into the mapped columns
+        Input: points (N x 3 array), timestamps (epoch seconds, scalar or N, default now)
+        Output: Rows written and the header count updated
+        """
+        points = np.asarray(points).reshape(-1, 3)
+        n = len(points)
+        if not n:
+            return
+        if self.count + n > self.capacity:
+            self._grow(self.count + n)
+
+        end = self.count + n
+        self.columns["x"][self.count:end] = points[:, 0]
+        self.columns["y"][self.count:end] = points[:, 1]
+        self.columns["z"][self.count:end] = points[:, 2]
+        if timestamps is None:
+            timestamps = time.time()
+        self.columns["t"][self.count:end] = np.round(
+            (np.asarray(timestamps, dtype=np.float64) - self.start) * 1000.0
+        ).clip(0, np.iinfo(np.uint32).max)
+
+        self.count = end
+        self._write_header()
+
+    def flush(self):
+        """
+        Function to push mapped pages to disk
+        Input: None
+        Output: File contents synced
+        """
+        self.mmap.flush()
+
+    def close(self):
+        """
+        Function to finish the capture
+        Input: None
+        Output: Header and data flushed, map released
+        """
+        self._write_header()
+        self.mmap.flush()
+        del self.columns, self.mmap
+
+
+class CaptureReader:
+    """ Read-only, zero-parse view of a capture file """
+
+    def __init__(self, path):
+        self.path = path
+        self.refresh()
+
+    def refresh(self):
+        """
+        Function to re-read the header and map any newly appended rows
+        Input: None
+        Output: Column views sized to the current count
+        """
+        self.capacity, self.count, self.start = _read_header(self.path)
+        offsets, _ = _column_offsets(self.capacity)
+        self.columns = {
+            name: np.memmap(self.path, dtype=dtype, mode="r", offset=offset, shape=(self.count,))
+            for name, dtype, offset in offsets
+        } if self.count else {name: np.zeros(0, dtype=dtype) for name, dtype in COLUMNS}
+
+    def points(self, start=0, stop=None):
+        """
+        Function to get rows as an N x 3 array
+        Input: start and stop row
+        Output: N x 3 float32 array
+        """
+        stop = self.count if stop is None else min(stop, self.count)
+        return np.column_stack([self.columns[name][start:stop] for name in ("x", "y", "z")])
+
+    def timestamps(self, start=0, stop=None):
+        """
+        Function to get the epoch time of rows
+        Input: start and stop row
+        Output: float64 array of epoch seconds
+        """
+        stop = self.count if stop is None else min(stop, self.count)
+        return self.start + self.columns["t"][start:stop].astype(np.float64) / 1000.0
+
+
+def capture_to_sqlite(path, store, label=None, chunk_size=65536):
+    """
+    Function to import a capture file as a new scan
+    Input: path, store (ScanStore), label, chunk_size
+    Output: New scan id
+    """
+    reader = CaptureReader(path)
+    scan_id = store.create_scan(label or os.path.basename(path))
+    for start in range(0, reader.count, chunk_size):
+        points = reader.points(start, start + chunk_size).tolist()
+        times = reader.timestamps(start, start + chunk_size).tolist()
+        store.insert_points(scan_id, start, [(x, y, z, t) for (x, y, z), t in zip(points, times)])
+    store.finish_scan(scan_id)
+    return scan_id
+
+
+def sqlite_to_capture(store, scan_id, path):
+    """
+    Function to write a stored scan to a capture file
+    Input: store (ScanStore), scan_id, path
+    Output: Number of rows written
+    """
+    cursor = store.conn.execute(
+        "SELECT x, y, z, t FROM scan_points WHERE scan_id = ? ORDER BY seq", (scan_id,)
+    )
+    writer = None
+    while True:
+        rows = cursor.fetchmany(65536)
+        if not rows:
+            break
+        chunk = np.asarray(rows, dtype=np.float64)
+        times = np.nan_to_num(chunk[:, 3], nan=time.time())
+        if writer is None:
+            if os.path.exists(path):
+                os.remove(path)
+            writer = CaptureWriter(path)
+            writer.start = float(times.min())
+        writer.append(chunk[:, :3], times)
+    if writer is None:
+        writer = CaptureWriter(path)
+    count = writer.count
+    writer.close()
+    return count
+
+
+def capture_to_csv(path, csv_path, chunk_size=65536):
+    """
+    Function to export a capture file as x,y,z CSV
+    Input: path, csv_path, chunk_size
+    Output: Number of rows written
+    """
+    reader = CaptureReader(path)
+    with open(csv_path, "w", newline="") as file:
+        writer = csv.writer(file)
+        for start in range(0, reader.count, chunk_size):
+            writer.writerows(reader.points(start, start + chunk_size).tolist())
+    return reader.count
+
+
+def csv_to_capture(csv_path, path, chunk_size=65536):
+    """
+    Function to build a capture file from an x,y,z CSV
+    Input: csv_path, path, chunk_size
+    Output: Number of rows written, rows without three numbers are skipped
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    writer = CaptureWriter(path)
+    rows = []
+    with open(csv_path, newline="") as file:
+        for row in csv.reader(file):
+            try:
+                rows.append([float(value) for value in row[:3]])
+            except ValueError:
+                continue
+            if len(rows[-1]) != 3:
+                rows.pop()
+            elif len(rows) >= chunk_size:
+                writer.append(rows)
+                rows = []
+    writer.append(rows)
+    count = writer.count
+    writer.close()
+    return count
@@ -0,0 +1,403 @@
+from PyQt5.QtCore import QObject, Qt, pyqtSignal, pyqtSlot
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import multiprocessing
+import sqlite3
+import csv
+import os
+import zipfile
+import numpy as np
+
+from store import ScanStore
+import mesh
+
+# File dialog filter, the chosen extension picks the writer
+EXPORT_FILTERS = (
+    "CSV Files (*.csv);;"
+    "PLY Binary (*.ply);;"
+    "PCD Binary (*.pcd);;"
+    "NumPy Array (*.npy);;"
+    "NumPy Archive (*.npz);;"
+    "STL Mesh (*.stl);;"
+    "OBJ Mesh (*.obj);;"
+    "PLY Mesh (*.ply);;"
+    "All Files (*)"
+)
+
+# Filters that export a reconstructed surface instead of the points
+MESH_FILTERS = ("STL Mesh (*.stl)", "OBJ Mesh (*.obj)", "PLY Mesh (*.ply)")
+
+
+def ply_header(count):
+    """
+    Function to build a binary PLY header
+    Input: count (number of vertices)
+    Output: Header bytes
+    """
+    return (
+        "ply\n"
+        "format binary_little_endian 1.0\n"
+        f"element vertex {count}\n"
+        "property float x\n"
+        "property float y\n"
+        "property float z\n"
+        "end_header\n"
+    ).encode("ascii")
+
+
+def pcd_header(count):
+    """
+    Function to build a binary PCD v0.7 header
+    Input: count (number of points)
+    Output: Header bytes
+    """
+    return (
+        "# .PCD v0.7 - Point Cloud Data file format\n"
+        "VERSION 0.7\n"
+        "FIELDS x y z\n"
+        "SIZE 4 4 4\n"
+        "TYPE F F F\n"
+        "COUNT 1 1 1\n"
+        f"WIDTH {count}\n"
+        "HEIGHT 1\n"
+        "VIEWPOINT 0 0 0 1 0 0 0\n"
+        f"POINTS {count}\n"
+        "DATA binary\n"
+    ).encode("ascii")
+
+
+def npy_header(file, count):
+    """
+    Function to write a .npy header for a count x 3 float64 array
+    Input: file (binary file object), count (number of rows)
+    Output: Header written, raw rows can follow
+    """
+    np.lib.format.write_array_header_2_0(
+        file, {"descr": "<f8", "fortran_order": False, "shape": (count, 3)}
+    )
+
+
+class ArrayRows:
+    """ fetchmany() over an array, so cropped exports reuse the writers """
+
+    def __init__(self, points):
+        self.points = points
+        self.position = 0
+
+    def fetchmany(self, size):
+        rows = self.points[self.position:self.position + size].tolist()
+        self.position += len(rows)
+        return rows
+
+
+class ScanExporter(QObject):
+    """ Export thread that streams one scan to a file in chunks """
+    # Signal to report progress in percent
+    progress = pyqtSignal(int)
+
+    # Signal with the written file name when done
+    finished = pyqtSignal(str)
+
+    # Any returned errors
+    error_text = pyqtSignal([str])
+
+    # Signals to stop the exporter
+    stopRequested = pyqtSignal()
+    stopped = pyqtSignal()
+
+    def __init__(self, db_path, scan_id, filename, chunk_size=65536, box=None):
+        super().__init__()
+        self.db_path = db_path
+        self.scan_id = scan_id
+        self.filename = filename
+        self.chunk_size = chunk_size
+        # Optional (mins, maxs) to crop to, read through the spatial index
+        self.box = box
+
+        # Flag to check if the thread is running, cleared to cancel
+        self.running = False
+
+        # The export loop blocks, so stop has to be called directly
+        self.stopRequested.connect(self.stop, Qt.DirectConnection)
+
+    @pyqtSlot()
+    def run(self):
+        """
+        Function to run the export
+        Input: Database path and target file name
+        Output: File written in the format matching its extension
+        """
+        self.running = True
+        extension = os.path.splitext(self.filename)[1].lower()
+        writers = {
+            ".ply": self._write_ply,
+            ".pcd": self._write_pcd,
+            ".npy": self._write_npy,
+            ".npz": self._write_npz,
+        }
+        write = writers.get(extension, self._write_csv)
+
+        if self.box is not None:
+            self._run_box(write)
+            return
+
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+
+            # Snapshot the rows present now, the writer may still be adding
+            cursor.execute(
+                "SELECT COALESCE(MAX(seq), -1), COUNT(*) FROM scan_points WHERE scan_id = ?",
+                (self.scan_id,)
+            )
+            last_seq, count = cursor.fetchone()
+            cursor.execute(
+                "SELECT x, y, z FROM scan_points WHERE scan_id = ? AND seq <= ? ORDER BY seq",
+                (self.scan_id, last_seq)
+            )
+
+            write(cursor, count)
+            conn.close()
+        except (sqlite3.Error, OSError) as e:
+            self.error_text.emit(f"Export Error: {str(e)}")
+            self.stopped.emit()
+            return
+
+        self._finish()
+
+    def _run_box(self, write):
+        """
+        Function to export only the points inside self.box
+        Input: write (one of the _write_* functions)
+        Output: File written with the cropped points
+        """
+        try:
+            store = ScanStore(self.db_path)
+            # The count has to be known up front for the PLY / PCD / .npy headers
+            points = store.query_box(self.scan_id, *self.box)
+            store.close()
+            write(ArrayRows(points), len(points))
+        except (sqlite3.Error, OSError) as e:
+            self.error_text.emit(f"Export Error: {str(e)}")
+            self.stopped.emit()
+            return
+        self._finish()
+
+    def _finish(self):
+        if self.running:
+            self.finished.emit(self.filename)
+        else:
+            # Cancelled, do not leave a truncated file behind
+            try:
+                os.remove(self.filename)
+            except OSError:
+                pass
+        self.stopped.emit()
+
+    def _rows(self, cursor, count):
+        """
+        Function to iterate the cursor in chunks and report progress
+        Input: cursor (executed SELECT x, y, z), count (expected rows)
+        Output: Yields lists of (x, y, z) rows
+        """
+        done = 0
+        while self.running:
+            rows = cursor.fetchmany(self.chunk_size)
+            if not rows:
+                break
+            done += len(rows)
+            yield rows
+            self.progress.emit(int(100 * done / count) if count else 100)
+
+    def _chunks(self, cursor, count, dtype):
+        """
+        Function to iterate the cursor as NumPy chunks
+        Input: cursor, count (expected rows), dtype (little endian dtype)
+        Output: Yields N x 3 arrays
+        """
+        for rows in self._rows(cursor, count):
+            yield np.asarray(rows, dtype=dtype)
+
+    def _write_csv(self, cursor, count):
+        """
+        Function to write CSV text through the csv module
+        Input: cursor (executed SELECT x, y, z), count (expected rows)
+        Output: File written chunk by chunk
+        """
+        with open(self.filename, "w", newline="") as file:
+            writer = csv.writer(file)
+            for rows in self._rows(cursor, count):
+                writer.writerows(rows)
+
+    def _write_ply(self, cursor, count):
+        """
+        Function to write binary little endian PLY
+        Input: cursor (executed SELECT x, y, z), count (expected rows)
+        Output: File written chunk by chunk
+        """
+        with open(self.filename, "wb") as file:
+            file.write(ply_header(count))
+            for chunk in self._chunks(cursor, count, "<f4"):
+                file.write(chunk.tobytes())
+
+    def _write_pcd(self, cursor, count):
+        """
+        Function to write binary PCD
+        Input: cursor (executed SELECT x, y, z), count (expected rows)
+        Output: File written chunk by chunk
+        """
+        with open(self.filename, "wb") as file:
+            file.write(pcd_header(count))
+            for chunk in self._chunks(cursor, count, "<f4"):
+                file.write(chunk.tobytes())
+
+    def _write_npy(self, cursor, count):
+        """
+        Function to write a .npy array of float64
+        Input: cursor (executed SELECT x, y, z), count (expected rows)
+        Output: File written chunk by chunk
+        """
+        with open(self.filename, "wb") as file:
+            npy_header(file, count)
+            for chunk in self._chunks(cursor, count, "<f8"):
+                file.write(chunk.tobytes())
+
+    def _write_npz(self, cursor, count):
+        """
+        Function to write a compressed .npz holding points.npy
+        Input: cursor (executed SELECT x, y, z), count (expected rows)
+        Output: File written chunk by chunk
+        """
+        # Stream the .npy member straight into the archive, no temp file
+        with zipfile.ZipFile(self.filename, "w", zipfile.ZIP_DEFLATED) as archive:
+            with archive.open("points.npy", "w", force_zip64=True) as file:
+                npy_header(file, count)
+                for chunk in self._chunks(cursor, count, "<f8"):
+                    file.write(chunk.tobytes())
+
+    @pyqtSlot()
+    def stop(self):
+        """
+        Function to cancel the export
+        Input: Stop signal from main window
+        Output: Set running flag to false, the partial file is removed
+        """
+        self.running = False
+
+
+class MeshExporter(QObject):
+    """ Export thread that reconstructs a scan's surface in a process pool """
+    # Signal to report progress in percent
+    progress = pyqtSignal(int)
+
+    # Signal with the written file name when done
+    finished = pyqtSignal(str)
+
+    # Any returned errors
+    error_text = pyqtSignal([str])
+
+    # Signals to stop the exporter
+    stopRequested = pyqtSignal()
+    stopped = pyqtSignal()
+
+    def __init__(self, db_path, scan_id, filename, segments=360, z_tolerance=0.25,
+                 min_ring_points=8, caps=True, workers=None, box=None):
+        super().__init__()
+        self.db_path = db_path
+        self.scan_id = scan_id
+        self.filename = filename
+        # Optional (mins, maxs) to crop to before reconstruction
+        self.box = box
+
+        # Reconstruction settings, see mesh.py
+        self.segments = max(3, int(segments))
+        self.z_tolerance = float(z_tolerance)
+        self.min_ring_points = int(min_ring_points)
+        self.caps = caps
+        # Worker processes, None uses every core
+        self.workers = workers or None
+
+        # Flag to check if the thread is running, cleared to cancel
+        self.running = False
+
+        # The export waits on the pool, so stop has to be called directly
+        self.stopRequested.connect(self.stop, Qt.DirectConnection)
+
+    @pyqtSlot()
+    def run(self):
+        """
+        Function to run the reconstruction and export
+        Input: Database path and target file name
+        Output: Mesh written as STL, OBJ or PLY from the file extension
+        """
+        self.running = True
+        extension = os.path.splitext(self.filename)[1].lower()
+        write = mesh.MESH_WRITERS.get(extension, mesh.write_stl)
+
+        try:
+            store = ScanStore(self.db_path)
+            try:
+                if self.box is not None:
+                    points = store.query_box(self.scan_id, *self.box)
+                else:
+                    points = store.load_points(self.scan_id)
+            finally:
+                store.close()
+            self.progress.emit(10)
+
+            grid, heights = self._resample(points)
+            if self.running:
+                if len(heights) < 2:
+                    raise ValueError("Not enough rings in the scan to build a mesh")
+                vertices, faces = mesh.grid_mesh(grid, heights, self.caps)
+                self.progress.emit(90)
+                write(self.filename, vertices, faces)
+                self.progress.emit(100)
+                self.finished.emit(self.filename)
+        except Exception as e:
+            # Anything from the pool (a crashed worker, MemoryError, a bad
+            # ring) ends up here, the window always gets stopped
+            self.error_text.emit(f"Export Error: {str(e) or type(e).__name__}")
+        finally:
+            self.stopped.emit()
+
+    def _resample(self, points):
+        """
+        Function to resample every ring in parallel worker processes
+        Input: points (N x 3 array of the whole scan)
+        Output: (R x segments radius grid, R heights), empty if cancelled
+        """
+        chunks = mesh.split_rings(points, self.z_tolerance)
+        results = [None] * len(chunks)
+
+        # Processes, not threads, so the trig and binning never hold the GIL.
+        # Spawned, a forked child would inherit Qt and the running threads
+        pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            futures = {
+                pool.submit(mesh.resample_rings, chunk, labels, self.segments, self.min_ring_points): index
+                for index, (chunk, labels) in enumerate(chunks)
+            }
+            pending = set(futures)
+            while pending and self.running:
+                # Wake up regularly so a cancel is noticed quickly
+                done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[futures[future]] = future.result()
+                if done:
+                    self.progress.emit(10 + int(80 * (len(chunks) - len(pending)) / len(chunks)))
+        finally:
+            pool.shutdown(wait=self.running, cancel_futures=True)
+
+        if not self.running or not results:
+            return np.zeros((0, self.segments)), np.zeros(0)
+        return (np.concatenate([grid for grid, _ in results]),
+                np.concatenate([heights for _, heights in results]))
+
+    @pyqtSlot()
+    def stop(self):
+        """
+        Function to cancel the reconstruction
+        Input: Stop signal from main window
+        Output: Set running flag to false, queued chunks are dropped
+        """
+        self.running = False
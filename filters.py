@@ -0,0 +1,278 @@
+import numpy as np
+
+from lod import voxel_keys
+
+try:
+    # Optional, the brute force fallback is fine for batch sized inputs
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+
+class RangeGate:
+    """ Drops non-finite points and points outside a radius / height window """
+    name = "range"
+
+    def __init__(self, min_radius=0.0, max_radius=200.0, min_z=-np.inf, max_z=np.inf):
+        self.min_radius = float(min_radius)
+        self.max_radius = float(max_radius)
+        self.min_z = float(min_z)
+        self.max_z = float(max_z)
+
+    def __call__(self, points):
+        """
+        Function to gate a batch by radius from the platform axis and height
+        Input: points (N x 3 array)
+        Output: N boolean mask of the points kept
+        """
+        radius = np.hypot(points[:, 0], points[:, 1])
+        return (
+            np.isfinite(points).all(axis=1)
+            & (radius >= self.min_radius) & (radius <= self.max_radius)
+            & (points[:, 2] >= self.min_z) & (points[:, 2] <= self.max_z)
+        )
+
+    def reset(self):
+        pass
+
+
+class RollingMedian:
+    """ Rejects radius spikes against the median of the readings before them """
+    name = "median"
+
+    def __init__(self, window=9, threshold=25.0, z_tolerance=0.25):
+        # Readings compared against, and the largest allowed deviation (mm)
+        self.window = max(1, int(window))
+        self.threshold = float(threshold)
+        # Largest Z difference inside one ring, computed heights jitter
+        self.z_tolerance = float(z_tolerance)
+        # Tail of the previous batch so the window spans batch boundaries
+        self.tail = np.zeros((0, 2))
+
+    def __call__(self, points):
+        """
+        Function to flag points far from the rolling median of their ring
+        Input: points (N x 3 array in scan order)
+        Output: N boolean mask of the points kept
+
+        A ring is one platform revolution, i.e. one z value give or take
+        z_tolerance. Readings from another ring never count towards the
+        median, so the window restarts every revolution. The first reading
+        of a ring is always kept.
+        """
+        current = np.column_stack((np.hypot(points[:, 0], points[:, 1]), points[:, 2]))
+        series = np.concatenate((self.tail, current))
+        self.tail = series[-self.window:]
+
+        # Pad the front so every point has a full window of predecessors
+        padded = np.concatenate((np.full((self.window, 2), np.nan), series))
+        start = len(padded) - len(current) - self.window
+        windows = np.lib.stride_tricks.sliding_window_view(padded[start:-1], self.window, axis=0)
+        radii, heights = windows[:, 0, :], windows[:, 1, :]
+
+        same_ring = np.abs(heights - current[:, 1:2]) <= self.z_tolerance
+        counts = same_ring.sum(axis=1)
+        keep = counts == 0
+        if not keep.all():
+            rows = ~keep
+            median = np.nanmedian(np.where(same_ring[rows], radii[rows], np.nan), axis=1)
+            keep[rows] = np.abs(current[rows, 0] - median) <= self.threshold
+        return keep
+
+    def reset(self):
+        self.tail = np.zeros((0, 2))
+
+
+def _mean_neighbour_distance(points, reference, k):
+    """
+    Function to get the mean distance from each point to its k nearest references
+    Input: points (N x 3), reference (M x 3, includes the points), k
+    Output: N float64 array
+    """
+    # The nearest match of a point in reference is itself, so ask for k + 1
+    k = min(k + 1, len(reference))
+    if cKDTree is not None:
+        distances, _ = cKDTree(reference).query(points, k=k)
+        distances = distances.reshape(len(points), -1)
+    else:
+        # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b, one matrix product per block
+        distances = np.empty((len(points), k))
+        reference_norms = (reference ** 2).sum(axis=1)
+        for start in range(0, len(points), 256):
+            block = points[start:start + 256]
+            squared = (block ** 2).sum(axis=1)[:, None] + reference_norms - 2.0 * block @ reference.T
+            nearest = np.partition(squared, k - 1, axis=1)[:, :k]
+            distances[start:start + 256] = np.sqrt(np.maximum(np.sort(nearest, axis=1), 0.0))
+    return distances[:, 1:].mean(axis=1) if k > 1 else np.zeros(len(points))
+
+
+class OutlierRemoval:
+    """ Statistical outlier removal over a KD-tree neighbourhood """
+    name = "outlier"
+
+    def __init__(self, neighbours=8, std_ratio=2.0, history=2048):
+        self.neighbours = max(1, int(neighbours))
+        self.std_ratio = float(std_ratio)
+        # Recently kept points, neighbours for the next batch (bounded)
+        self.history_size = max(0, int(history))
+        self.history = np.zeros((0, 3))
+
+    def __call__(self, points):
+        """
+        Function to flag points whose neighbours are unusually far away
+        Input: points (N x 3 array)
+        Output: N boolean mask of the points kept
+
+        Mean k-neighbour distances above the batch mean plus std_ratio
+        standard deviations are outliers. The neighbourhood includes the
+        last history points kept, so a small batch is still judged in context.
+        """
+        reference = np.concatenate((self.history, points))
+        if len(reference) <= self.neighbours:
+            keep = np.ones(len(points), dtype=bool)
+        else:
+            distance = _mean_neighbour_distance(points, reference, self.neighbours)
+            keep = distance <= distance.mean() + self.std_ratio * distance.std()
+
+        if self.history_size:
+            self.history = np.concatenate((self.history, points[keep]))[-self.history_size:]
+        return keep
+
+    def reset(self):
+        self.history = np.zeros((0, 3))
+
+
+class OverlapFilter:
+    """ Drops readings a resumed scan already stored before a reconnect """
+    name = "overlap"
+
+    def __init__(self, tolerance=0.25, voxel_size=0.5):
+        # Largest Z difference inside one ring, and the duplicate cell size
+        self.tolerance = float(tolerance)
+        self.voxel_size = float(voxel_size)
+        self.resume_z = None
+        self.keys = None
+        self.dropped = 0
+
+    @property
+    def armed(self):
+        return self.resume_z is not None
+
+    def arm(self, recent):
+        """
+        Function to remember where the stored scan ends
+        Input: recent (N x 3 array of the last points stored, newest last)
+        Output: Filter armed at the top ring of recent, no-op if empty
+        """
+        recent = np.asarray(recent, dtype=np.float64).reshape(-1, 3)
+        if not len(recent):
+            return
+        self.resume_z = float(recent[:, 2].max())
+        ring = recent[recent[:, 2] >= self.resume_z - self.tolerance]
+        self.keys = np.unique(voxel_keys(ring, self.voxel_size))
+
+    def disarm(self):
+        self.resume_z = None
+        self.keys = None
+
+    def __call__(self, points):
+        """
+        Function to flag readings the scan already holds
+        Input: points (N x 3 array in scan order)
+        Output: N boolean mask of the points kept
+
+        Rings below the resume ring are dropped. Inside it, points landing
+        in a cell already stored are dropped. The first point above it ends
+        the overlap and disarms the filter.
+        """
+        if not self.armed or not len(points):
+            return np.ones(len(points), dtype=bool)
+
+        z = points[:, 2]
+        keep = z > self.resume_z + self.tolerance
+        ring = ~keep & (z >= self.resume_z - self.tolerance)
+        if ring.any():
+            keep[ring] = ~np.isin(voxel_keys(points[ring], self.voxel_size), self.keys)
+
+        self.dropped += int(len(keep) - np.count_nonzero(keep))
+        if (z > self.resume_z + self.tolerance).any():
+            self.disarm()
+        return keep
+
+    def reset(self):
+        self.disarm()
+        self.dropped = 0
+
+
+class FilterPipeline:
+    """ Chain of streaming filters applied to each batch, with counters """
+
+    def __init__(self, stages=()):
+        self.stages = list(stages)
+        # Cumulative counts, rejected is per stage name
+        self.accepted = 0
+        self.rejected = {stage.name: 0 for stage in self.stages}
+
+    @classmethod
+    def from_config(cls, config, section="Filters"):
+        """
+        Function to build the pipeline from a config file
+        Input: config (ConfigParser), section name
+        Output: FilterPipeline with the enabled stages, in gate, median, outlier order
+        """
+        if not config.has_section(section):
+            return cls()
+        get = lambda key, fallback: config.getfloat(section, key, fallback=fallback)
+        stages = []
+        if config.getboolean(section, "range_gate", fallback=False):
+            stages.append(RangeGate(
+                get("min_radius", 0.0), get("max_radius", 200.0),
+                get("min_z", -np.inf), get("max_z", np.inf)
+            ))
+        if config.getboolean(section, "rolling_median", fallback=False):
+            stages.append(RollingMedian(
+                get("median_window", 9), get("median_threshold", 25.0), get("median_z_tolerance", 0.25)
+            ))
+        if config.getboolean(section, "outlier_removal", fallback=False):
+            stages.append(OutlierRemoval(
+                get("outlier_neighbours", 8), get("outlier_std_ratio", 2.0), get("outlier_history", 2048)
+            ))
+        return cls(stages)
+
+    def __bool__(self):
+        return bool(self.stages)
+
+    def apply(self, points):
+        """
+        Function to run a batch through every stage
+        Input: points (N x 3 array)
+        Output: M x 3 array of the points that passed, counters updated
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        for stage in self.stages:
+            if not len(points):
+                break
+            keep = stage(points)
+            self.rejected[stage.name] += int(len(keep) - np.count_nonzero(keep))
+            points = points[keep]
+        self.accepted += len(points)
+        return points
+
+    def counts(self):
+        """
+        Function to get the counters
+        Input: None
+        Output: Dict with accepted and one rejected count per stage
+        """
+        return {"accepted": self.accepted, **self.rejected}
+
+    def reset(self):
+        """
+        Function to clear stage state and counters for a new scan
+        Input: None
+        Output: Stages and counts back to zero
+        """
+        for stage in self.stages:
+            stage.reset()
+        self.accepted = 0
+        self.rejected = dict.fromkeys(self.rejected, 0)
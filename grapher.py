@@ -1,132 +1,212 @@
-from PyQt5.QtCore import QObject, QTimer, pyqtSignal, pyqtSlot
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
 import sqlite3
+import queue
+import time
+import numpy as np
+
+from lod import VoxelDecimator, region_points
+from store import ScanStore
+
 
 class DataGrapher(QObject):
-    newData = pyqtSignal(list)  # Signal to main thread for new data
+    newData = pyqtSignal(list)  # Signal that new batches are in the queue
     stopRequested = pyqtSignal() # Signal to stop the grapher
     stopped = pyqtSignal()  # Signal to indicate the grapher has stopped
+
+    # Signal to the main thread with points, mins and maxs to display
+    pointsReady = pyqtSignal(object, object, object)
+
+    # Request and reply for a denser view of a box (mins, maxs)
+    regionRequested = pyqtSignal(object, object)
+    regionReady = pyqtSignal(object, object, object)
     
     # Any returned errors
     error_text = pyqtSignal([str])
 
-    def __init__(self, db_path):
+    def __init__(self, db_path, scan_id, data_queue=None, point_budget=100000, voxel_size=1.0,
+                 capture_path=None, metrics=None, cursor=None):
         super().__init__()
-        # Setup database path
+        # Setup database path, only read to catch up after a restart
         self.data = db_path
-        # Set the last index to 0
-        self.last_id = 0
+        self.scan_id = scan_id
+        self.store = None
+        # Last sequence number already copied into the vertex buffer
+        self.plotted_seq = -1
+
+        # Capture file to catch up from instead of the database, if any
+        self.capture_path = capture_path
+
+        # Live batches pushed by the main window, or read from a
+        # ringbuffer.Cursor when one is given
+        self.data_queue = data_queue if data_queue is not None else queue.Queue()
+        self.cursor = cursor
+        # Cleared before each drain, lets the main window skip redundant newData
+        self.update_pending = False
 
         # Set flags and initial values
         self.running = False
-        self.canvas = None
-        self.ax = None
-        self.total_graph_data = []
-        self.timer = None
+        # Live preview is decimated, full resolution stays in scan_points
+        self.point_budget = point_budget
+        self.preview = VoxelDecimator(point_budget, voxel_size)
+
+        # Optional metrics.Metrics for drain and publish timing
+        self.metrics = metrics
 
         self.stopRequested.connect(self.stop)
+        self.regionRequested.connect(self.loadRegion)
 
     @pyqtSlot()
     def run(self):
         """
         Function to run the grapher thread
         Input: Database path
-        Output: Emits newData signal with the latest data
+        Output: Plots any stored rows, then waits for newData pushes
         """
         self.running = True
 
-        # Start a timer to poll the queue periodically
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.pollQueue)
-        self.timer.start(100)  # Poll every 100 ms
+        # One read connection for the life of the grapher
+        try:
+            self.store = ScanStore(self.data)
+        except sqlite3.Error as e:
+            self.error_text.emit(f"Database Error: {str(e)}")
+            return
+
+        self.catchUp()
 
     @pyqtSlot()
-    def pollQueue(self):
+    def catchUp(self):
         """
-        Function to poll the database for new data
+        Function to load rows already in the database
         Input: None
-        Output: Emits newData signal with the latest data
+        Output: Rows newer than plotted_seq added to the graph
         """
-        if not self.running:
+        if not self.running or not self.store:
+            return
+
+        if self.capture_path:
+            self._catchUpCapture()
             return
+
         try:
-            conn = sqlite3.connect(self.data)
-            cursor = conn.cursor()
-            
-            # Just check if new data exists
-            cursor.execute("""
-                SELECT EXISTS(
-                    SELECT 1 FROM scan_data WHERE id > ?
-                )
-            """, (self.last_id,))
-            
-            has_new_data = cursor.fetchone()[0]
-            
-            if has_new_data:
-                # Update last_id and signal for update
-                cursor.execute("SELECT MAX(id) FROM scan_data")
-                self.last_id = cursor.fetchone()[0]
-
-                # Send out an empty signal to update the graph
-                self.newData.emit([])
-                
-            conn.close()
+            # Stream in chunks so a long scan never sits in memory at once
+            added = 0
+            for last_seq, points in self.store.iter_points(self.scan_id, self.plotted_seq):
+                self.plotted_seq = last_seq
+                self.preview.add(points)
+                added += len(points)
         except sqlite3.Error as e:
             self.error_text.emit(f"Database Error: {str(e)}")
+            return
+
+        if added:
+            self._publish()
+
+    def _catchUpCapture(self):
+        """
+        Function to load rows already in the capture file
+        Input: None
+        Output: Rows newer than plotted_seq added from the memory map
+        """
+        from capture import CaptureReader
+
+        try:
+            reader = CaptureReader(self.capture_path)
+        except (OSError, ValueError) as e:
+            self.error_text.emit(f"Capture Error: {str(e)}")
+            return
+
+        # Column views straight off the map, nothing to parse
+        start = self.plotted_seq + 1
+        for chunk_start in range(start, reader.count, 65536):
+            self.preview.add(reader.points(chunk_start, chunk_start + 65536))
+        if reader.count > start:
+            self.plotted_seq = reader.count - 1
+            self._publish()
 
     @pyqtSlot(list)
     def updateModel(self, data):
         """
         Function to update the model with new data
-        Input: Data in the form of a list [x, y, z]
-        Output: Updates the graph with new data
+        Input: newData signal, the batches themselves are in data_queue
+        Output: Appends every queued batch to the graph and redraws once
+        """
+        self.update_pending = False
+        if not self.running:
+            return
+
+        metrics = self.metrics
+        if metrics is not None:
+            start = time.perf_counter()
+            metrics.gauge("grapher.queue", self.cursor.available if self.cursor else self.data_queue.qsize())
+
+        # Drain the queue, later signals find it empty and skip the redraw
+        added = batches = 0
+        if self.cursor is not None:
+            rows = self.cursor.read()
+            if len(rows):
+                self.preview.add(rows[:, :3])
+                added, batches = len(rows), 1
+        while True:
+            try:
+                batch = self.data_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.preview.add(batch)
+            added += len(batch)
+            batches += 1
+
+        if added:
+            self._publish()
+
+        if metrics is not None and batches:
+            metrics.since("grapher.update", start)
+            metrics.count("grapher.batches", batches)
+            metrics.count("grapher.points", added)
+            metrics.gauge("grapher.preview_points", self.preview.points.count)
+
+    def _publish(self):
         """
-        if not self.running or not self.canvas or not self.ax:
+        Function to hand the current cloud to the viewer on the main thread
+        Input: None
+        Output: Emits pointsReady with a view of the vertex buffer
+        """
+        # Appends only write past count, growth and coarsening reallocate,
+        # so the view handed over stays valid without a copy
+        buffer = self.preview.points
+        self.pointsReady.emit(buffer.view(), buffer.mins.copy(), buffer.maxs.copy())
+
+    @pyqtSlot(object, object)
+    def loadRegion(self, mins, maxs):
+        """
+        Function to load a denser subset of a box for zoomed-in views
+        Input: mins and maxs (box corners)
+        Output: Emits regionReady with up to point_budget points from the box
+        """
+        if not self.running or not self.store:
             return
 
         try:
-            conn = sqlite3.connect(self.data)
-            cursor = conn.cursor()
-            
-            # Get all data points
-            cursor.execute("SELECT x, y, z FROM scan_data")
-            all_data = cursor.fetchall()
-            conn.close()
-
-            if all_data:
-                # Clear the current plot
-                self.ax.clear()
-                
-                # Unzip the data directly from database results
-                xs, ys, zs = zip(*all_data)
-                self.ax.scatter(xs, ys, zs, color='blue')
-                
-                # Update the plot
-                self.canvas.draw()
-                
+            points = region_points(self.store, self.scan_id, mins, maxs, self.point_budget)
         except sqlite3.Error as e:
-            self.error_text.emit(f"Plot Update Error: {str(e)}")
+            self.error_text.emit(f"Database Error: {str(e)}")
+            return
+
+        self.regionReady.emit(points, np.asarray(mins), np.asarray(maxs))
 
     @pyqtSlot()
     def stop(self):
         """
         Function to stop the grapher thread
         Input: Stop signal from main window
-        Output: Set running flag to false and stop the timer
+        Output: Set running flag to false and close the read connection
         """
         self.running = False
+        if self.cursor is not None:
+            self.cursor.detach()
 
-        # Stop the running timer
-        if self.timer:
-            self.timer.stop()
-            self.timer = None
+        # Close the catch-up connection
+        if self.store:
+            self.store.close()
+            self.store = None
 
         self.stopped.emit()  # Emit stopped signal to main thread
-
-    def set_canvas(self, canvas, ax):
-        """
-        Function to set the canvas and axes for plotting
-        Input: canvas (matplotlib canvas), ax (matplotlib axes)
-        Output: Sets the canvas and axes for plotting
-        """
-        self.canvas = canvas
-        self.ax = ax
\ No newline at end of file
@@ -0,0 +1,376 @@
+import os
+import sys
+import csv
+import json
+import time
+import queue
+import signal
+import argparse
+import threading
+import configparser
+
+import serial
+import numpy as np
+
+# Only the Qt-free parts of the app, no PyQt5 or matplotlib here
+from protocol import FrameReader
+from calibration import Calibration
+from filters import FilterPipeline
+from store import ScanStore
+
+# Longest a blocking read may wait, bounds how quickly a stop is noticed
+READ_TIMEOUT = 0.05
+
+
+class SerialReader(threading.Thread):
+    """ Plain thread that reads the scanner and queues parsed batches """
+
+    def __init__(self, port_name, baud, batches, calibration=None, filters=None,
+                 batch_count=256, batch_interval=0.05, settle=2.0):
+        super().__init__(daemon=True)
+        self.port_name = port_name
+        self.baud = baud
+        # Bounded hand off to the storage loop, (points, raws) per window
+        self.batches = batches
+        self.calibration = calibration or Calibration()
+        self.filters = filters
+        self.batch_count = max(1, int(batch_count))
+        self.batch_interval = max(0.0, float(batch_interval))
+        # Longest wait for the board to report in after the port opens
+        self.settle = settle
+
+        self.reader = FrameReader()
+        self.stop_event = threading.Event()
+        self.error = None
+
+        # Counters read by the metrics printer
+        self.bytes_read = 0
+        self.last_message = None
+
+    def run(self):
+        """
+        Function for the reader thread
+        Input: None
+        Output: (points, raws) batches queued until stopped or the port fails
+        """
+        try:
+            port = serial.serial_for_url(self.port_name, baudrate=self.baud, timeout=READ_TIMEOUT)
+        except (serial.SerialException, ValueError) as e:
+            self.error = f"Serial port error: {str(e)}"
+            self.batches.put(None)
+            return
+
+        try:
+            points, raws = [], []
+
+            # Wait for the board to report in, at most settle seconds
+            deadline = time.monotonic() + self.settle
+            while not self.stop_event.is_set() and time.monotonic() < deadline:
+                chunk = port.read(port.in_waiting or 1)
+                if chunk and self._feed(chunk, points, raws):
+                    break
+
+            port.write(b"1")
+            port.flush()
+
+            started = time.monotonic()
+            while not self.stop_event.is_set():
+                chunk = port.read(port.in_waiting or 1)
+                if chunk:
+                    if not points and not raws:
+                        started = time.monotonic()
+                    self._feed(chunk, points, raws)
+
+                pending = len(points) + len(raws)
+                if pending and (pending >= self.batch_count or
+                                time.monotonic() - started >= self.batch_interval):
+                    self._queue(points, raws)
+                    points, raws = [], []
+
+            if points or raws:
+                self._queue(points, raws)
+        except (serial.SerialException, OSError) as e:
+            # A pulled USB cable raises a plain OSError (EIO) on Linux
+            self.error = f"Serial communication error: {str(e)}"
+        finally:
+            try:
+                try:
+                    port.write(b"0")
+                    port.flush()
+                except (serial.SerialException, OSError):
+                    pass
+                port.close()
+            finally:
+                # End of stream marker for the storage loop, whatever happened above
+                self.batches.put(None)
+
+    def _feed(self, chunk, points, raws):
+        """
+        Function to parse received bytes into the current window
+        Input: chunk (bytes), points and raws (window lists, extended in place)
+        Output: Number of complete frames in the chunk
+        """
+        self.bytes_read += len(chunk)
+        messages, new_points = self.reader.feed(chunk)
+        new_raws = self.reader.take_raws()
+        if messages:
+            self.last_message = messages[-1]
+        points.extend(new_points)
+        raws.extend(new_raws)
+        return len(messages) + len(new_points) + len(new_raws)
+
+    def _queue(self, points, raws):
+        """
+        Function to convert, filter and queue one batch window
+        Input: points (list of x, y, z), raws (list of distance, step, z step)
+        Output: (points array, raws array or None) put on the batch queue
+        """
+        cloud = np.array(points, dtype=np.float64).reshape(-1, 3)
+        raw = None
+        if raws:
+            raw = np.array(raws, dtype=np.float64)
+            converted, _ = self.calibration.to_cartesian(raw)
+            cloud = np.concatenate((cloud, converted))
+        if self.filters and len(cloud):
+            cloud = self.filters.apply(cloud)
+        self.batches.put((cloud, raw))
+
+    def stop(self):
+        """
+        Function to ask the reader to finish
+        Input: None
+        Output: Loop exits after its current read, the rest is still queued
+        """
+        self.stop_event.set()
+
+
+class SqliteSink:
+    """ Writes batches as a new scan in the app's database """
+
+    def __init__(self, path, label=None, journal_mode="WAL", synchronous="NORMAL"):
+        self.store = ScanStore(path, journal_mode, synchronous)
+        self.store.create_schema()
+        self.scan_id = self.store.create_scan(label)
+        self.next_seq = 0
+        self.next_raw_seq = 0
+
+    def write(self, points, raws):
+        """
+        Function to store one batch
+        Input: points (N x 3 array), raws (M x 3 array or None)
+        Output: Rows appended to scan_points and scan_raw
+        """
+        stamp = time.time()
+        if raws is not None:
+            self.store.insert_raw(self.scan_id, self.next_raw_seq, [(d, s, z, stamp) for d, s, z in raws.tolist()])
+            self.next_raw_seq += len(raws)
+        if len(points):
+            self.store.insert_points(self.scan_id, self.next_seq, [(x, y, z, stamp) for x, y, z in points.tolist()])
+            self.next_seq += len(points)
+
+    def close(self):
+        self.store.finish_scan(self.scan_id)
+        self.store.close()
+
+
+class CaptureSink:
+    """ Writes batches to a columnar capture file """
+
+    def __init__(self, path):
+        from capture import CaptureWriter
+        self.writer = CaptureWriter(path)
+
+    def write(self, points, raws):
+        self.writer.append(points)
+
+    def close(self):
+        self.writer.close()
+
+
+class CsvSink:
+    """ Writes batches as x,y,z CSV rows """
+
+    def __init__(self, path):
+        self.file = open(path, "a", newline="")
+        self.writer = csv.writer(self.file)
+
+    def write(self, points, raws):
+        self.writer.writerows(points.tolist())
+
+    def close(self):
+        self.file.close()
+
+
+def open_sink(path, label=None, config=None):
+    """
+    Function to pick the output writer from the file extension
+    Input: path (.cap, .csv, anything else is a SQLite database), label, config
+    Output: Sink with write(points, raws) and close()
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".cap":
+        return CaptureSink(path)
+    if extension == ".csv":
+        return CsvSink(path)
+    config = config or configparser.ConfigParser()
+    return SqliteSink(
+        path, label,
+        journal_mode=config.get("Database", "journal_mode", fallback="WAL"),
+        synchronous=config.get("Database", "synchronous", fallback="NORMAL")
+    )
+
+
+def emit_metrics(out, fmt, metrics):
+    """
+    Function to print one metrics record
+    Input: out (text stream), fmt (json or text), metrics (dict)
+    Output: One line written and flushed
+    """
+    if fmt == "json":
+        out.write(json.dumps(metrics) + "\n")
+    else:
+        out.write(" ".join(f"{key}={value}" for key, value in metrics.items()) + "\n")
+    out.flush()
+
+
+def capture(args):
+    """
+    Function to run a headless capture
+    Input: Parsed command line arguments
+    Output: Exit code, 0 on a clean stop
+    """
+    config = configparser.ConfigParser()
+    config.read(args.config)
+
+    batches = queue.Queue(maxsize=args.queue_size)
+    reader = SerialReader(
+        args.port or config.get("Communication", "port", fallback="COM3"),
+        args.baud or config.getint("Communication", "baudrate", fallback=115200),
+        batches,
+        calibration=Calibration.from_config(config),
+        filters=None if args.no_filters else FilterPipeline.from_config(config),
+        batch_count=config.getint("Communication", "batch_count", fallback=256),
+        batch_interval=config.getfloat("Communication", "batch_interval", fallback=0.05),
+        settle=args.settle
+    )
+
+    try:
+        sink = open_sink(args.out, args.label, config)
+    except (OSError, ValueError) as e:
+        print(f"Output error: {str(e)}", file=sys.stderr)
+        return 1
+
+    # Ctrl-C and systemd stops end the capture cleanly
+    signal.signal(signal.SIGINT, lambda *_: reader.stop())
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, lambda *_: reader.stop())
+
+    start = time.monotonic()
+    # Only deadlines the loop has to wake up for, none blocks until a batch
+    next_report = start + args.interval if args.interval > 0 else None
+    end = start + args.duration if args.duration else None
+    window_points = total = 0
+    window_start = start
+
+    def report(final=False):
+        nonlocal window_points, window_start
+        now = time.monotonic()
+        metrics = {
+            "event": "done" if final else "progress",
+            "elapsed": round(now - start, 3),
+            "points": total,
+            "rate": round(window_points / max(now - window_start, 1e-9), 1),
+            "bytes": reader.bytes_read,
+            "rejected_lines": reader.reader.rejected,
+            "queued": batches.qsize(),
+        }
+        if reader.filters:
+            metrics["filtered"] = reader.filters.counts()
+        if reader.last_message is not None:
+            metrics["status"] = reader.last_message
+        emit_metrics(sys.stdout, args.metrics, metrics)
+        window_points, window_start = 0, now
+
+    reader.start()
+    try:
+        while True:
+            deadlines = [deadline for deadline in (next_report, end) if deadline is not None]
+            timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            try:
+                batch = batches.get(timeout=timeout)
+            except queue.Empty:
+                batch = ()
+            if batch is None:
+                break
+            if batch:
+                points, raws = batch
+                sink.write(points, raws)
+                total += len(points)
+                window_points += len(points)
+
+            now = time.monotonic()
+            if end is not None and now >= end:
+                # The reader ends the stream with None once it has stopped
+                reader.stop()
+                end = None
+            if args.max_points and total >= args.max_points:
+                reader.stop()
+            if next_report is not None and now >= next_report:
+                report()
+                next_report = now + args.interval
+    finally:
+        reader.stop()
+        reader.join(2.0)
+        sink.close()
+
+    report(final=True)
+    if reader.error:
+        print(reader.error, file=sys.stderr)
+        return 1
+    return 0
+
+
+def build_parser():
+    """
+    Function to build the command line parser
+    Input: None
+    Output: argparse.ArgumentParser with the headless sub-commands
+    """
+    parser = argparse.ArgumentParser(prog="python -m scanner", description="3D scanner without the GUI")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_capture = commands.add_parser("capture", help="record a scan to a file")
+    parser_capture.add_argument("--port", help="serial port or pyserial URL, default from config.ini")
+    parser_capture.add_argument("--baud", type=int, help="baud rate, default from config.ini")
+    parser_capture.add_argument("--out", required=True,
+                                help="output: .cap capture, .csv, anything else is a SQLite database")
+    parser_capture.add_argument("--label", help="scan label when writing to a database")
+    parser_capture.add_argument("--duration", type=float, default=0.0, help="stop after this many seconds")
+    parser_capture.add_argument("--max-points", type=int, default=0, help="stop after this many points")
+    parser_capture.add_argument("--interval", type=float, default=1.0, help="seconds between metrics lines, 0 for none")
+    parser_capture.add_argument("--metrics", choices=("json", "text"), default="json", help="metrics line format")
+    parser_capture.add_argument("--no-filters", action="store_true", help="store every point, skip [Filters]")
+    parser_capture.add_argument("--settle", type=float, default=2.0, help="longest wait for the board after opening the port")
+    parser_capture.add_argument("--queue-size", type=int, default=64, help="most batches waiting for storage")
+    parser_capture.add_argument("--config", default=os.path.join(os.getcwd(), "Config", "config.ini"),
+                                help="config file for calibration, filters and batching")
+    parser_capture.set_defaults(func=capture)
+    return parser
+
+
+# Sub-commands that scanner.py hands over before importing Qt
+COMMANDS = ("capture",)
+
+
+def main(argv=None):
+    """
+    Function for the headless entry point
+    Input: argv (arguments after the program name)
+    Output: Exit code
+    """
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+from PyQt5.QtCore import QObject, Qt, pyqtSignal, pyqtSlot
+import sqlite3
+import queue
+import time
+
+from store import ScanStore, JOURNAL_MODES, SYNCHRONOUS_MODES
+
+
+class DataWriter(QObject):
+    """ Writer thread for batching scan points into SQLite """
+    # Signal to report ingest rate (points/sec) and flush latency (ms)
+    stats = pyqtSignal(float, float)
+
+    # Any returned errors
+    error_text = pyqtSignal([str])
+
+    # Signals to stop the writer
+    stopRequested = pyqtSignal()
+    stopped = pyqtSignal()
+
+    def __init__(self, db_path, scan_id, batch_size=500, flush_interval=0.25,
+                 journal_mode="WAL", synchronous="NORMAL", metrics=None, cursor=None):
+        super().__init__()
+        # Database parameters
+        self.db_path = db_path
+        self.scan_id = scan_id
+        self.next_seq = 0
+        self.next_raw_seq = 0
+        self.journal_mode = journal_mode.upper()
+        self.synchronous = synchronous.upper()
+        if self.journal_mode not in JOURNAL_MODES:
+            raise ValueError(f"Unsupported journal mode: {journal_mode}")
+        if self.synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"Unsupported synchronous mode: {synchronous}")
+
+        # Flush when either bound is hit, whichever comes first
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(0.01, float(flush_interval))
+
+        # Thread-safe hand off from the GUI thread
+        self.pending = queue.Queue()
+
+        # Optional ringbuffer.Cursor, points then come from the ring as
+        # x, y, z, t rows and the queue only carries raw readings
+        self.cursor = cursor
+
+        # Optional metrics.Metrics for insert latency and queue depth
+        self.metrics = metrics
+
+        # Flag to check if the thread is running
+        self.running = False
+
+        # The run loop blocks, so stop has to be called directly
+        self.stopRequested.connect(self.stop, Qt.DirectConnection)
+
+    def enqueue(self, point):
+        """
+        Function to queue a point for the next flush
+        Input: point (x, y, z) from any thread
+        Output: Point added to the pending queue
+        """
+        self.pending.put((time.time(), [point], False))
+
+    def enqueue_many(self, points):
+        """
+        Function to queue a batch of points for the next flush
+        Input: points (list or N x 3 array of x, y, z) from any thread
+        Output: Batch added to the pending queue as one item
+        """
+        self.pending.put((time.time(), points, False))
+
+    def enqueue_raw(self, raws):
+        """
+        Function to queue raw readings for scan_raw
+        Input: raws (N x 3 array of distance, step, z_step) from any thread
+        Output: Batch added to the pending queue as one item
+        """
+        self.pending.put((time.time(), raws, True))
+
+    @pyqtSlot()
+    def run(self):
+        """
+        Function to run the writer thread
+        Input: Points queued with enqueue()
+        Output: Points written to scan_points in grouped transactions
+        """
+        self.running = True
+
+        try:
+            store = ScanStore(self.db_path, self.journal_mode, self.synchronous)
+            # Continue after whatever the scan already holds
+            self.next_seq = store.next_seq(self.scan_id)
+            self.next_raw_seq = store.next_seq(self.scan_id, "scan_raw")
+        except sqlite3.Error as e:
+            self.error_text.emit(f"Database Error: {str(e)}")
+            # Never leave the worker waiting on a consumer that is gone
+            if self.cursor is not None:
+                self.cursor.detach()
+            self.stopped.emit()
+            return
+
+        batch = []
+        raw_batch = []
+        deadline = time.monotonic() + self.flush_interval
+        window_start = time.monotonic()
+        window_points = 0
+
+        # Keep draining after a stop so nothing queued is lost
+        while self.running or not self.pending.empty() or (self.cursor is not None and self.cursor.available):
+            timeout = max(0.0, deadline - time.monotonic())
+            if self.cursor is not None:
+                # Rows already carry their stamp, wait here instead of on the queue
+                rows = self.cursor.read(self.batch_size - len(batch), timeout)
+                if len(rows):
+                    batch.extend(map(tuple, rows.tolist()))
+                timeout = 0.0
+
+            try:
+                stamp, points, raw = self.pending.get(timeout=timeout)
+                # Arrays become plain rows here, off the GUI thread
+                rows = points.tolist() if hasattr(points, "tolist") else points
+                (raw_batch if raw else batch).extend((a, b, c, stamp) for a, b, c in rows)
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            if len(batch) + len(raw_batch) >= self.batch_size or now >= deadline:
+                if self.metrics is not None:
+                    self.metrics.gauge("db.queue", self.pending.qsize())
+                if raw_batch:
+                    self._flush_raw(store, raw_batch)
+                    raw_batch = []
+                if batch:
+                    latency = self._flush(store, batch)
+                    window_points += len(batch)
+                    batch = []
+
+                    elapsed = time.monotonic() - window_start
+                    if elapsed > 0:
+                        self.stats.emit(window_points / elapsed, latency)
+                    window_start = time.monotonic()
+                    window_points = 0
+                deadline = now + self.flush_interval
+
+        if raw_batch:
+            self._flush_raw(store, raw_batch)
+        if batch:
+            self._flush(store, batch)
+
+        if self.cursor is not None:
+            self.cursor.detach()
+        store.close()
+        self.stopped.emit()
+
+    def _flush(self, store, batch):
+        """
+        Function to write one batch in a single transaction
+        Input: store (ScanStore), batch (list of x, y, z, t)
+        Output: Flush latency in milliseconds
+        """
+        start = time.perf_counter()
+        try:
+            store.insert_points(self.scan_id, self.next_seq, batch)
+            self.next_seq += len(batch)
+        except sqlite3.Error as e:
+            self.error_text.emit(f"Database Error: {str(e)}")
+        if self.metrics is not None:
+            self.metrics.since("db.insert", start)
+            self.metrics.count("db.rows", len(batch))
+        return (time.perf_counter() - start) * 1000.0
+
+    def _flush_raw(self, store, batch):
+        """
+        Function to write one batch of raw readings in a single transaction
+        Input: store (ScanStore), batch (list of distance, step, z_step, t)
+        Output: Rows written to scan_raw
+        """
+        start = time.perf_counter()
+        try:
+            store.insert_raw(self.scan_id, self.next_raw_seq, batch)
+            self.next_raw_seq += len(batch)
+        except sqlite3.Error as e:
+            self.error_text.emit(f"Database Error: {str(e)}")
+        if self.metrics is not None:
+            self.metrics.since("db.insert_raw", start)
+            self.metrics.count("db.raw_rows", len(batch))
+
+    @pyqtSlot()
+    def stop(self):
+        """
+        Function to stop the writer thread
+        Input: Stop signal from main window
+        Output: Set running flag to false, pending points still get flushed
+        """
+        self.running = False
@@ -0,0 +1,152 @@
+import numpy as np
+
+# Voxel indices are packed into one int64 key, 21 bits per axis
+_KEY_BITS = 21
+_KEY_OFFSET = 1 << (_KEY_BITS - 1)
+_KEY_MASK = (1 << _KEY_BITS) - 1
+
+
+class PointBuffer:
+    """ Preallocated NumPy vertex buffer for the live point cloud """
+
+    def __init__(self, capacity=65536):
+        # Vertex storage, grown by doubling so appends stay amortized O(1)
+        self.points = np.empty((capacity, 3), dtype=np.float32)
+        self.count = 0
+
+        # Running bounds so axis limits never need a full pass over the data
+        self.mins = np.full(3, np.inf, dtype=np.float32)
+        self.maxs = np.full(3, -np.inf, dtype=np.float32)
+
+    def append(self, rows):
+        """
+        Function to append new points to the buffer
+        Input: rows (N x 3 array-like of x, y, z)
+        Output: Points copied into the buffer and bounds updated
+        """
+        rows = np.asarray(rows, dtype=np.float32).reshape(-1, 3)
+        if not len(rows):
+            return
+
+        needed = self.count + len(rows)
+        if needed > len(self.points):
+            capacity = len(self.points)
+            while capacity < needed:
+                capacity *= 2
+            grown = np.empty((capacity, 3), dtype=np.float32)
+            grown[:self.count] = self.points[:self.count]
+            self.points = grown
+
+        self.points[self.count:needed] = rows
+        self.count = needed
+
+        np.minimum(self.mins, rows.min(axis=0), out=self.mins)
+        np.maximum(self.maxs, rows.max(axis=0), out=self.maxs)
+
+    def view(self):
+        """
+        Function to get the filled part of the buffer
+        Input: None
+        Output: N x 3 view of the stored points (no copy)
+        """
+        return self.points[:self.count]
+
+    def clear(self):
+        """
+        Function to empty the buffer without releasing its memory
+        Input: None
+        Output: Count and bounds reset
+        """
+        self.count = 0
+        self.mins.fill(np.inf)
+        self.maxs.fill(-np.inf)
+
+
+def voxel_keys(points, voxel_size):
+    """
+    Function to map points to packed voxel grid keys
+    Input: points (N x 3 array), voxel_size (edge length, same units as points)
+    Output: int64 array of N voxel keys
+    """
+    index = np.floor(np.asarray(points, dtype=np.float64) / voxel_size).astype(np.int64)
+    index = (index + _KEY_OFFSET) & _KEY_MASK
+    return (index[:, 0] << (2 * _KEY_BITS)) | (index[:, 1] << _KEY_BITS) | index[:, 2]
+
+
+class VoxelDecimator:
+    """ Incremental voxel-grid downsampler capped at a point budget """
+
+    def __init__(self, budget=100000, voxel_size=1.0):
+        # Most points the preview may hold
+        self.budget = max(1, int(budget))
+        # Current voxel edge, doubled whenever the budget is exceeded
+        self.voxel_size = float(voxel_size)
+
+        # One kept point per occupied voxel
+        self.points = PointBuffer()
+        self.occupied = np.empty(0, dtype=np.int64)
+
+    def add(self, points):
+        """
+        Function to add new points to the preview
+        Input: points (N x 3 array-like)
+        Output: Number of points kept from this batch
+        """
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        if not len(points):
+            return 0
+
+        # First point per voxel within the batch, then drop occupied voxels
+        keys, first = np.unique(voxel_keys(points, self.voxel_size), return_index=True)
+        fresh = ~np.isin(keys, self.occupied, assume_unique=True)
+        if not fresh.any():
+            return 0
+
+        self.points.append(points[np.sort(first[fresh])])
+        self.occupied = np.union1d(self.occupied, keys[fresh])
+
+        if self.points.count > self.budget:
+            self._coarsen()
+        return int(fresh.sum())
+
+    def _coarsen(self):
+        """
+        Function to double the voxel size until the preview fits the budget
+        Input: None
+        Output: Preview rebuilt into a new buffer
+        """
+        kept = self.points.view()
+        while True:
+            self.voxel_size *= 2.0
+            keys, first = np.unique(voxel_keys(kept, self.voxel_size), return_index=True)
+            if len(keys) <= self.budget:
+                break
+
+        # A new buffer, views already handed out keep their old data
+        self.points = PointBuffer(max(len(keys), 1024))
+        self.points.append(kept[np.sort(first)])
+        self.occupied = keys
+
+    def view(self):
+        """
+        Function to get the preview points
+        Input: None
+        Output: N x 3 view of the kept points
+        """
+        return self.points.view()
+
+
+def region_points(store, scan_id, mins, maxs, budget=100000):
+    """
+    Function to load a denser subset of a region from the database
+    Input: store (ScanStore), scan_id, mins and maxs (box corners),
+           budget (max points)
+    Output: N x 3 float32 array decimated to the budget
+    """
+    # Start fine relative to the box, the decimator coarsens as needed
+    extent = float(np.max(np.asarray(maxs, dtype=np.float64) - np.asarray(mins, dtype=np.float64)))
+    decimator = VoxelDecimator(budget, voxel_size=max(extent, 1e-6) / 4096.0)
+    # Only the index blocks overlapping the box are read
+    for points in store.iter_box(scan_id, mins, maxs):
+        decimator.add(points)
+    return decimator.view()
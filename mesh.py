@@ -0,0 +1,187 @@
+import numpy as np
+
+# The scanner measures one ring per Z step while the platform turns, so a
+# scan is a stack of rings around the platform axis. Each ring is resampled
+# onto a fixed number of angular segments, which turns the cloud into a
+# rings x segments radius grid that triangulates as quad strips.
+
+# Binary STL triangle record: normal, three vertices, attribute byte count
+STL_RECORD = np.dtype([("normal", "<f4", 3), ("vertices", "<f4", (3, 3)), ("attribute", "<u2")])
+
+# Binary PLY face record: vertex count then three indices
+PLY_FACE = np.dtype([("count", "u1"), ("indices", "<i4", 3)])
+
+
+def ring_labels(z, tolerance=0.25):
+    """
+    Function to group points into rings by height
+    Input: z (N array, sorted ascending), tolerance (largest Z gap inside a ring, mm)
+    Output: N int array of ring numbers starting at 0
+    """
+    labels = np.zeros(len(z), dtype=np.int64)
+    if len(z) > 1:
+        labels[1:] = np.cumsum(np.diff(z) > tolerance)
+    return labels
+
+
+def split_rings(points, tolerance=0.25, rings_per_chunk=64):
+    """
+    Function to sort a cloud into rings and cut it into whole-ring chunks
+    Input: points (N x 3), tolerance (see ring_labels), rings_per_chunk
+    Output: List of (points, labels) chunks in ascending Z, for resample_rings
+    """
+    points = points[np.argsort(points[:, 2], kind="stable")]
+    labels = ring_labels(points[:, 2], tolerance)
+    if not len(points):
+        return []
+    bounds = np.searchsorted(labels, np.arange(0, labels[-1] + 1, rings_per_chunk))
+    bounds = np.append(bounds, len(points))
+    return [(points[start:end], labels[start:end]) for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def resample_rings(points, labels, segments=360, min_points=8):
+    """
+    Function to resample rings onto a fixed angular grid
+    Input: points (N x 3, grouped by ring), labels (N ring numbers),
+           segments (angular bins per ring), min_points (smaller rings are skipped)
+    Output: (R x segments radius grid, R ring heights) for the rings kept
+
+    Each bin holds the mean radius of its points. Empty bins are filled by
+    interpolating around the ring, so gaps never break the mesh.
+    """
+    if not len(points):
+        return np.zeros((0, segments)), np.zeros(0)
+
+    labels = labels - labels.min()
+    rings = int(labels.max()) + 1
+    angle = np.mod(np.arctan2(points[:, 1], points[:, 0]), 2.0 * np.pi)
+    bins = np.minimum((angle * (segments / (2.0 * np.pi))).astype(np.int64), segments - 1)
+    radius = np.hypot(points[:, 0], points[:, 1])
+
+    # One bincount for every ring and segment at once
+    cell = labels * segments + bins
+    sums = np.bincount(cell, weights=radius, minlength=rings * segments).reshape(rings, segments)
+    counts = np.bincount(cell, minlength=rings * segments).reshape(rings, segments)
+    ring_counts = np.bincount(labels, minlength=rings)
+    heights = np.bincount(labels, weights=points[:, 2], minlength=rings) / np.maximum(ring_counts, 1)
+
+    keep = ring_counts >= min_points
+    sums, counts, heights = sums[keep], counts[keep], heights[keep]
+
+    grid = np.divide(sums, counts, out=np.full(sums.shape, np.nan), where=counts > 0)
+    centres = (np.arange(segments) + 0.5) * (2.0 * np.pi / segments)
+    for row in np.flatnonzero(np.isnan(grid).any(axis=1)):
+        filled = ~np.isnan(grid[row])
+        grid[row] = np.interp(centres, centres[filled], grid[row, filled], period=2.0 * np.pi)
+    return grid, heights
+
+
+def grid_mesh(grid, heights, caps=True):
+    """
+    Function to triangulate a rings x segments radius grid
+    Input: grid (R x S radii), heights (R ring heights), caps (close top and bottom)
+    Output: (V x 3 float32 vertices, F x 3 int32 faces) with outward normals
+    """
+    rings, segments = grid.shape
+    angle = (np.arange(segments) + 0.5) * (2.0 * np.pi / segments)
+    vertices = np.empty((rings * segments, 3), dtype=np.float32)
+    vertices[:, 0] = (grid * np.cos(angle)).ravel()
+    vertices[:, 1] = (grid * np.sin(angle)).ravel()
+    vertices[:, 2] = np.repeat(heights, segments)
+
+    # Two triangles per quad between ring i and i + 1, wrapping around
+    ring, segment = np.meshgrid(np.arange(rings - 1), np.arange(segments), indexing="ij")
+    a = ring * segments + segment
+    b = ring * segments + (segment + 1) % segments
+    c = b + segments
+    d = a + segments
+    faces = np.concatenate((
+        np.stack((a, b, c), axis=-1).reshape(-1, 3),
+        np.stack((a, c, d), axis=-1).reshape(-1, 3),
+    ))
+
+    if caps and rings:
+        # Fans around a centre vertex at the bottom and top rings
+        bottom, top = len(vertices), len(vertices) + 1
+        vertices = np.concatenate((vertices, [[0, 0, heights[0]], [0, 0, heights[-1]]])).astype(np.float32)
+        first = np.arange(segments)
+        last = (rings - 1) * segments + first
+        following = (first + 1) % segments
+        faces = np.concatenate((
+            faces,
+            np.column_stack((np.full(segments, bottom), following, first)),
+            np.column_stack((np.full(segments, top), last, (rings - 1) * segments + following)),
+        ))
+    return vertices, faces.astype(np.int32)
+
+
+def face_normals(vertices, faces):
+    """
+    Function to get unit normals of every face
+    Input: vertices (V x 3), faces (F x 3)
+    Output: F x 3 float32 normals, zero for degenerate faces
+    """
+    corners = vertices[faces].astype(np.float64)
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    return np.divide(normals, length, out=np.zeros_like(normals), where=length > 0).astype(np.float32)
+
+
+def write_stl(filename, vertices, faces):
+    """
+    Function to write a binary STL
+    Input: filename, vertices (V x 3), faces (F x 3)
+    Output: File written
+    """
+    records = np.zeros(len(faces), dtype=STL_RECORD)
+    records["normal"] = face_normals(vertices, faces)
+    records["vertices"] = vertices[faces]
+    with open(filename, "wb") as file:
+        file.write(b"3D Scanner mesh".ljust(80, b"\0"))
+        file.write(np.uint32(len(faces)).tobytes())
+        file.write(records.tobytes())
+
+
+def write_obj(filename, vertices, faces):
+    """
+    Function to write a Wavefront OBJ
+    Input: filename, vertices (V x 3), faces (F x 3)
+    Output: File written, indices are 1-based
+    """
+    with open(filename, "w") as file:
+        np.savetxt(file, vertices, fmt="v %.4f %.4f %.4f")
+        np.savetxt(file, faces + 1, fmt="f %d %d %d")
+
+
+def write_ply(filename, vertices, faces):
+    """
+    Function to write a binary little endian PLY mesh
+    Input: filename, vertices (V x 3), faces (F x 3)
+    Output: File written
+    """
+    records = np.zeros(len(faces), dtype=PLY_FACE)
+    records["count"] = 3
+    records["indices"] = faces
+    header = (
+        "ply\n"
+        "format binary_little_endian 1.0\n"
+        f"element vertex {len(vertices)}\n"
+        "property float x\n"
+        "property float y\n"
+        "property float z\n"
+        f"element face {len(faces)}\n"
+        "property list uchar int vertex_indices\n"
+        "end_header\n"
+    ).encode("ascii")
+    with open(filename, "wb") as file:
+        file.write(header)
+        file.write(vertices.astype("<f4").tobytes())
+        file.write(records.tobytes())
+
+
+# Mesh writers by file extension
+MESH_WRITERS = {
+    ".stl": write_stl,
+    ".obj": write_obj,
+    ".ply": write_ply,
+}
@@ -0,0 +1,175 @@
+import csv
+import json
+import math
+import time
+
+# Latency histograms use power of two buckets in microseconds: bucket i
+# holds samples below 2**i us, the last one everything from ~8.4 s up
+BUCKETS = 24
+
+
+class Histogram:
+    """ Fixed log2 bucket latency histogram, constant cost per sample """
+
+    def __init__(self):
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        """
+        Function to record one sample
+        Input: seconds
+        Output: Bucket, count, total and max updated
+        """
+        index = math.frexp(seconds * 1e6)[1] if seconds > 0 else 0
+        self.buckets[min(max(index, 0), BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """
+        Function to estimate a percentile from the buckets
+        Input: q (0 - 100)
+        Output: Upper edge of the bucket holding it in seconds, capped at max
+        """
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for index, count in enumerate(list(self.buckets)):
+            seen += count
+            if seen >= rank:
+                return min(2.0 ** index * 1e-6, self.max)
+        return self.max
+
+    def summary(self):
+        """
+        Function to summarise the histogram
+        Input: None
+        Output: Dict of count, mean, p50, p95, p99 and max in milliseconds
+        """
+        count = self.count
+        return {
+            "count": count,
+            "mean_ms": self.total / count * 1e3 if count else 0.0,
+            "p50_ms": self.percentile(50) * 1e3,
+            "p95_ms": self.percentile(95) * 1e3,
+            "p99_ms": self.percentile(99) * 1e3,
+            "max_ms": self.max * 1e3,
+        }
+
+
+class Metrics:
+    """ Named counters, gauges and latency histograms for the scan pipeline """
+
+    # Every metric is written by one thread only (worker.*, grapher.*,
+    # db.*, gui.*), so the hot path takes no lock. Readers copy.
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def count(self, name, value=1):
+        """
+        Function to add to a counter
+        Input: name, value (amount to add)
+        Output: Counter updated
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name, value):
+        """
+        Function to set a gauge, e.g. a queue depth
+        Input: name, value
+        Output: Gauge holds the latest value
+        """
+        self.gauges[name] = value
+
+    def observe(self, name, seconds):
+        """
+        Function to record a latency sample
+        Input: name, seconds
+        Output: Sample added to the named histogram
+        """
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+    def since(self, name, start):
+        """
+        Function to record the time since a perf_counter() stamp
+        Input: name, start (time.perf_counter() taken before the work)
+        Output: Sample added to the named histogram
+        """
+        self.observe(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        """
+        Function to copy every metric
+        Input: None
+        Output: Dict with elapsed seconds, counters, gauges and histogram summaries
+        """
+        return {
+            "elapsed": time.monotonic() - self.started,
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+            "histograms": {name: histogram.summary() for name, histogram in list(self.histograms.items())},
+        }
+
+    def reset(self):
+        """
+        Function to clear every metric for a new scan
+        Input: None
+        Output: Empty metrics, elapsed time restarted
+        """
+        self.started = time.monotonic()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+
+def format_overlay(snapshot):
+    """
+    Function to format a snapshot for the on-screen overlay
+    Input: snapshot (Metrics.snapshot())
+    Output: Multi-line string, counters with a rate, then gauges, then latencies
+    """
+    elapsed = max(snapshot["elapsed"], 1e-9)
+    lines = [f"{name}: {value} ({value / elapsed:.0f}/s)" for name, value in sorted(snapshot["counters"].items())]
+    lines += [f"{name}: {value}" for name, value in sorted(snapshot["gauges"].items())]
+    lines += [
+        f"{name}: n={h['count']} p50 {h['p50_ms']:.2f} p95 {h['p95_ms']:.2f} "
+        f"p99 {h['p99_ms']:.2f} max {h['max_ms']:.2f} ms"
+        for name, h in sorted(snapshot["histograms"].items())
+    ]
+    return "\n".join(lines)
+
+
+def write_metrics(filename, snapshot):
+    """
+    Function to export a snapshot for offline analysis
+    Input: filename (.csv writes one row per metric, anything else JSON), snapshot
+    Output: File written
+    """
+    if filename.lower().endswith(".csv"):
+        fields = ["kind", "name", "value", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+        with open(filename, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=fields)
+            writer.writeheader()
+            writer.writerow({"kind": "elapsed", "name": "elapsed", "value": snapshot["elapsed"]})
+            for name, value in sorted(snapshot["counters"].items()):
+                writer.writerow({"kind": "counter", "name": name, "value": value})
+            for name, value in sorted(snapshot["gauges"].items()):
+                writer.writerow({"kind": "gauge", "name": name, "value": value})
+            for name, summary in sorted(snapshot["histograms"].items()):
+                writer.writerow({"kind": "histogram", "name": name, **summary})
+    else:
+        with open(filename, "w") as file:
+            json.dump(snapshot, file, indent=2)
@@ -0,0 +1,144 @@
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal, pyqtSlot
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import glob
+import time
+import threading
+
+import serial
+from serial.tools import list_ports
+
+# Seconds a discovery result is reused before probing again
+CACHE_TTL = 10.0
+
+_cache = {"time": 0.0, "ports": None}
+_cache_lock = threading.Lock()
+
+
+def candidate_ports():
+    """
+    Function to list device names that might be serial ports
+    Input: None
+    Output: List of port names for this platform, empty if unknown
+    """
+    if sys.platform.startswith('win'):
+        return ['COM%s' % (i + 1) for i in range(256)]
+    elif sys.platform.startswith('linux') or sys.platform.startswith('cygwin'):
+        # this excludes your current terminal "/dev/tty"
+        return glob.glob('/dev/tty[A-Za-z]*')
+    elif sys.platform.startswith('darwin'):
+        return glob.glob('/dev/tty.*')
+    # Other platforms rely on list_ports metadata only
+    return []
+
+
+def probe_port(port, timeout=0.2):
+    """
+    Function to check whether a port can be opened
+    Input: port (device name), timeout (seconds for the open and any I/O)
+    Output: True if the port opened and closed cleanly
+    """
+    try:
+        s = serial.Serial(port, timeout=timeout, write_timeout=timeout)
+        s.close()
+        return True
+    except (OSError, serial.SerialException, ValueError):
+        return False
+
+
+def listed_ports():
+    """
+    Function to get the ports the OS reports, no opening involved
+    Input: None
+    Output: Sorted list of device names from serial.tools.list_ports
+    """
+    return sorted(info.device for info in list_ports.comports())
+
+
+def discover_ports(probe_timeout=0.2, max_workers=16, use_cache=True):
+    """
+    Function to find the available serial ports quickly
+    Input: probe_timeout (seconds per probe), max_workers (parallel probes),
+           use_cache (reuse a result younger than CACHE_TTL)
+    Output: List of port names, OS-listed ports first
+    """
+    with _cache_lock:
+        if use_cache and _cache["ports"] is not None and time.monotonic() - _cache["time"] < CACHE_TTL:
+            return list(_cache["ports"])
+
+    # Metadata first, these need no probing
+    known = listed_ports()
+
+    # Probe whatever is left in parallel so slow opens overlap
+    remaining = [port for port in candidate_ports() if port not in known]
+    probed = []
+    if remaining:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = pool.map(lambda port: probe_port(port, probe_timeout), remaining)
+            probed = [port for port, ok in zip(remaining, results) if ok]
+
+    ports = known + sorted(probed)
+    with _cache_lock:
+        _cache["time"] = time.monotonic()
+        _cache["ports"] = list(ports)
+    return ports
+
+
+class PortScanner(QObject):
+    """ Background port discovery with hotplug refresh """
+    # Signal with the current list of ports
+    portsChanged = pyqtSignal(list)
+
+    # Signals to stop the scanner
+    stopRequested = pyqtSignal()
+    stopped = pyqtSignal()
+
+    def __init__(self, refresh_interval=2000, probe_timeout=0.2):
+        super().__init__()
+        # How often the OS port list is checked for hotplug, in ms
+        self.refresh_interval = refresh_interval
+        self.probe_timeout = probe_timeout
+
+        self.listed = None
+        self.timer = None
+
+        self.stopRequested.connect(self.stop)
+
+    @pyqtSlot()
+    def run(self):
+        """
+        Function to run the port scanner thread
+        Input: None
+        Output: Emits portsChanged with the first full discovery, then on hotplug
+        """
+        self.listed = listed_ports()
+        self.portsChanged.emit(discover_ports(self.probe_timeout))
+
+        # Cheap metadata check, full discovery only when it changes
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.checkHotplug)
+        self.timer.start(self.refresh_interval)
+
+    @pyqtSlot()
+    def checkHotplug(self):
+        """
+        Function to look for added or removed ports
+        Input: Refresh timer tick
+        Output: Emits portsChanged if the OS port list changed
+        """
+        listed = listed_ports()
+        if listed != self.listed:
+            self.listed = listed
+            self.portsChanged.emit(discover_ports(self.probe_timeout, use_cache=False))
+
+    @pyqtSlot()
+    def stop(self):
+        """
+        Function to stop the port scanner thread
+        Input: Stop signal from main window
+        Output: Refresh timer stopped
+        """
+        if self.timer:
+            self.timer.stop()
+            self.timer = None
+        self.stopped.emit()
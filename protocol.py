@@ -0,0 +1,120 @@
+import re
+
+# Frame kinds returned by parse_frame
+STAT = "STAT"
+DATA = "DATA"
+RAW = "RAW"
+
+# One pattern for every frame type so each line is scanned once:
+#   STAT(message)   -> group 1
+#   DATA(x,y,z)     -> group 2 is the kind, values in 3, 4, 5
+#   RAW(d,step,z)   -> same groups, values are distance, platform step, z step
+_NUMBER = r"(-?\d+(?:\.\d+)?)"
+_FRAME = (
+    r"\s*(?:STAT\((.*)\)"
+    r"|(DATA|RAW)\(\s*" + _NUMBER + r",\s*" + _NUMBER + r",\s*" + _NUMBER + r"\s*\)\s*$)"
+)
+
+# Precompiled for raw serial bytes and for already decoded text
+_FRAME_BYTES = re.compile(_FRAME.encode("ascii"))
+_FRAME_TEXT = re.compile(_FRAME)
+
+# key=value numbers inside a STAT message, e.g. "Moving Z axis up - step 3 z=1.50"
+_POSITION = re.compile(r"\b(\w+)=" + _NUMBER)
+
+
+def parse_frame(line):
+    """
+    Function to classify and parse one line of the serial protocol
+    Input: line (bytes straight from the port, or str)
+    Output: (STAT, message), (DATA, (x, y, z)), (RAW, (distance, step, z_step))
+            or None if not a valid frame
+    """
+    pattern = _FRAME_BYTES if isinstance(line, (bytes, bytearray)) else _FRAME_TEXT
+    match = pattern.match(line)
+    if not match:
+        return None
+
+    message, kind, a, b, c = match.groups()
+    if kind is not None:
+        # float() accepts ASCII bytes directly, no decode needed
+        values = (float(a), float(b), float(c))
+        return (DATA if kind in (b"DATA", "DATA") else RAW), values
+
+    if isinstance(message, (bytes, bytearray)):
+        message = message.decode("utf-8", errors="replace")
+    return STAT, message
+
+
+def parse_position(message):
+    """
+    Function to read the position the firmware reports in a STAT message
+    Input: message (STAT text)
+    Output: Dict of key to float, e.g. {"z": 1.5}, empty if none reported
+    """
+    return {key: float(value) for key, value in _POSITION.findall(message)}
+
+
+class FrameReader:
+    """ Splits a raw serial byte stream into parsed frames """
+
+    def __init__(self, max_partial=4096):
+        # Reusable receive buffer, holds any partial frame between reads
+        self.buffer = bytearray()
+        # Guard against a line that never terminates (wrong baud, noise)
+        self.max_partial = max_partial
+        # Count of non-empty lines that were not valid frames
+        self.rejected = 0
+        # RAW readings collected by feed(), converted in batches by the caller
+        self.raws = []
+
+    def feed(self, chunk):
+        """
+        Function to add received bytes and parse every complete line
+        Input: chunk (bytes read from the port)
+        Output: (messages, points) lists for the complete lines in the buffer
+        """
+        self.buffer += chunk
+        messages = []
+        points = []
+
+        end = self.buffer.rfind(b"\n")
+        if end < 0:
+            if len(self.buffer) > self.max_partial:
+                self.rejected += 1
+                self.buffer.clear()
+            return messages, points
+
+        for line in self.buffer[:end].split(b"\n"):
+            frame = parse_frame(line)
+            if frame is None:
+                if line.strip():
+                    self.rejected += 1
+            elif frame[0] == DATA:
+                points.append(frame[1])
+            elif frame[0] == RAW:
+                self.raws.append(frame[1])
+            else:
+                messages.append(frame[1])
+
+        # Keep only the trailing partial frame
+        del self.buffer[:end + 1]
+        return messages, points
+
+    def take_raws(self):
+        """
+        Function to hand over the RAW readings collected so far
+        Input: None
+        Output: List of (distance, step, z_step), internal list emptied
+        """
+        raws, self.raws = self.raws, []
+        return raws
+
+    def reset(self):
+        """
+        Function to drop any buffered partial frame
+        Input: None
+        Output: Empty receive buffer and no collected RAW readings
+        """
+        self.buffer.clear()
+        self.raws = []
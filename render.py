@@ -0,0 +1,345 @@
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtCore import QObject, QTimer, Qt, pyqtSignal, pyqtSlot
+from PyQt5.QtGui import QImage, QPainter
+import math
+import time
+import numpy as np
+
+# Frames are drawn off the GUI thread by a FrameRenderer living on its own
+# QThread. The GUI only forwards points, size and view changes, and paints
+# the finished QImage it gets back.
+
+
+def splat(points, mins, maxs, width, height, yaw, pitch, max_points=200000):
+    """
+    Function to project and splat points into an image buffer
+    Input: points (N x 3), mins and maxs (per axis bounds), width and height
+           in pixels, yaw and pitch (view rotation, radians), max_points
+    Output: height x width uint32 array in Qt RGB32 layout
+    """
+    image = np.full((height, width), 0xFFFFFFFF, dtype=np.uint32)
+    if not len(points) or width < 2 or height < 2:
+        return image
+
+    # Level of detail by stride, cheap and keeps the overall shape
+    if len(points) > max_points:
+        points = points[::int(np.ceil(len(points) / max_points))]
+
+    mins = np.asarray(mins, dtype=np.float64)
+    maxs = np.asarray(maxs, dtype=np.float64)
+    center = (mins + maxs) / 2.0
+    radius = max(float(np.max(maxs - mins)) / 2.0, 1e-6)
+    scale = 0.45 * min(width, height) / radius
+
+    # Yaw about z then pitch about x, z is up on screen
+    cy, sy = np.cos(yaw), np.sin(yaw)
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    rotation = np.array([
+        [cy, -sy, 0.0],
+        [sy * sp, cy * sp, cp],
+    ], dtype=np.float32)
+    projected = (points - center.astype(np.float32)) @ rotation.T
+
+    u = (projected[:, 0] * scale + width / 2.0).astype(np.int32)
+    v = (height / 2.0 - projected[:, 1] * scale).astype(np.int32)
+    inside = (u >= 0) & (u < width) & (v >= 0) & (v < height)
+    image[v[inside], u[inside]] = 0xFF1E50DC
+    return image
+
+
+class SplatRenderer:
+    """ NumPy point splatting, the cheapest renderer """
+    name = "splat"
+
+    def __init__(self, max_points=200000):
+        self.max_points = max_points
+
+    def render(self, points, mins, maxs, width, height, yaw, pitch):
+        """
+        Function to draw one frame
+        Input: points, bounds, image size and view (see splat)
+        Output: QImage that owns its pixels
+        """
+        image = splat(points, mins, maxs, width, height, yaw, pitch, self.max_points)
+        return QImage(image.data, width, height, image.strides[0], QImage.Format_RGB32).copy()
+
+
+# Figure reused by agg_frame across calls in the same process
+_agg = None
+
+
+def agg_frame(points, mins, maxs, width, height, yaw, pitch, max_points=200000):
+    """
+    Function to draw the cloud on an offscreen matplotlib Agg figure
+    Input: points, bounds, image size and view (see splat), max_points
+    Output: height x width x 4 uint8 RGBA array
+    """
+    global _agg
+    if _agg is None:
+        # Plain Figure and Agg canvas, no pyplot or Qt involved
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        fig = Figure()
+        ax = fig.add_subplot(projection='3d')
+        ax.set_aspect('equal')
+        _agg = {"fig": fig, "canvas": FigureCanvasAgg(fig), "ax": ax, "scatter": None}
+
+    if len(points) > max_points:
+        points = points[::int(np.ceil(len(points) / max_points))]
+    xs, ys, zs = points[:, 0], points[:, 1], points[:, 2]
+
+    ax = _agg["ax"]
+    if _agg["scatter"] is None:
+        _agg["scatter"] = ax.scatter(xs, ys, zs, color='blue')
+    else:
+        # Swap the offsets on the existing artist, no clear or rebuild
+        _agg["scatter"]._offsets3d = (xs, ys, zs)
+    if len(points):
+        ax.set_xlim3d(mins[0], maxs[0])
+        ax.set_ylim3d(mins[1], maxs[1])
+        ax.set_zlim3d(mins[2], maxs[2])
+    ax.view_init(elev=math.degrees(pitch), azim=math.degrees(yaw))
+
+    fig = _agg["fig"]
+    dpi = fig.get_dpi()
+    fig.set_size_inches(max(width, 2) / dpi, max(height, 2) / dpi)
+    _agg["canvas"].draw()
+    return np.array(_agg["canvas"].buffer_rgba())
+
+
+class AggRenderer:
+    """ matplotlib look, drawn in a helper process """
+    name = "agg"
+
+    def __init__(self, max_points=200000):
+        # Agg holds the GIL while it draws, a process keeps the GUI thread free
+        from concurrent.futures import ProcessPoolExecutor
+        import multiprocessing
+        import matplotlib  # noqa: F401, fail here rather than in the helper
+
+        self.max_points = max_points
+        # Spawned, a forked child would inherit Qt and the running threads
+        self.pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+    def render(self, points, mins, maxs, width, height, yaw, pitch):
+        """
+        Function to draw one frame
+        Input: points, bounds, image size and view (see splat)
+        Output: QImage that owns its pixels
+        """
+        rgba = self.pool.submit(
+            agg_frame, np.ascontiguousarray(points), np.asarray(mins), np.asarray(maxs),
+            width, height, yaw, pitch, self.max_points
+        ).result()
+        return QImage(rgba.data, rgba.shape[1], rgba.shape[0], rgba.strides[0], QImage.Format_RGBA8888).copy()
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Renderers selectable for the offscreen viewers
+RENDERERS = {
+    SplatRenderer.name: SplatRenderer,
+    AggRenderer.name: AggRenderer,
+}
+
+
+class FrameRenderer(QObject):
+    """ Render thread object, draws the newest cloud at an adaptive frame rate """
+    # Finished frame for the GUI thread
+    frameReady = pyqtSignal(QImage)
+
+    # Inputs from the GUI thread, queued to the render thread
+    pointsChanged = pyqtSignal(object, object, object)
+    sizeChanged = pyqtSignal(int, int)
+    viewChanged = pyqtSignal(float, float)
+
+    # Any returned errors
+    error_text = pyqtSignal([str])
+
+    # Signals to stop the renderer
+    stopRequested = pyqtSignal()
+    stopped = pyqtSignal()
+
+    def __init__(self, renderer="splat", max_fps=30.0, min_fps=2.0, load=0.5, max_points=200000,
+                 metrics=None):
+        super().__init__()
+        if renderer not in RENDERERS:
+            raise ValueError(f"Unsupported renderer: {renderer}")
+        self.renderer_name = renderer
+        self.max_points = max_points
+        # Built on the render thread in run()
+        self.renderer = None
+
+        # Frame interval bounds, and the share of the thread rendering may
+        # use: a frame costing c seconds is followed by a c / load interval
+        self.min_interval = 1.0 / max(float(max_fps), 0.1)
+        self.max_interval = max(self.min_interval, 1.0 / max(float(min_fps), 0.1))
+        self.load = min(max(float(load), 0.05), 1.0)
+        # Smoothed render cost and the earliest time the next frame may start
+        self.cost = 0.0
+        self.next_due = 0.0
+
+        # Newest inputs, only the latest cloud is ever drawn
+        self.points = np.zeros((0, 3), dtype=np.float32)
+        self.mins = np.zeros(3)
+        self.maxs = np.zeros(3)
+        self.width = 0
+        self.height = 0
+        self.yaw = 0.6
+        self.pitch = 0.4
+        self.dirty = False
+
+        # Optional metrics.Metrics, written from the render thread only
+        self.metrics = metrics
+        self.timer = None
+
+        self.pointsChanged.connect(self.setPoints)
+        self.sizeChanged.connect(self.resize)
+        self.viewChanged.connect(self.setView)
+        self.stopRequested.connect(self.stop)
+
+    @pyqtSlot()
+    def run(self):
+        """
+        Function to start the render thread
+        Input: None
+        Output: Renderer built and the frame timer ready on this thread
+        """
+        try:
+            self.renderer = RENDERERS[self.renderer_name](self.max_points)
+        except ImportError as e:
+            self.error_text.emit(f"Renderer '{self.renderer_name}' unavailable ({e}), using splat")
+            self.renderer = SplatRenderer(self.max_points)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.renderFrame)
+        self._schedule()
+
+    @pyqtSlot(object, object, object)
+    def setPoints(self, points, mins, maxs):
+        self.points, self.mins, self.maxs = points, mins, maxs
+        self._schedule()
+
+    @pyqtSlot(int, int)
+    def resize(self, width, height):
+        self.width, self.height = width, height
+        self._schedule()
+
+    @pyqtSlot(float, float)
+    def setView(self, yaw, pitch):
+        self.yaw, self.pitch = yaw, pitch
+        self._schedule()
+
+    def _schedule(self):
+        """
+        Function to queue a frame for the next free slot
+        Input: None
+        Output: Frame timer started unless a frame is already due
+        """
+        self.dirty = True
+        if self.timer is None or self.timer.isActive():
+            return
+        delay = max(0.0, self.next_due - time.monotonic())
+        self.timer.start(int(delay * 1000))
+
+    @pyqtSlot()
+    def renderFrame(self):
+        """
+        Function to draw the newest inputs
+        Input: Frame timer
+        Output: frameReady emitted, next frame spaced by the render cost
+        """
+        if not self.dirty or self.renderer is None or self.width < 2 or self.height < 2:
+            return
+        self.dirty = False
+
+        start = time.monotonic()
+        try:
+            image = self.renderer.render(self.points, self.mins, self.maxs,
+                                         self.width, self.height, self.yaw, self.pitch)
+        except Exception as e:
+            self.error_text.emit(f"Render Error: {str(e)}")
+            return
+        cost = time.monotonic() - start
+
+        # Slow frames stretch the interval so input and new data stay responsive
+        self.cost = cost if not self.cost else 0.8 * self.cost + 0.2 * cost
+        interval = min(max(self.cost / self.load, self.min_interval), self.max_interval)
+        self.next_due = start + interval
+        self.frameReady.emit(image)
+
+        if self.metrics is not None:
+            self.metrics.observe("render.frame", cost)
+            self.metrics.count("render.frames")
+            self.metrics.gauge("render.fps_cap", round(1.0 / interval, 1))
+
+    @pyqtSlot()
+    def stop(self):
+        """
+        Function to stop the renderer
+        Input: Stop signal from the viewer
+        Output: Pending frame dropped, stopped emitted
+        """
+        if self.timer is not None:
+            self.timer.stop()
+        if getattr(self.renderer, 'close', None):
+            self.renderer.close()
+        self.stopped.emit()
+
+
+class ImageWidget(QWidget):
+    """ Paints the frames a FrameRenderer hands over, forwards size, drags and wheel zoom """
+    sizeChanged = pyqtSignal(int, int)
+    viewChanged = pyqtSignal(float, float)
+    # Wheel notches, positive zooms in
+    zoomed = pyqtSignal(float)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.image = None
+
+        # View rotation in radians, changed by dragging
+        self.yaw = 0.6
+        self.pitch = 0.4
+        self.drag_start = None
+
+    @pyqtSlot(QImage)
+    def setImage(self, image):
+        self.image = image
+        self.update()
+
+    def paintEvent(self, event):
+        """
+        Function to draw the newest finished frame
+        Input: Qt paint event
+        Output: Image painted, scaled while a resized frame is on its way
+        """
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.white)
+        if self.image is not None:
+            painter.drawImage(self.rect(), self.image)
+        painter.end()
+
+    def resizeEvent(self, event):
+        self.sizeChanged.emit(self.width(), self.height())
+        super().resizeEvent(event)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.drag_start = event.pos()
+
+    def mouseMoveEvent(self, event):
+        if self.drag_start is not None:
+            delta = event.pos() - self.drag_start
+            self.drag_start = event.pos()
+            self.yaw += delta.x() * 0.01
+            self.pitch = float(np.clip(self.pitch + delta.y() * 0.01, -1.5, 1.5))
+            self.viewChanged.emit(self.yaw, self.pitch)
+
+    def mouseReleaseEvent(self, event):
+        self.drag_start = None
+
+    def wheelEvent(self, event):
+        self.zoomed.emit(event.angleDelta().y() / 120.0)
@@ -0,0 +1,186 @@
+from PyQt5.QtCore import pyqtSignal, pyqtSlot
+import csv
+import os
+import time
+import numpy as np
+
+from store import ScanStore
+from worker import Worker
+
+# A recording is a time-ordered table of rows with a stamp per row: x, y, z
+# points, or distance, step, z step raw readings that go through calibration
+# and the filters again. Batches are cut by the recorded stamps with the
+# Worker's count / age rules, so every replay of a recording produces the
+# same batches no matter the speed or the machine.
+
+
+class Recording:
+    """ Stored readings with their capture times, ready to replay """
+
+    def __init__(self, rows, times, raw=False, name="recording"):
+        self.rows = np.asarray(rows, dtype=np.float64).reshape(-1, 3)
+        times = np.asarray(times, dtype=np.float64).reshape(-1)
+        if len(times) != len(self.rows):
+            raise ValueError("Need one time per row")
+        # Seconds from the first row, never going backwards
+        self.times = np.maximum.accumulate(times - times[0]) if len(times) else times
+        self.raw = raw
+        self.name = name
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def duration(self):
+        return float(self.times[-1]) if len(self.times) else 0.0
+
+    @classmethod
+    def from_store(cls, db_path, scan_id, raw=None, rate=1000.0):
+        """
+        Function to load a stored scan
+        Input: db_path, scan_id, raw (True replays scan_raw, False scan_points,
+               None picks scan_raw when the scan has raw readings),
+               rate (rows per second for scans stored without times)
+        Output: Recording with the stored timestamps
+
+        Scans imported from the old scan_data table have no times and are
+        laid out at rate, like a CSV.
+        """
+        store = ScanStore(db_path)
+        try:
+            if raw is None:
+                raw = store.next_seq(scan_id, "scan_raw") > 0
+            table, columns = ("scan_raw", "distance, step, z_step, t") if raw else ("scan_points", "x, y, z, t")
+            data = np.array(store.conn.execute(
+                f"SELECT {columns} FROM {table} WHERE scan_id = ? ORDER BY seq", (scan_id,)
+            ).fetchall(), dtype=np.float64).reshape(-1, 4)
+        finally:
+            store.close()
+        if not len(data):
+            raise ValueError(f"Scan {scan_id} has no {'raw readings' if raw else 'points'}")
+        times = data[:, 3]
+        if np.isnan(times).any():
+            times = np.arange(len(data)) / rate
+        return cls(data[:, :3], times, raw, f"scan {scan_id}")
+
+    @classmethod
+    def from_csv(cls, path, rate=1000.0, steps_per_rev=200, z_steps_per_ring=100):
+        """
+        Function to load a CSV export or raw capture
+        Input: path, rate (rows per second, CSVs carry no timestamps),
+               steps_per_rev and z_steps_per_ring to lay out single-value rows
+        Output: Recording of x, y, z points, or of raw readings when the
+                file holds one distance per row (as in the 2025 captures)
+
+        A fourth numeric column, if present, is used as the row time.
+        """
+        rows, times, raws = [], [], []
+        with open(path, newline="") as file:
+            for row in csv.reader(file):
+                try:
+                    numbers = [float(cell) for cell in row if cell.strip()]
+                except ValueError:
+                    # Header or status lines
+                    continue
+                if len(numbers) >= 3:
+                    rows.append(numbers[:3])
+                    times.append(numbers[3] if len(numbers) > 3 else np.nan)
+                elif len(numbers) == 1:
+                    ring, step = divmod(len(raws), steps_per_rev)
+                    raws.append((numbers[0], step, ring * z_steps_per_ring))
+
+        name = os.path.basename(path)
+        if raws and not rows:
+            return cls(raws, np.arange(len(raws)) / rate, True, name)
+        times = np.asarray(times, dtype=np.float64)
+        if np.isnan(times).any():
+            times = np.arange(len(rows)) / rate
+        return cls(np.asarray(rows).reshape(-1, 3), times, False, name)
+
+    def batches(self, batch_count=256, batch_interval=0.05):
+        """
+        Function to cut the recording into worker batches
+        Input: batch_count and batch_interval (same meaning as in Worker)
+        Output: List of (start, end) row ranges
+
+        A batch closes at batch_count rows, or before the first row that
+        arrived batch_interval or more after the batch's first row.
+        """
+        batch_count = max(1, int(batch_count))
+        ranges = []
+        start, count = 0, len(self.times)
+        while start < count:
+            aged = int(np.searchsorted(self.times, self.times[start] + batch_interval, side="left"))
+            end = min(max(aged, start + 1), start + batch_count, count)
+            ranges.append((start, end))
+            start = end
+        return ranges
+
+
+class ReplayWorker(Worker):
+    """ Worker that feeds a recording through the live batch path """
+    # Signal per batch: index, rows fed, seconds behind schedule
+    batch_replayed = pyqtSignal(int, int, float)
+
+    # Signal with the replay progress in percent
+    progress = pyqtSignal(int)
+
+    def __init__(self, recording, speed=1.0, **kwargs):
+        # No serial port, everything else (calibration, filters, ring,
+        # metrics, batching) is the Worker's
+        super().__init__(recording.name, 0, 0, reconnect=False, **kwargs)
+        self.recording = recording
+        # 1.0 is real time, 4.0 four times faster, 0 as fast as possible
+        self.speed = max(0.0, float(speed))
+
+        # Per batch (index, rows in, points out so far, due, emitted), times
+        # in seconds from started (perf_counter), due is the recorded offset
+        # over speed and emitted when the batch entered the pipeline. Points
+        # out so far lines a batch up with storage and plot.
+        self.timeline = []
+        self.started = 0.0
+
+    @pyqtSlot()
+    def run(self):
+        """
+        Function to run the replay
+        Input: Recording given to the constructor
+        Output: Batches emitted like a live Worker's, then stopped
+        """
+        self.running = True
+        self.wake.clear()
+        self.timeline = []
+
+        ranges = self.recording.batches(self.batch_count, self.batch_interval)
+        self.error_text.emit(f"Replaying {self.recording.name}: {len(self.recording)} rows in {len(ranges)} batches")
+
+        self.started = started = time.perf_counter()
+        points_out = 0
+        last_percent = -1
+        for index, (start, end) in enumerate(ranges):
+            if not self.running:
+                break
+
+            # Batches are due when their last row was recorded
+            due = self.recording.times[end - 1] / self.speed if self.speed else 0.0
+            delay = started + due - time.perf_counter()
+            if delay > 0 and self.wake.wait(delay):
+                break
+
+            rows = self.recording.rows[start:end]
+            if self.recording.raw:
+                self.pending_raws = rows.tolist()
+            else:
+                self.pending_points = rows
+            emitted = time.perf_counter() - started
+            points_out += self._emit_batch()
+            self.timeline.append((index, end - start, points_out, due, emitted))
+            self.batch_replayed.emit(index, end - start, max(0.0, emitted - due) if self.speed else 0.0)
+
+            percent = (index + 1) * 100 // len(ranges)
+            if percent != last_percent:
+                last_percent = percent
+                self.progress.emit(percent)
+
+        self.running = False
+        self.stopped.emit()
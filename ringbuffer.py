@@ -0,0 +1,176 @@
+import threading
+import numpy as np
+
+# What a write does when a consumer has not read the rows it would overwrite:
+#   drop_oldest - the consumer loses its oldest unread rows
+#   block       - the writer waits for the consumer (backpressure)
+#   coalesce    - the consumer drops its whole backlog and resumes at the newest rows
+POLICIES = ("drop_oldest", "block", "coalesce")
+
+
+class Cursor:
+    """ One consumer's read position in a RingBuffer """
+
+    def __init__(self, ring, name, policy, position):
+        self.ring = ring
+        self.name = name
+        self.policy = policy
+        # Absolute row number of the next row to read
+        self.position = position
+        # Rows this consumer never saw because of an overflow
+        self.dropped = 0
+        self.active = True
+
+    @property
+    def available(self):
+        """ Rows written but not yet read, none once detached as reads return nothing """
+        if not self.active:
+            return 0
+        return self.ring.written - self.position
+
+    def read(self, max_rows=None, timeout=0.0):
+        """
+        Function to take the next unread rows
+        Input: max_rows (None for all), timeout (seconds to wait for data, None forever)
+        Output: Copy of up to max_rows rows in write order, empty if none arrived
+        """
+        return self.ring._read(self, max_rows, timeout)
+
+    def detach(self):
+        """
+        Function to stop consuming, e.g. when a thread exits
+        Input: None
+        Output: Writes no longer wait on or track this cursor
+        """
+        self.ring._detach(self)
+
+
+class RingBuffer:
+    """ Preallocated fixed capacity row buffer, one writer, cursors per consumer """
+
+    def __init__(self, capacity=262144, columns=4, dtype=np.float64):
+        self.capacity = max(1, int(capacity))
+        self.data = np.zeros((self.capacity, columns), dtype=dtype)
+        # Rows ever written, the next row goes to written % capacity
+        self.written = 0
+        self.cursors = []
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def subscribe(self, name, policy="drop_oldest"):
+        """
+        Function to add a consumer
+        Input: name (shown in overflow counts), policy (see POLICIES)
+        Output: Cursor starting at the next row written
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unsupported overflow policy: {policy}")
+        with self.condition:
+            cursor = Cursor(self, name, policy, self.written)
+            self.cursors.append(cursor)
+        return cursor
+
+    def write(self, rows, timeout=None):
+        """
+        Function to append rows, applying each consumer's overflow policy
+        Input: rows (N x columns array), timeout (longest wait on block
+               consumers per chunk, None waits until they catch up or detach)
+        Output: Rows stored, waiting readers woken. A block consumer still
+                behind when the timeout ends loses its oldest rows like
+                drop_oldest, counted in its dropped total.
+        """
+        rows = np.asarray(rows, dtype=self.data.dtype).reshape(-1, self.data.shape[1])
+        # Larger writes go in capacity sized chunks so block consumers keep up
+        for start in range(0, len(rows), self.capacity):
+            self._write_chunk(rows[start:start + self.capacity], timeout)
+
+    def _write_chunk(self, rows, timeout):
+        count = len(rows)
+        with self.condition:
+            end = self.written + count
+
+            # Backpressure first, every block consumer needs room for the chunk
+            self.condition.wait_for(
+                lambda: self.closed or all(
+                    end - cursor.position <= self.capacity
+                    for cursor in self.cursors if cursor.active and cursor.policy == "block"
+                ),
+                timeout
+            )
+
+            for cursor in self.cursors:
+                overflow = end - cursor.position - self.capacity
+                if overflow <= 0 or not cursor.active:
+                    continue
+                if cursor.policy == "coalesce":
+                    # Keep only the rows being written now
+                    cursor.dropped += self.written - cursor.position
+                    cursor.position = self.written
+                else:
+                    cursor.dropped += overflow
+                    cursor.position += overflow
+
+            head = self.written % self.capacity
+            first = min(count, self.capacity - head)
+            self.data[head:head + first] = rows[:first]
+            self.data[:count - first] = rows[first:]
+            self.written = end
+            self.condition.notify_all()
+
+    def _read(self, cursor, max_rows, timeout):
+        with self.condition:
+            if timeout != 0.0:
+                self.condition.wait_for(
+                    lambda: self.closed or not cursor.active or self.written > cursor.position, timeout
+                )
+            count = self.written - cursor.position
+            if max_rows is not None:
+                count = min(count, max(0, int(max_rows)))
+            if count <= 0 or not cursor.active:
+                return self.data[:0].copy()
+
+            head = cursor.position % self.capacity
+            first = min(count, self.capacity - head)
+            rows = np.concatenate((self.data[head:head + first], self.data[:count - first]))
+            cursor.position += count
+            # Room freed, a blocked writer may continue
+            self.condition.notify_all()
+            return rows
+
+    def _detach(self, cursor):
+        with self.condition:
+            # Stays listed so its dropped count is still reported
+            cursor.active = False
+            self.condition.notify_all()
+
+    def latest(self, count=1):
+        """
+        Function to copy the newest rows
+        Input: count
+        Output: Up to count most recent rows, oldest first
+        """
+        with self.condition:
+            count = min(count, self.written, self.capacity)
+            end = self.written % self.capacity
+            if end >= count:
+                return self.data[end - count:end].copy()
+            return np.concatenate((self.data[end - count:], self.data[:end]))
+
+    def close(self):
+        """
+        Function to release every waiting reader and writer
+        Input: None
+        Output: Writes no longer block, reads return what is left without waiting
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def stats(self):
+        """
+        Function to get the per consumer counters
+        Input: None
+        Output: Dict of name -> (unread rows, dropped rows)
+        """
+        with self.condition:
+            return {cursor.name: (self.written - cursor.position, cursor.dropped) for cursor in self.cursors}
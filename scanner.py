@@ -1,38 +1,42 @@
 # Basic package imports
 import sys
 import os
-import glob
 import configparser
 import datetime
-import queue
 import csv
-import sqlite3
+import time
 
-# Import communication packages
-import serial
+# Headless sub-commands (python -m scanner capture ...) never load Qt
+if __name__ == "__main__" and len(sys.argv) > 1:
+    import headless
+    if sys.argv[1] in headless.COMMANDS:
+        sys.exit(headless.main(sys.argv[1:]))
 
-import matplotlib
-matplotlib.use('Qt5Agg')  # Use Qt5 backend for matplotlib
-
-# Import plotting packages
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+# Start-up timing begins before the heavy imports
+from startup import StartupTimer
+startup_timer = StartupTimer()
 
 # PyQt5 UI imports
-import PyQt5.uic
-from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QFileDialog
-from PyQt5.QtCore import QThread
+from PyQt5.QtWidgets import (
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QFileDialog, QShortcut, QLabel, QInputDialog, QMessageBox
+)
+from PyQt5.QtGui import QKeySequence, QFontDatabase
+from PyQt5.QtCore import Qt, QThread, QTimer
 
-# Custom Packages
-from worker import Worker
-from grapher import DataGrapher
+# Custom Packages, the scan and plotting stack is imported on first use
+from ports import PortScanner, discover_ports
+from uicache import load_form_class
+from store import ScanStore
+startup_timer.mark("imports")
 
 
 # Setup relative path and grab UI file
 path = os.getcwd()
 ui_path = os.path.join(path, "Assets", "scanner.ui")
 print(ui_path)
-FORM_CLASS, _ = PyQt5.uic.loadUiType(ui_path)
+# Compiled once to Assets/__uicache__, rebuilt only when the .ui changes
+FORM_CLASS, _ = load_form_class(ui_path)
+startup_timer.mark("ui form")
 
 # Main window class
 class MainWindow(QMainWindow, FORM_CLASS):
@@ -46,20 +50,59 @@ class MainWindow(QMainWindow, FORM_CLASS):
 
         # Grab Local Config Info
         self.config_file = configparser.ConfigParser()
-        self.config_file.read(self.path + "\\Config\\config.ini")
+        self.config_file.read(os.path.join(self.path, "Config", "config.ini"))
 
         # ===== Data Variables ===== #
         self.saveData = []
+        # Box shown at full detail, live preview frames wait while it is set
+        self.detail_region = None
+        self.live_frame = None
+        self.detail_timer = QTimer(self)
+        self.detail_timer.setSingleShot(True)
+        self.detail_timer.setInterval(150)
+        self.detail_timer.timeout.connect(self.loadDetail)
+
+        # Newest reading, shown by the label timer at the display rate
+        self.latest_reading = None
+        self.shown_reading = None
+
+        # Latest ingest, filter and overflow stats shown together on the status bar
+        self.ingest_message = ""
+        self.filter_message = ""
+        self.buffer_message = ""
+
+        # Fixed size hand off from the worker to storage, capture and plot,
+        # rebuilt per scan with one cursor per consumer
+        self.ring = None
+        self.capture_cursor = None
+        self.ring_dropped = {}
+
+        # Pipeline instrumentation, None unless [Metrics] enabled is set
+        self.metrics = None
+        if self.config_file.getboolean("Metrics", "enabled", fallback=False):
+            from metrics import Metrics
+            self.metrics = Metrics()
 
         # ===== SQLite3 Setup =====
         self.db_path = os.path.join(self.path, "Data", "scan_data.db")
-        self.conn = sqlite3.connect(self.db_path)
-        self._create_table()
+        self.store = ScanStore(
+            self.db_path,
+            journal_mode=self.config_file.get("Database", "journal_mode", fallback="WAL"),
+            synchronous=self.config_file.get("Database", "synchronous", fallback="NORMAL")
+        )
+        self.store.create_schema()
+        # Scan currently being recorded or shown
+        self.scan_id = None
+        # Whether the current recording continues a stored scan
+        self.resuming = False
+        # (replay.Recording, speed) fed instead of the serial port, see replayScan
+        self.replay = None
+        # Optional columnar capture file written next to the database
+        self.capture = None
 
         # ========== Serial Communication Stuff ========== #.
-        # Scan for a list of available ports
-        port_list = self.serial_ports()
-        self.portCombo.addItems(port_list)
+        # Scan for available ports in the background, portCombo fills when done
+        self._setup_port_scanner()
         
         # ==========  Graph Stuff ========== #
         # Find the placeholder widget for the model
@@ -71,20 +114,9 @@ class MainWindow(QMainWindow, FORM_CLASS):
             layout = QVBoxLayout(placeholder_widget)
             placeholder_widget.setLayout(layout)
 
-        # Setup the figure and axis for model
-        self.fig = plt.figure()
-        self.ax = self.fig.add_subplot(projection='3d')
-
-        # Initial plot data for 0 point
-        self.surface = self.ax.scatter(0, 0, 0, color='blue', marker='o', s=10)
-        self.ax.set_aspect('equal')
-        # self.ax.axis('off')
-
-        # Create the canvas to render on
-        self.canvas = FigureCanvas(self.fig)
-
-        # Add the plot canvas to the placeholder widget's layout
-        layout.addWidget(self.canvas)
+        # The viewer backend is built on the first scan, see _ensure_viewer
+        self.viewer_layout = layout
+        self.viewer = None
         
         # ============ UI Event Handler Call ============ #
         # Update the status labels
@@ -92,6 +124,14 @@ class MainWindow(QMainWindow, FORM_CLASS):
         self.serialLabel.setText(" ")
         # Call the button handler function to connect the UI to methods
         self.button_handler()
+
+        # Refresh the raw data label no faster than the screen can show it
+        refresh_rate = QApplication.primaryScreen().refreshRate() or 60.0
+        self.label_timer = QTimer(self)
+        self.label_timer.timeout.connect(self.refreshRawDataLabel)
+        self.label_timer.start(max(1, int(1000 / refresh_rate)))
+
+        self._setup_metrics_overlay()
         
     def button_handler(self):
         """
@@ -101,28 +141,352 @@ class MainWindow(QMainWindow, FORM_CLASS):
         self.pushButtonStop.clicked.connect(self.stopScan)
         self.pushButtonSave.clicked.connect(self.saveFile)
 
-    def _create_table(self):
-        """ 
-        Function to create the SQLite3 table for scan data
+        # Escape cancels a running export or mesh reconstruction
+        QShortcut(QKeySequence(Qt.Key_Escape), self, self.cancelExport)
+
+        # F3 shows or hides the pipeline metrics overlay
+        QShortcut(QKeySequence(Qt.Key_F3), self, self.toggleMetricsOverlay)
+
+        # Stored scans are opened, continued, re-projected, replayed and dropped from the Scans menu
+        self._setup_scan_menu()
+
+    def _setup_scan_menu(self):
+        """
+        Build the Scans menu on the menu bar
         Input: None
-        Output: Creates a table if it does not exist
-        """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS scan_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                x REAL,
-                y REAL,
-                z REAL,
-                timestamp TEXT
-            )
-        """)
-        self.conn.commit()
+        Output: Menu actions that pick a stored scan and act on it
+        """
+        menu = self.menuBar().addMenu("&Scans")
+        actions = (
+            ("&Open Scan...", self.loadScan, QKeySequence.Open),
+            ("&Resume Scan...", self.resumeScan, None),
+            ("Re-&project Scan...", self.reprojectScan, None),
+            ("Re&play Scan...", self.replayScan, None),
+            ("&Drop Scan...", self.dropScan, None),
+        )
+        for text, slot, shortcut in actions:
+            action = menu.addAction(text)
+            if shortcut is not None:
+                action.setShortcut(shortcut)
+            title = text.replace("&", "").rstrip(".")
+            action.triggered.connect(lambda checked=False, title=title, slot=slot: self._with_picked_scan(title, slot))
+
+        menu.addSeparator()
+        menu.addAction("Replay &CSV...").triggered.connect(self.replayCsv)
+
+    def _pick_scan(self, title):
+        """
+        Function to ask which stored scan to use
+        Input: Dialog title
+        Output: Chosen scan_id, or None if cancelled or nothing is stored
+        """
+        scans = self.store.list_scans()
+        if not scans:
+            self.statusLabel.setText("No stored scans")
+            return None
+
+        items = [
+            f"#{scan_id}  {label or 'Scan'}  {started_at[:19].replace('T', ' ')}  ({point_count} points)"
+            for scan_id, started_at, _, label, point_count in scans
+        ]
+        item, ok = QInputDialog.getItem(self, title, "Scan:", items, 0, False)
+        if not ok:
+            return None
+        return scans[items.index(item)][0]
+
+    def _with_picked_scan(self, title, slot):
+        """ Run slot on the scan picked in a dialog titled title """
+        scan_id = self._pick_scan(title)
+        if scan_id is not None:
+            slot(scan_id)
+
+    def _is_recording(self, scan_id=None):
+        """
+        Function to check whether a scan is being recorded
+        Input: scan_id to check, None for any scan
+        Output: True while the writer thread of that scan runs
+        """
+        thread = getattr(self, 'write_thread', None)
+        if not thread or not thread.isRunning():
+            return False
+        return scan_id is None or scan_id == self.scan_id
+
+    def _setup_metrics_overlay(self):
+        """
+        Build the metrics overlay under the status labels
+        Input: None
+        Output: Hidden monospace label and its refresh timer
+        """
+        self.metricsLabel = QLabel(self)
+        self.metricsLabel.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.metricsLabel.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.metricsLabel.hide()
+
+        # Sits right after statusLabel in the form's label column
+        layout = self.findChild(QVBoxLayout, "verticalLayout_5")
+        if layout is not None and layout.indexOf(self.statusLabel) >= 0:
+            layout.insertWidget(layout.indexOf(self.statusLabel) + 1, self.metricsLabel)
+        else:
+            self.statusBar().addPermanentWidget(self.metricsLabel)
+
+        # Only runs while the overlay is visible
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.timeout.connect(self.refreshMetricsOverlay)
+        if self.config_file.getboolean("Metrics", "overlay", fallback=False):
+            self.toggleMetricsOverlay()
+
+    def toggleMetricsOverlay(self):
+        """
+        Function to show or hide the metrics overlay
+        Input: F3 shortcut
+        Output: Overlay visibility flipped, refresh timer follows it
+        """
+        if self.metricsLabel.isVisible():
+            self.metricsLabel.hide()
+            self.metrics_timer.stop()
+            return
+        self.metricsLabel.show()
+        self.refreshMetricsOverlay()
+        self.metrics_timer.start(self.config_file.getint("Metrics", "overlay_interval", fallback=500))
+
+    def refreshMetricsOverlay(self):
+        """
+        Function to redraw the metrics overlay
+        Input: Metrics timer
+        Output: Counters, gauges and latency percentiles on the overlay label
+        """
+        if self.metrics is None:
+            self.metricsLabel.setText("Metrics off, set enabled = true under [Metrics] in config.ini")
+            return
+        from metrics import format_overlay
+        self.metricsLabel.setText(format_overlay(self.metrics.snapshot()) or "No samples yet")
+
+    def exportMetrics(self):
+        """
+        Function to write the metrics file named in the config
+        Input: None
+        Output: [Metrics] export written as JSON or CSV, if set
+        """
+        filename = self.config_file.get("Metrics", "export", fallback="").strip()
+        if self.metrics is None or not filename:
+            return
+        from metrics import write_metrics
+        if not os.path.isabs(filename):
+            filename = os.path.join(self.path, filename)
+        try:
+            write_metrics(filename, self.metrics.snapshot())
+        except OSError as e:
+            self.error_handler(f"Metrics Error: {str(e)}")
+
+    def _ensure_viewer(self):
+        """
+        Build the viewer backend picked in the config file on first use
+        Input: None
+        Output: self.viewer created and added to the placeholder layout
+        """
+        if self.viewer is not None:
+            return
+
+        # Plotting stacks load here instead of at start-up
+        from viewer import create_viewer
+        self.viewer = create_viewer(
+            self.config_file.get("Display", "backend", fallback="matplotlib"),
+            self.viewer_layout.parentWidget(),
+            max_fps=self.config_file.getfloat("Display", "max_fps", fallback=30.0),
+            min_fps=self.config_file.getfloat("Display", "min_fps", fallback=2.0),
+            metrics=self.metrics
+        )
+
+        # Add the viewer widget to the placeholder widget's layout
+        self.viewer_layout.addWidget(self.viewer.widget)
+
+        # Zooming in on the viewer loads the shown box at full detail
+        self.viewer.region_callback = self.requestDetail
+
+        # Offscreen viewers report render thread errors like the other workers
+        if getattr(self.viewer, 'error_text', None) is not None:
+            self.viewer.error_text.connect(self.error_handler)
 
-    def startScan(self):
+    def _setup_port_scanner(self):
+        """
+        Setup the background port scanner thread and start it
+        Input: None
+        Output: portCombo is filled and refreshed on hotplug
+        """
+        self.port_thread = QThread()
+        self.port_scanner = PortScanner()
+        self.port_scanner.moveToThread(self.port_thread)
+
+        # Connect signals
+        self.port_thread.started.connect(self.port_scanner.run)
+        self.port_scanner.portsChanged.connect(self.updatePortList)
+        self.port_scanner.stopped.connect(self.port_thread.quit)
+
+        self.port_thread.start()
+
+    def updatePortList(self, ports):
+        """
+        Function to refresh the port combobox
+        Input: List of ports from the port scanner thread
+        Output: portCombo refilled, keeping the selection when possible
+        """
+        current = self.portCombo.currentText() or self.config_file.get(
+            "Communication", "port", fallback="")
+
+        self.portCombo.blockSignals(True)
+        self.portCombo.clear()
+        self.portCombo.addItems(ports)
+        if current in ports:
+            self.portCombo.setCurrentText(current)
+        self.portCombo.blockSignals(False)
+
+    def closeEvent(self, event):
+        """
+        Function to stop background threads when the window closes
+        Input: Qt close event
+        Output: Port scanner thread finished, any export cancelled, a running
+                scan stopped and the render thread stopped before the window goes away
+        """
+        if self.port_thread.isRunning():
+            self.port_scanner.stopRequested.emit()
+            self.port_thread.wait(1000)
+        self.cancelExport()
+        if getattr(self, 'export_thread', None):
+            self.export_thread.wait(3000)
+        # Stop a running scan, its ring is closed and its cursors detached
+        self._cleanup_previous_scan()
+        # Offscreen viewers own a render thread
+        if getattr(self.viewer, 'close', None):
+            self.viewer.close()
+        super().closeEvent(event)
+
+    def loadScan(self, scan_id):
+        """
+        Function to show a stored scan in the viewer
+        Input: scan_id of a previous scan
+        Output: Decimated preview of that scan on the viewer
+        """
+        from lod import VoxelDecimator
+
+        if self._is_recording():
+            self.statusLabel.setText("Stop the scan before opening another")
+            return
+
+        self._ensure_viewer()
+        preview = VoxelDecimator(
+            self.config_file.getint("Display", "point_budget", fallback=100000),
+            self.config_file.getfloat("Display", "voxel_size", fallback=1.0)
+        )
+        for _, points in self.store.iter_points(scan_id):
+            preview.add(points)
+
+        buffer = preview.points
+        if buffer.count:
+            # Kept like a live frame, zooming back out returns to it
+            self.live_frame = (buffer.view(), buffer.mins, buffer.maxs)
+            self.viewer.set_points(*self.live_frame)
+        self.scan_id = scan_id
+        self.statusLabel.setText(f"Showing scan {scan_id}")
+
+    def dropScan(self, scan_id):
+        """
+        Function to delete a stored scan
+        Input: scan_id of a previous scan
+        Output: Scan and its points removed, other scans untouched
+        """
+        if self._is_recording(scan_id):
+            self.statusLabel.setText("Cannot drop the scan being recorded")
+            return
+        answer = QMessageBox.question(self, "Drop Scan", f"Delete scan {scan_id} and all of its points?")
+        if answer != QMessageBox.Yes:
+            return
+        self.store.drop_scan(scan_id)
+        if scan_id == self.scan_id:
+            # Nothing left to load detail from
+            self.scan_id = None
+        self.statusLabel.setText(f"Dropped scan {scan_id}")
+
+    def reprojectScan(self, scan_id):
+        """
+        Function to recompute a stored scan with the current calibration
+        Input: scan_id of a previous scan
+        Output: Points rebuilt from the scan's raw readings and shown
+        """
+        from calibration import Calibration
+
+        if self._is_recording(scan_id):
+            self.statusLabel.setText("Cannot re-project the scan being recorded")
+            return
+
+        # Re-read the file so edited calibration values are picked up
+        self.config_file.read(os.path.join(self.path, "Config", "config.ini"))
+        try:
+            count = self.store.reproject(scan_id, Calibration.from_config(self.config_file))
+        except ValueError as e:
+            self.error_handler(f"Calibration Error: {str(e)}")
+            return
+
+        if count is None:
+            self.statusLabel.setText("Scan has no raw readings to re-project")
+            return
+        self.statusLabel.setText(f"Re-projected {count} points")
+        self.loadScan(scan_id)
+
+    def resumeScan(self, scan_id):
+        """
+        Function to continue a stored scan after the app or board restarted
+        Input: scan_id of a previous scan
+        Output: Scan started, new readings appended to that scan
+        """
+        if self._is_recording(scan_id):
+            self.statusLabel.setText("Scan is already being recorded")
+            return
+        self.startScan(resume_scan_id=scan_id)
+
+    def replayScan(self, source, speed=None):
+        """
+        Function to feed a recorded session through the live scan path
+        Input: source (scan_id of a stored scan or path of a CSV export),
+               speed (1.0 real time, 0 as fast as possible, None from [Replay])
+        Output: Scan started that reads the recording instead of the port,
+                stored as a new scan
+        """
+        from replay import Recording
+
+        if speed is None:
+            speed = self.config_file.getfloat("Replay", "speed", fallback=1.0)
+        rate = self.config_file.getfloat("Replay", "csv_rate", fallback=1000.0)
+        try:
+            if isinstance(source, int):
+                recording = Recording.from_store(self.db_path, source, rate=rate)
+            else:
+                recording = Recording.from_csv(source, rate)
+        except (OSError, ValueError) as e:
+            self.error_handler(f"Replay Error: {str(e)}")
+            return
+
+        self.replay = (recording, speed)
+        try:
+            self.startScan()
+        finally:
+            self.replay = None
+
+    def replayCsv(self):
+        """
+        Function to pick a CSV export or capture and replay it
+        Input: Scans menu
+        Output: Replay started, see replayScan
+        """
+        filename, _ = QFileDialog.getOpenFileName(
+            self, "Replay CSV", os.path.join(self.path, "Data"), "CSV Files (*.csv);;All Files (*)"
+        )
+        if filename:
+            self.replayScan(filename)
+
+    def startScan(self, checked=False, resume_scan_id=None):
         """
         Function to start the scanning process
-        Input: Button click
+        Input: Button click, or resume_scan_id to append to a stored scan
         Output: Serial command 1 to arduino
         """
         # Cleanup any previous scan threads
@@ -133,14 +497,33 @@ class MainWindow(QMainWindow, FORM_CLASS):
         self.updateBaud()
         self.updateTimeout()
 
+        # Load the plotting stack on the first scan
+        self._ensure_viewer()
+
+        # Metrics cover one scan at a time
+        if self.metrics is not None:
+            self.metrics.reset()
+
+        # Every scan is its own session, older scans stay in the database
+        self.resuming = resume_scan_id is not None
+        if self.resuming:
+            self.scan_id = resume_scan_id
+        else:
+            self.scan_id = self.store.create_scan(f"replay of {self.replay[0].name}" if self.replay else None)
+        self._open_capture()
+
         # Update the status label
-        self.statusLabel.setText("Scanning...")
+        self.statusLabel.setText("Replaying..." if self.replay else "Scanning...")
 
         # =========== Threading Stuff =========== #
         # Set the empty array to store the scan data to save
         self.saveData = []
-        # Create a thread-safe queue to store data to graph
-        self.data_queue = queue.Queue()
+        self.filter_message = ""
+        self.buffer_message = ""
+        self._setup_ring_buffer()
+
+        # Create and setup the database writer thread
+        self._setup_writer_thread()
 
         # Create and setup worker thread
         self._setup_worker_thread()
@@ -148,7 +531,8 @@ class MainWindow(QMainWindow, FORM_CLASS):
         # Create and setup grapher thread
         self._setup_grapher_thread()
 
-        # Start both threads
+        # Start the threads, writer first so no readings are missed
+        self.write_thread.start()
         self.data_thread.start()
         self.graph_thread.start()
 
@@ -168,6 +552,11 @@ class MainWindow(QMainWindow, FORM_CLASS):
             self.worker.stopRequested.emit()
         if hasattr(self, 'grapher') and self.grapher:
             self.grapher.stopRequested.emit()
+        if hasattr(self, 'writer') and self.writer:
+            self.writer.stopRequested.emit()
+        # Wake a worker blocked on a full ring and readers waiting for rows
+        if self.ring:
+            self.ring.close()
         
         # Wait for threads to finish
         if hasattr(self, 'data_thread') and self.data_thread:
@@ -179,17 +568,87 @@ class MainWindow(QMainWindow, FORM_CLASS):
             if self.graph_thread.isRunning():
                 self.graph_thread.quit()
                 self.graph_thread.wait(3000)
+
+        if hasattr(self, 'write_thread') and self.write_thread:
+            if self.write_thread.isRunning():
+                self.write_thread.quit()
+                self.write_thread.wait(3000)
+
+        # Nothing reads this ring any more, writes must not wait on it
+        self._close_capture()
+        if self.ring:
+            for cursor in list(self.ring.cursors):
+                cursor.detach()
         
         # Clear references
         self.worker = None
         self.grapher = None
+        self.writer = None
         self.data_thread = None
         self.graph_thread = None
+        self.write_thread = None
 
-        # Clear scan data from database file
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM scan_data")
-        self.conn.commit()
+    def _open_capture(self):
+        """
+        Open a columnar capture file for the scan if enabled in the config
+        Input: None
+        Output: self.capture set to a CaptureWriter or None
+        """
+        self.capture = None
+        if not self.config_file.getboolean("Capture", "enabled", fallback=False):
+            return
+
+        from capture import CaptureWriter
+
+        directory = os.path.join(
+            self.path, self.config_file.get("Capture", "directory", fallback="Data")
+        )
+        try:
+            os.makedirs(directory, exist_ok=True)
+            self.capture = CaptureWriter(os.path.join(directory, f"scan-{self.scan_id}.cap"))
+        except (OSError, ValueError) as e:
+            self.error_handler(f"Capture Error: {str(e)}")
+
+    def _close_capture(self):
+        """
+        Close the capture file of the current scan
+        Input: None
+        Output: Capture flushed and released
+        """
+        if self.capture:
+            # The worker has stopped, so whatever it wrote is in the ring
+            self._drainCapture()
+            if self.capture_cursor is not None:
+                self.capture_cursor.detach()
+                self.capture_cursor = None
+            self.capture.close()
+            self.capture = None
+
+    def _setup_ring_buffer(self):
+        """
+        Setup the ring buffer the worker writes and every consumer reads
+        Input: None
+        Output: self.ring with storage, render and capture cursors
+        """
+        from ringbuffer import RingBuffer
+
+        # x, y, z, t rows, preallocated so memory stays flat for any scan length
+        self.ring = RingBuffer(self.config_file.getint("Buffer", "capacity", fallback=262144), columns=4)
+        policy = lambda name, fallback: self.config_file.get("Buffer", name, fallback=fallback).strip().lower()
+        try:
+            self.storage_cursor = self.ring.subscribe("storage", policy("storage_policy", "block"))
+            self.render_cursor = self.ring.subscribe("render", policy("render_policy", "drop_oldest"))
+            self.capture_cursor = None
+            if self.capture:
+                self.capture_cursor = self.ring.subscribe("capture", policy("capture_policy", "block"))
+        except ValueError as e:
+            # Fall back to safe defaults rather than refusing to scan
+            self.error_handler(f"Buffer Error: {str(e)}")
+            self.ring = RingBuffer(self.ring.capacity, columns=4)
+            self.storage_cursor = self.ring.subscribe("storage", "block")
+            self.render_cursor = self.ring.subscribe("render", "drop_oldest")
+            self.capture_cursor = self.ring.subscribe("capture", "block") if self.capture else None
+        self.ring_dropped = {}
 
     def _setup_worker_thread(self):
         """
@@ -197,37 +656,178 @@ class MainWindow(QMainWindow, FORM_CLASS):
         Input: None
         Output: Worker thread ready to run
         """
-        self.data_thread = QThread()
-        self.worker = Worker(
-            self.portCombo.currentText(),
-            int(self.baudCombo.currentText()),
-            int(self.timeoutCombo.currentText())
+        from worker import Worker, RECENT_SIZE
+        from calibration import Calibration
+        from filters import FilterPipeline
+
+        # The board restarts from home on a resume, the worker skips what is stored
+        resume_points = resume_raws = None
+        if self.resuming:
+            resume_points = self.store.recent_points(self.scan_id, RECENT_SIZE)
+            resume_raws = self.store.recent_points(self.scan_id, RECENT_SIZE, raw=True)
+
+        # Batching, conversion and hand off shared by live scans and replays
+        options = dict(
+            batch_count=self.config_file.getint("Communication", "batch_count", fallback=256),
+            batch_interval=self.config_file.getfloat("Communication", "batch_interval", fallback=0.05),
+            calibration=Calibration.from_config(self.config_file),
+            filters=FilterPipeline.from_config(self.config_file),
+            resume_points=resume_points,
+            resume_raws=resume_raws,
+            metrics=self.metrics,
+            ring=self.ring,
+            ring_timeout=self.config_file.getfloat("Buffer", "block_timeout", fallback=2.0)
         )
+
+        self.data_thread = QThread()
+        if self.replay:
+            from replay import ReplayWorker
+            recording, speed = self.replay
+            self.worker = ReplayWorker(recording, speed, **options)
+        else:
+            self.worker = Worker(
+                self.portCombo.currentText(),
+                int(self.baudCombo.currentText()),
+                int(self.timeoutCombo.currentText()),
+                transport=self.config_file.get("Communication", "transport", fallback="blocking").strip().lower(),
+                reconnect=self.config_file.getboolean("Communication", "reconnect", fallback=True),
+                max_reconnects=self.config_file.getint("Communication", "max_reconnects", fallback=0),
+                backoff=self.config_file.getfloat("Communication", "reconnect_backoff", fallback=0.5),
+                max_backoff=self.config_file.getfloat("Communication", "max_backoff", fallback=10.0),
+                settle=self.config_file.getfloat("Communication", "settle", fallback=2.0),
+                **options
+            )
         self.worker.moveToThread(self.data_thread)
         
         # Connect signals
         self.data_thread.started.connect(self.worker.run)
         self.worker.message_received.connect(self.updateStatusLabel)
         self.worker.error_text.connect(self.error_handler)
-        self.worker.distance_reading.connect(self.updateDistance)
+        self.worker.batch_ready.connect(self.updateBatchReady)
+        self.worker.raw_batch.connect(self.updateRawBatch)
+        self.worker.filter_stats.connect(self.updateFilterStats)
+        self.worker.reconnecting.connect(self.on_worker_reconnecting)
+        self.worker.reconnected.connect(self.on_worker_reconnected)
         self.worker.stopped.connect(self.on_worker_stopped)
 
+    def _setup_writer_thread(self):
+        """
+        Setup database writer thread with settings from the config file
+        Input: None
+        Output: Writer thread ready to run
+        """
+        from ingest import DataWriter
+
+        self.write_thread = QThread()
+        self.writer = DataWriter(
+            self.db_path,
+            self.scan_id,
+            batch_size=self.config_file.getint("Database", "batch_size", fallback=500),
+            flush_interval=self.config_file.getfloat("Database", "flush_interval", fallback=0.25),
+            journal_mode=self.config_file.get("Database", "journal_mode", fallback="WAL"),
+            synchronous=self.config_file.get("Database", "synchronous", fallback="NORMAL"),
+            metrics=self.metrics,
+            cursor=self.storage_cursor
+        )
+        self.writer.moveToThread(self.write_thread)
+
+        # Connect signals
+        self.write_thread.started.connect(self.writer.run)
+        self.writer.stats.connect(self.updateIngestStats)
+        self.writer.error_text.connect(self.error_handler)
+        self.writer.stopped.connect(self.on_writer_stopped)
+
     def _setup_grapher_thread(self):
         """
         Setup grapher thread with proper connections
         Input: None
         Output: Grapher thread ready to run
         """
+        from grapher import DataGrapher
+
         self.graph_thread = QThread()
-        self.grapher = DataGrapher(self.db_path)
+        self.grapher = DataGrapher(
+            self.db_path,
+            self.scan_id,
+            point_budget=self.config_file.getint("Display", "point_budget", fallback=100000),
+            voxel_size=self.config_file.getfloat("Display", "voxel_size", fallback=1.0),
+            capture_path=self.capture.path if self.capture else None,
+            metrics=self.metrics,
+            cursor=self.render_cursor
+        )
         self.grapher.moveToThread(self.graph_thread)
         
-        # Set canvas and connect signals
-        self.grapher.set_canvas(self.canvas, self.ax)
+        # Connect signals, drawing happens back on the GUI thread
         self.grapher.newData.connect(self.grapher.updateModel)
+        self.grapher.pointsReady.connect(self.updateViewer)
+        self.grapher.regionReady.connect(self.showRegion)
+        self.grapher.error_text.connect(self.error_handler)
         self.graph_thread.started.connect(self.grapher.run)
         self.grapher.stopped.connect(self.on_grapher_stopped)
 
+    def updateViewer(self, points, mins, maxs):
+        """
+        Function to show the grapher's latest point cloud
+        Input: Points, mins and maxs from grapher thread
+        Output: Viewer widget redrawn on the GUI thread
+        """
+        self.live_frame = (points, mins, maxs)
+        if self.detail_region is None:
+            if self.metrics is None:
+                self.viewer.set_points(points, mins, maxs)
+                return
+            start = time.perf_counter()
+            self.viewer.set_points(points, mins, maxs)
+            self.metrics.since("gui.redraw", start)
+            self.metrics.count("gui.frames")
+
+    def requestDetail(self, mins, maxs):
+        """
+        Function to ask the grapher for a denser view of a box
+        Input: mins and maxs (box corners), or None to go back to the live preview
+        Output: Region request sent to the grapher thread
+        """
+        if mins is None or maxs is None:
+            self.detail_region = None
+            self.detail_timer.stop()
+            if self.live_frame and self.viewer:
+                self.viewer.set_points(*self.live_frame)
+            return
+
+        # Wheel zoom sends a box per notch, only the last one is loaded
+        self.detail_region = (mins, maxs)
+        self.detail_timer.start()
+
+    def loadDetail(self):
+        """
+        Function to load the requested box once the zoom settles
+        Input: Detail timer
+        Output: Region loaded by the grapher thread, or here for a stored
+                scan shown without one
+        """
+        if self.detail_region is None:
+            return
+        mins, maxs = self.detail_region
+        thread = getattr(self, 'graph_thread', None)
+        if thread and thread.isRunning():
+            self.grapher.regionRequested.emit(mins, maxs)
+        elif self.scan_id is not None:
+            from lod import region_points
+            points = region_points(
+                self.store, self.scan_id, mins, maxs,
+                self.config_file.getint("Display", "point_budget", fallback=100000)
+            )
+            self.showRegion(points, mins, maxs)
+
+    def showRegion(self, points, mins, maxs):
+        """
+        Function to show the denser subset of a box
+        Input: Points, mins and maxs from grapher thread
+        Output: Viewer shows the region instead of the live preview
+        """
+        if self.detail_region is not None:
+            self.viewer.set_points(points, mins, maxs)
+
     def updateStatusLabel(self, message):
         """
         Function to update the status label with a message
@@ -243,6 +843,35 @@ class MainWindow(QMainWindow, FORM_CLASS):
         Output: Error message to the serial label
         """
         self.serialLabel.setText(error)
+
+    def updateIngestStats(self, rate, latency):
+        """
+        Function to show the database ingest statistics
+        Input: Points per second and flush latency from writer thread
+        Output: Ingest stats on the window status bar
+        """
+        self.ingest_message = f"Ingest: {rate:.0f} pts/s, flush {latency:.1f} ms"
+        self._showStatusBar()
+
+    def updateFilterStats(self, counts):
+        """
+        Function to show how many readings the filters dropped
+        Input: Dict of accepted and per stage rejected counts from worker thread
+        Output: Filter counts on the window status bar
+        """
+        rejected = ", ".join(f"{name} {count}" for name, count in counts.items() if name != "accepted")
+        self.filter_message = f"Filtered: kept {counts['accepted']}, rejected {rejected}"
+        self._showStatusBar()
+
+    def _showStatusBar(self):
+        """
+        Function to combine the ingest and filter stats on the status bar
+        Input: None
+        Output: Status bar message updated
+        """
+        self.statusBar().showMessage(" | ".join(
+            message for message in (self.ingest_message, self.filter_message, self.buffer_message) if message
+        ))
         
     def stopScan(self):
         """
@@ -267,15 +896,56 @@ class MainWindow(QMainWindow, FORM_CLASS):
         Input: Worker thread stopped signal
         Output: Quit and wait for the worker thread to finish
         """
+        # Already torn down by _cleanup_previous_scan
+        if not self.data_thread:
+            return
         self.data_thread.quit()
         self.data_thread.wait()
 
+        # Everything the worker read is in the ring, the writer drains it before stopping
+        if self.writer:
+            self.writer.stopRequested.emit()
+        self._close_capture()
+
+    def on_worker_reconnecting(self, attempt):
+        """
+        Function to show that the scanner connection was lost
+        Input: Reconnect attempt number from worker thread
+        Output: Status label updated, the scan keeps its threads
+        """
+        self.statusLabel.setText(f"Connection lost, reconnecting (attempt {attempt})...")
+
+    def on_worker_reconnected(self):
+        """
+        Function to show that the scan continues after a reconnect
+        Input: None
+        Output: Status label updated
+        """
+        self.statusLabel.setText("Scanning...")
+
+    def on_writer_stopped(self):
+        """
+        Function to handle the writer thread stopped signal
+        Input: Writer thread stopped signal
+        Output: Quit and wait for the writer thread to finish
+        """
+        if not self.write_thread:
+            return
+        self.write_thread.quit()
+        self.write_thread.wait()
+
+        # Everything for this scan is stored now
+        self.store.finish_scan(self.writer.scan_id)
+        self.exportMetrics()
+
     def on_grapher_stopped(self):
         """
         Function to handle the grapher thread stopped signal
         Input: Grapher thread stopped signal
         Output: Quit and wait for the grapher thread to finish
         """
+        if not self.graph_thread:
+            return
         self.graph_thread.quit()
         self.graph_thread.wait()
 
@@ -307,92 +977,194 @@ class MainWindow(QMainWindow, FORM_CLASS):
         """
         Function to update the distance information
         Input: Distance reading from worker thread
-        Output: Updated distance information to the UI
-        """
+        Output: Newest reading kept for the label timer
 
+        The worker is the ring buffer's only writer, its batches already
+        carry this reading to storage and the plot.
+        """
         if distance:
-            try:
-                # Display last scanned data to the label
-                self.rawDataLabel.setText(str(distance))
-
-                # Break data in x, y, z block to be appended
-                data_block = [distance[0], distance[1], distance[2]]
-
-                # Append data block to the save array
-                # self.saveData.append(data_block)
-
-                # Insert into SQLite3
-                cursor = self.conn.cursor()
-                cursor.execute(
-                    "INSERT INTO scan_data (x, y, z) VALUES (?, ?, ?)",
-                    (data_block[0], data_block[1], data_block[2])
-                )
-                self.conn.commit()
-
-                # Put the data block into the queue for grapher thread
-                self.data_queue.put(data_block)
-            except Exception as e:
-                print(e)
-        else:
-            pass
+            if self.metrics is not None:
+                self.metrics.count("gui.points")
+            self.latest_reading = distance
+
+    def updateBatchReady(self):
+        """
+        Function to handle new rows in the ring buffer
+        Input: batch_ready signal from worker thread
+        Output: Capture file appended, grapher woken, newest reading kept
+                for the UI, overflow counts reported
+        """
+        # Cleared first, a batch written from here on queues a new signal
+        if self.worker:
+            self.worker.ready_pending = False
+        if not self.ring:
+            return
+
+        metrics = self.metrics
+        if metrics is not None:
+            start = time.perf_counter()
+
+        # Raw columns straight into the mapped capture file
+        self._drainCapture()
+
+        # Only the newest reading is worth showing, the label timer draws it
+        latest = self.ring.latest()
+        if len(latest):
+            self.latest_reading = tuple(latest[0, :3].tolist())
+
+        # One wake-up at a time, the grapher reads everything new from its cursor
+        if self.grapher and not self.grapher.update_pending:
+            self.grapher.update_pending = True
+            self.grapher.newData.emit([])
+
+        stats = self.ring.stats()
+        dropped = {name: count for name, (_, count) in stats.items() if count}
+        if dropped != self.ring_dropped:
+            self.ring_dropped = dropped
+            self.buffer_message = "Dropped: " + ", ".join(f"{name} {count}" for name, count in dropped.items())
+            self._showStatusBar()
+
+        if metrics is not None:
+            metrics.since("gui.handoff", start)
+            for name, (unread, count) in stats.items():
+                metrics.gauge(f"ring.{name}.unread", unread)
+                metrics.gauge(f"ring.{name}.dropped", count)
+
+    def _drainCapture(self):
+        """
+        Function to copy unread ring rows into the capture file
+        Input: None
+        Output: Rows appended with their timestamps
+        """
+        if self.capture and self.capture_cursor is not None:
+            rows = self.capture_cursor.read()
+            if len(rows):
+                self.capture.append(rows[:, :3], rows[:, 3])
+
+    def updateRawBatch(self, raws):
+        """
+        Function to keep the raw readings behind a batch
+        Input: N x 3 array of (distance, step, z step) from worker thread
+        Output: Readings queued for scan_raw so the scan can be re-projected
+        """
+        self.writer.enqueue_raw(raws)
+
+    def refreshRawDataLabel(self):
+        """
+        Function to show the newest reading at the display refresh rate
+        Input: Label timer tick
+        Output: Updated raw data label if a new reading arrived
+        """
+        if self.latest_reading is not self.shown_reading:
+            self.shown_reading = self.latest_reading
+            self.rawDataLabel.setText(str(self.shown_reading))
 
     def saveFile(self):
         """
-        Function to save the scanned data to a text file
+        Function to export the scanned data in the background
         Input: Button click
-        Output: Save the data to a .txt file
+        Output: Save the data as CSV, PLY, PCD, .npy or .npz, or a
+                reconstructed STL, OBJ or PLY mesh
         """
+        from exporter import ScanExporter, MeshExporter, EXPORT_FILTERS, MESH_FILTERS
+
         # Get current timestamp
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
 
-        filename, _ = QFileDialog.getSaveFileName(
-            self, "Save Scan Data", f"{timestamp}-scanData.txt", "CSV Files (*.csv);;All Files (*)"
+        filename, selected_filter = QFileDialog.getSaveFileName(
+            self, "Save Scan Data", f"{timestamp}-scanData.csv", EXPORT_FILTERS
         )
 
-        # Connect to the database and grab the data
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT x, y, z FROM scan_data")
-        rows = cursor.fetchall()
+        # Export the current scan, or the newest one after a restart
+        scan_id = self.scan_id if self.scan_id is not None else self.store.latest_scan()
+        if scan_id is None:
+            self.statusLabel.setText("No scan to save.")
+            return
 
         # Check for filename to avoid crashing
-        if filename:
-            # Open the file and write the save array as text
-            with open(filename, "w") as file:
-                for row in rows:
-                    line = ','.join(str(item) for item in row)
-                    file.write(line + '\n')
-        else:
+        if not filename:
             # If no filename is selected update the status label
             self.statusLabel.setText("No file selected for saving.")
+            return
+
+        # Take the extension from the chosen filter if none was typed
+        if not os.path.splitext(filename)[1]:
+            extension = selected_filter.split("(*")[-1].rstrip(")")
+            filename += extension if extension.startswith(".") else ".csv"
+
+        # Only one export at a time
+        if getattr(self, 'export_thread', None) and self.export_thread.isRunning():
+            self.statusLabel.setText("Export already running")
+            return
+
+        # Crop to the box shown at full detail, if any
+        box = None
+        if self.detail_region is not None and self.config_file.getboolean("Export", "crop_to_view", fallback=False):
+            box = self.detail_region
+
+        self.export_thread = QThread()
+        # STL and OBJ are always meshes, PLY only when the mesh filter was picked
+        extension = os.path.splitext(filename)[1].lower()
+        if selected_filter in MESH_FILTERS or extension in (".stl", ".obj"):
+            self.exporter = MeshExporter(
+                self.db_path, scan_id, filename,
+                segments=self.config_file.getint("Mesh", "segments", fallback=360),
+                z_tolerance=self.config_file.getfloat("Mesh", "z_tolerance", fallback=0.25),
+                min_ring_points=self.config_file.getint("Mesh", "min_ring_points", fallback=8),
+                caps=self.config_file.getboolean("Mesh", "caps", fallback=True),
+                workers=self.config_file.getint("Mesh", "workers", fallback=0),
+                box=box
+            )
+        else:
+            self.exporter = ScanExporter(self.db_path, scan_id, filename, box=box)
+        self.exporter.moveToThread(self.export_thread)
+
+        # Connect signals
+        self.export_thread.started.connect(self.exporter.run)
+        self.exporter.progress.connect(self.updateExportProgress)
+        self.exporter.finished.connect(self.on_export_finished)
+        self.exporter.error_text.connect(self.error_handler)
+        self.exporter.stopped.connect(self.export_thread.quit)
+
+        self.statusLabel.setText("Saving...")
+        self.export_thread.start()
+
+    def cancelExport(self):
+        """
+        Function to cancel a running export
+        Input: Escape key or window close
+        Output: Exporter stopped, its partial output is discarded
+        """
+        if getattr(self, 'export_thread', None) and self.export_thread.isRunning():
+            self.exporter.stopRequested.emit()
+            self.statusLabel.setText("Export cancelled")
+
+    def updateExportProgress(self, percent):
+        """
+        Function to show the export progress
+        Input: Percent done from exporter thread
+        Output: Updated status label
+        """
+        self.statusLabel.setText(f"Saving... {percent}%")
+
+    def on_export_finished(self, filename):
+        """
+        Function to handle a finished export
+        Input: Written file name from exporter thread
+        Output: Status label names the saved file
+        """
+        self.statusLabel.setText(f"Saved {os.path.basename(filename)}")
 
     @staticmethod
     def serial_ports():
         """ Lists serial port names
 
-            :raises EnvironmentError:
-                On unsupported or unknown platforms
             :returns:
                 A list of the serial ports available on the system
 
-            Function by: tfeldmann
+            Function by: tfeldmann, now backed by ports.discover_ports
         """
-        if sys.platform.startswith('win'):
-            ports = ['COM%s' % (i + 1) for i in range(256)]
-        elif sys.platform.startswith('linux') or sys.platform.startswith('cygwin'):
-            # this excludes your current terminal "/dev/tty"
-            ports = glob.glob('/dev/tty[A-Za-z]*')
-        else:
-            raise EnvironmentError('Unsupported platform')
-
-        result = []
-        for port in ports:
-            try:
-                s = serial.Serial(port)
-                s.close()
-                result.append(port)
-            except (OSError, serial.SerialException):
-                pass
-        return result
+        return discover_ports()
 
 
 
@@ -401,9 +1173,18 @@ if __name__ == "__main__":
     # Create the application instance
     app = QApplication(sys.argv)
 
+    startup_timer.mark("qt app")
+
     # Create and show the main window
     window = MainWindow()
+    startup_timer.mark("main window")
     window.show()
 
+    # Report once the event loop has painted the window
+    def report_startup():
+        startup_timer.mark("first paint")
+        print(startup_timer.report())
+    QTimer.singleShot(0, report_startup)
+
     # Execute the application
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,218 @@
+import os
+import sys
+import math
+import time
+import socket
+import select
+import threading
+import csv
+
+
+def synthetic_frames(steps_per_rev=200, radius=50.0, z_step=0.5, sequence_in_x=False):
+    """
+    Function to synthesize an endless DATA/STAT stream of a rotating cylinder
+    Input: steps_per_rev (points per ring), radius (mm), z_step (mm per ring),
+           sequence_in_x (put the frame number in x, used to measure latency)
+    Output: Yields (frame bytes, is_data)
+    """
+    yield b"STAT(Scanning...)\r\n", False
+    seq = 0
+    while True:
+        ring, step = divmod(seq, steps_per_rev)
+        if step == 0 and ring:
+            yield b"STAT(Moving Z axis up - step %d z=%.2f)\r\n" % (ring, ring * z_step), False
+        angle = 2.0 * math.pi * step / steps_per_rev
+        x = float(seq) if sequence_in_x else radius * math.cos(angle)
+        yield b"DATA(%.3f,%.3f,%.3f)\r\n" % (x, radius * math.sin(angle), ring * z_step), True
+        seq += 1
+
+
+def recorded_frames(path, steps_per_rev=200, z_step=0.5, raw=False, z_steps_per_ring=100):
+    """
+    Function to replay a recorded CSV as serial frames
+    Input: path (CSV export or raw capture), steps_per_rev and z_step for
+           single-value rows, raw (send those rows as RAW frames),
+           z_steps_per_ring (lead screw steps per ring for RAW frames)
+    Output: Yields (frame bytes, is_data)
+
+    Rows with x, y, z become DATA frames. Rows with one number are raw
+    distances (as in the 2025 captures) and are laid out on a synthetic
+    turntable, or sent untouched as RAW(distance,step,z_step) when raw is
+    set. Anything else is sent as a STAT message.
+    """
+    seq = 0
+    with open(path, newline="") as file:
+        for row in csv.reader(file):
+            values = [cell.strip() for cell in row if cell.strip()]
+            try:
+                numbers = [float(value) for value in values]
+            except ValueError:
+                yield b"STAT(%s)\r\n" % ",".join(values).encode("utf-8"), False
+                continue
+
+            if len(numbers) >= 3:
+                x, y, z = numbers[:3]
+            elif len(numbers) == 1:
+                ring, step = divmod(seq, steps_per_rev)
+                if raw:
+                    seq += 1
+                    yield b"RAW(%.3f,%d,%d)\r\n" % (numbers[0], step, ring * z_steps_per_ring), True
+                    continue
+                angle = 2.0 * math.pi * step / steps_per_rev
+                x, y, z = numbers[0] * math.cos(angle), numbers[0] * math.sin(angle), ring * z_step
+            else:
+                continue
+            seq += 1
+            yield b"DATA(%.3f,%.3f,%.3f)\r\n" % (x, y, z), True
+
+
+class SimulatedDevice:
+    """ Stand-in for the Arduino on a pty pair (POSIX) or a local TCP socket """
+
+    def __init__(self, frames, rate=1000.0, baud=115200, transport=None, wait_for_start=True):
+        # Frame source and pacing, rate is DATA frames per second (0 = unpaced)
+        self.frames = frames
+        self.rate = float(rate)
+        # Serial line budget, 10 bits per byte on the wire (0 = unlimited)
+        self.bytes_per_sec = baud / 10.0 if baud else 0.0
+        # Behave like the firmware, stream only after the '1' command
+        self.wait_for_start = wait_for_start
+
+        self.transport = transport or ("socket" if sys.platform.startswith("win") else "pty")
+        self.port_name = None
+
+        # Send time of every DATA frame, indexed by frame number
+        self.sent_times = []
+        self.sent_lines = 0
+
+        self.running = False
+        self.started = threading.Event()
+        self.thread = None
+        self._master = None
+        self._slave = None
+        self._server = None
+        self._client = None
+
+    def open(self):
+        """
+        Function to create the device end and its port name
+        Input: None
+        Output: port_name usable by serial.serial_for_url / Worker
+        """
+        if self.transport == "pty":
+            import tty
+            self._master, self._slave = os.openpty()
+            tty.setraw(self._slave)
+            self.port_name = os.ttyname(self._slave)
+        else:
+            self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._server.bind(("127.0.0.1", 0))
+            self._server.listen(1)
+            self.port_name = "socket://127.0.0.1:%d" % self._server.getsockname()[1]
+        return self.port_name
+
+    def start(self):
+        """
+        Function to start streaming in a background thread
+        Input: None
+        Output: Device thread running
+        """
+        if self.port_name is None:
+            self.open()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Function to stop streaming and close the device end
+        Input: None
+        Output: Thread joined and descriptors closed
+        """
+        self.running = False
+        if self.thread:
+            self.thread.join(2.0)
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        for sock in (self._client, self._server):
+            if sock is not None:
+                sock.close()
+        self._master = self._slave = self._client = self._server = None
+
+    def _send(self, data):
+        """
+        Function to write bytes to the host side
+        Input: data (bytes)
+        Output: Bytes written to the pty master or the socket
+        """
+        if self._master is not None:
+            os.write(self._master, data)
+        else:
+            self._client.sendall(data)
+
+    def _poll_command(self):
+        """
+        Function to read a pending host command without blocking
+        Input: None
+        Output: Command bytes or b""
+        """
+        source = self._master if self._master is not None else self._client
+        if source is None:
+            return b""
+        ready, _, _ = select.select([source], [], [], 0)
+        if not ready:
+            return b""
+        try:
+            return os.read(source, 64) if self._master is not None else source.recv(64)
+        except OSError:
+            return b""
+
+    def _run(self):
+        """
+        Function for the device thread
+        Input: None
+        Output: Frames written at the configured rate and baud
+        """
+        if self._server is not None:
+            self._client, _ = self._server.accept()
+
+        # Wait for the start command, like the firmware does
+        if self.wait_for_start:
+            self._send(b"STAT(Ready!)\r\n")
+            while self.running and b"1" not in self._poll_command():
+                time.sleep(0.005)
+        self.started.set()
+
+        start = time.perf_counter()
+        sent_bytes = 0
+        for frame, is_data in self.frames:
+            if not self.running:
+                break
+
+            # Pace by frame rate and by the serial line budget
+            due = start
+            if self.rate > 0:
+                due = start + len(self.sent_times) / self.rate
+            if self.bytes_per_sec > 0:
+                due = max(due, start + sent_bytes / self.bytes_per_sec)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            if b"0" in self._poll_command():
+                break
+
+            if is_data:
+                self.sent_times.append(time.perf_counter())
+            try:
+                self._send(frame)
+            except OSError:
+                break
+            sent_bytes += len(frame)
+            self.sent_lines += 1
+
+        self.running = False
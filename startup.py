@@ -0,0 +1,33 @@
+import time
+
+
+class StartupTimer:
+    """ Records how long each start-up phase takes """
+
+    def __init__(self, start=None):
+        # Start from a timestamp taken as early as possible in the process
+        self.start = start if start is not None else time.perf_counter()
+        self.last = self.start
+        self.phases = []
+
+    def mark(self, name):
+        """
+        Function to close the current phase
+        Input: name (phase label)
+        Output: Phase duration recorded
+        """
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def report(self):
+        """
+        Function to format the recorded phases
+        Input: None
+        Output: Multi-line string with per-phase and total times in ms
+        """
+        lines = ["Startup timing:"]
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<16} {seconds * 1000.0:8.1f} ms")
+        lines.append(f"  {'total':<16} {(self.last - self.start) * 1000.0:8.1f} ms")
+        return "\n".join(lines)
@@ -0,0 +1,536 @@
+import sqlite3
+import datetime
+
+# Allowed PRAGMA values, checked before being formatted into SQL
+JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+# Points are clustered by (scan_id, seq): each scan is one contiguous key
+# range, so live inserts append at the end of the newest scan and reading
+# or dropping a scan never touches the others. scan_raw keeps the sensor
+# readings behind RAW frames so a scan can be re-projected after recalibration.
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS scans (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        started_at TEXT NOT NULL,
+        ended_at TEXT,
+        label TEXT,
+        point_count INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS scan_points (
+        scan_id INTEGER NOT NULL,
+        seq INTEGER NOT NULL,
+        x REAL NOT NULL,
+        y REAL NOT NULL,
+        z REAL NOT NULL,
+        t REAL,
+        PRIMARY KEY (scan_id, seq)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS scan_raw (
+        scan_id INTEGER NOT NULL,
+        seq INTEGER NOT NULL,
+        distance REAL NOT NULL,
+        step REAL NOT NULL,
+        z_step REAL NOT NULL,
+        t REAL,
+        PRIMARY KEY (scan_id, seq)
+    ) WITHOUT ROWID;
+"""
+
+# Spatial index over scan_points: an R*Tree entry per block of INDEX_BLOCK
+# consecutive seqs with the block's bounding box, plus the scan id as a
+# fourth dimension so one query stays inside one scan. Scans advance ring by
+# ring, so a block is a short arc and a box query touches few of them; the
+# matching seq ranges are then read through the (scan_id, seq) key.
+INDEX_BLOCK = 256
+# Entry id is scan_id * INDEX_KEYS + block number
+INDEX_KEYS = 2 ** 32
+INDEX_SCHEMA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS scan_index USING rtree(
+        id, min_scan, max_scan, min_x, max_x, min_y, max_y, min_z, max_z
+    );
+"""
+
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+class ScanStore:
+    """ Session-aware SQLite store, one instance per thread """
+
+    def __init__(self, db_path, journal_mode="WAL", synchronous="NORMAL"):
+        journal_mode = journal_mode.upper()
+        synchronous = synchronous.upper()
+        if journal_mode not in JOURNAL_MODES:
+            raise ValueError(f"Unsupported journal mode: {journal_mode}")
+        if synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"Unsupported synchronous mode: {synchronous}")
+
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(f"PRAGMA journal_mode={journal_mode}")
+        self.conn.execute(f"PRAGMA synchronous={synchronous}")
+
+        # Inserts keep scan_index current once create_schema has made it
+        self.indexed = self._has_table("scan_index")
+
+    def _has_table(self, name):
+        return self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ).fetchone() is not None
+
+    def create_schema(self):
+        """
+        Function to create the tables and bring in the old single-scan table
+        Input: None
+        Output: scans and scan_points exist, legacy scan_data migrated,
+                spatial index built for scans stored before it existed
+        """
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+        self._migrate_legacy()
+        self._create_index()
+
+    def _create_index(self):
+        """
+        Function to create the spatial index and fill it for stored scans
+        Input: None
+        Output: self.indexed set, False when SQLite lacks the R*Tree module
+        """
+        if self._has_table("scan_index"):
+            self.indexed = True
+            return
+        try:
+            with self.conn:
+                self.conn.executescript(INDEX_SCHEMA)
+        except sqlite3.OperationalError:
+            # Region queries fall back to reading the whole scan
+            self.indexed = False
+            return
+        self.indexed = True
+        for (scan_id,) in self.conn.execute("SELECT id FROM scans").fetchall():
+            self.reindex_scan(scan_id)
+
+    def _migrate_legacy(self):
+        """
+        Function to move rows of the old scan_data table into a scan
+        Input: None
+        Output: Legacy rows kept as one imported scan, old table dropped
+        """
+        if not self._has_table("scan_data"):
+            return
+
+        with self.conn:
+            # Rows with a missing coordinate are not carried over
+            count = self.conn.execute(
+                "SELECT COUNT(*) FROM scan_data WHERE x IS NOT NULL AND y IS NOT NULL AND z IS NOT NULL"
+            ).fetchone()[0]
+            if count:
+                cursor = self.conn.execute(
+                    "INSERT INTO scans (started_at, ended_at, label, point_count) VALUES (?, ?, ?, ?)",
+                    (_now(), _now(), "Imported scan_data", count)
+                )
+                self.conn.execute(
+                    """
+                    INSERT INTO scan_points (scan_id, seq, x, y, z)
+                    SELECT ?, ROW_NUMBER() OVER (ORDER BY id) - 1, x, y, z
+                    FROM scan_data WHERE x IS NOT NULL AND y IS NOT NULL AND z IS NOT NULL
+                    """,
+                    (cursor.lastrowid,)
+                )
+            self.conn.execute("DROP TABLE scan_data")
+
+    def create_scan(self, label=None):
+        """
+        Function to start a new scan session
+        Input: label (optional name)
+        Output: New scan id
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO scans (started_at, label) VALUES (?, ?)", (_now(), label)
+            )
+        return cursor.lastrowid
+
+    def finish_scan(self, scan_id):
+        """
+        Function to mark a scan as ended
+        Input: scan_id
+        Output: ended_at filled in
+        """
+        with self.conn:
+            self.conn.execute("UPDATE scans SET ended_at = ? WHERE id = ?", (_now(), scan_id))
+
+    def list_scans(self):
+        """
+        Function to list stored scans, newest first
+        Input: None
+        Output: List of (id, started_at, ended_at, label, point_count)
+        """
+        return self.conn.execute(
+            "SELECT id, started_at, ended_at, label, point_count FROM scans ORDER BY id DESC"
+        ).fetchall()
+
+    def latest_scan(self):
+        """
+        Function to get the newest scan id
+        Input: None
+        Output: Scan id or None if nothing is stored
+        """
+        row = self.conn.execute("SELECT MAX(id) FROM scans").fetchone()
+        return row[0] if row else None
+
+    def drop_scan(self, scan_id):
+        """
+        Function to delete a scan and its points
+        Input: scan_id
+        Output: Only that scan's key range is removed
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM scan_points WHERE scan_id = ?", (scan_id,))
+            self.conn.execute("DELETE FROM scan_raw WHERE scan_id = ?", (scan_id,))
+            self.conn.execute("DELETE FROM scans WHERE id = ?", (scan_id,))
+            self._clear_index(scan_id)
+
+    def next_seq(self, scan_id, table="scan_points"):
+        """
+        Function to get the next free sequence number of a scan
+        Input: scan_id, table (scan_points or scan_raw)
+        Output: Integer, 0 for an empty scan
+        """
+        if table not in ("scan_points", "scan_raw"):
+            raise ValueError(f"Unknown table: {table}")
+        row = self.conn.execute(
+            f"SELECT MAX(seq) FROM {table} WHERE scan_id = ?", (scan_id,)
+        ).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def insert_points(self, scan_id, start_seq, rows):
+        """
+        Function to append points to a scan in one transaction
+        Input: scan_id, start_seq (seq of the first row), rows (list of x, y, z, t)
+        Output: Number of rows written, the scan's point_count and spatial
+                index updated for those only
+
+        Rows whose seq is already stored (a batch replayed after a crash or
+        on resume) are skipped.
+        """
+        if not rows:
+            return 0
+        with self.conn:
+            stored = {seq for seq, in self.conn.execute(
+                "SELECT seq FROM scan_points WHERE scan_id = ? AND seq BETWEEN ? AND ?",
+                (scan_id, start_seq, start_seq + len(rows) - 1)
+            )}
+            new = [(start_seq + i, row) for i, row in enumerate(rows) if start_seq + i not in stored]
+            if not new:
+                return 0
+            self.conn.executemany(
+                "INSERT INTO scan_points (scan_id, seq, x, y, z, t) VALUES (?, ?, ?, ?, ?, ?)",
+                ((scan_id, seq, x, y, z, t) for seq, (x, y, z, t) in new)
+            )
+            self.conn.execute(
+                "UPDATE scans SET point_count = point_count + ? WHERE id = ?", (len(new), scan_id)
+            )
+            if self.indexed:
+                self._index_rows(scan_id, [seq for seq, _ in new], [row[:3] for _, row in new])
+        return len(new)
+
+    def insert_raw(self, scan_id, start_seq, rows):
+        """
+        Function to append raw readings to a scan in one transaction
+        Input: scan_id, start_seq (seq of the first row), rows (list of distance, step, z_step, t)
+        Output: Rows written to scan_raw
+        """
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO scan_raw (scan_id, seq, distance, step, z_step, t) VALUES (?, ?, ?, ?, ?, ?)",
+                ((scan_id, start_seq + i, d, step, z, t) for i, (d, step, z, t) in enumerate(rows))
+            )
+
+    def iter_raw(self, scan_id, chunk_size=65536):
+        """
+        Function to read the raw readings of a scan in chunks
+        Input: scan_id, chunk_size
+        Output: Yields N x 4 float64 arrays of distance, step, z_step, t
+        """
+        import numpy as np
+
+        cursor = self.conn.execute(
+            "SELECT distance, step, z_step, t FROM scan_raw WHERE scan_id = ? ORDER BY seq",
+            (scan_id,)
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield np.asarray(rows, dtype=np.float64)
+
+    def reproject(self, scan_id, calibration, chunk_size=65536):
+        """
+        Function to rebuild a scan's points from its raw readings
+        Input: scan_id, calibration (Calibration), chunk_size
+        Output: Number of points, scan_points and point_count replaced
+
+        Scans without raw readings are left alone and return None. For a
+        scan with raw readings every point is rebuilt from scan_raw.
+        """
+        if not self.conn.execute(
+                "SELECT 1 FROM scan_raw WHERE scan_id = ? LIMIT 1", (scan_id,)).fetchone():
+            return None
+
+        import numpy as np
+
+        count = 0
+        with self.conn:
+            self.conn.execute("DELETE FROM scan_points WHERE scan_id = ?", (scan_id,))
+            self._clear_index(scan_id)
+            for raw in self.iter_raw(scan_id, chunk_size):
+                points, keep = calibration.to_cartesian(raw[:, :3])
+                times = raw[keep, 3]
+                self.conn.executemany(
+                    "INSERT INTO scan_points (scan_id, seq, x, y, z, t) VALUES (?, ?, ?, ?, ?, ?)",
+                    ((scan_id, count + i, x, y, z, t) for i, ((x, y, z), t)
+                     in enumerate(zip(points.tolist(), times.tolist())))
+                )
+                if self.indexed and len(points):
+                    self._index_rows(scan_id, count + np.arange(len(points)), points)
+                count += len(points)
+            self.conn.execute("UPDATE scans SET point_count = ? WHERE id = ?", (count, scan_id))
+        return count
+
+    def recent_points(self, scan_id, count=4096, raw=False):
+        """
+        Function to get the newest rows of a scan, e.g. to resume it
+        Input: scan_id, count (most rows), raw (read scan_raw instead of scan_points)
+        Output: N x 3 float64 array in seq order, x, y, z or distance, step, z_step
+        """
+        import numpy as np
+
+        columns, table = ("distance, step, z_step", "scan_raw") if raw else ("x, y, z", "scan_points")
+        rows = self.conn.execute(
+            f"SELECT {columns} FROM {table} WHERE scan_id = ? ORDER BY seq DESC LIMIT ?",
+            (scan_id, count)
+        ).fetchall()
+        return np.asarray(rows[::-1], dtype=np.float64).reshape(-1, 3)
+
+    def iter_points(self, scan_id, after_seq=-1, chunk_size=65536):
+        """
+        Function to read a scan in chunks
+        Input: scan_id, after_seq (only rows with a larger seq), chunk_size
+        Output: Yields (last seq, N x 3 float64 array) per chunk
+        """
+        # Imported here so opening the store at start-up stays cheap
+        import numpy as np
+
+        cursor = self.conn.execute(
+            "SELECT seq, x, y, z FROM scan_points WHERE scan_id = ? AND seq > ? ORDER BY seq",
+            (scan_id, after_seq)
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            chunk = np.asarray(rows, dtype=np.float64)
+            yield int(chunk[-1, 0]), chunk[:, 1:]
+
+    def load_points(self, scan_id):
+        """
+        Function to load a whole scan
+        Input: scan_id
+        Output: N x 3 float64 array
+        """
+        import numpy as np
+
+        chunks = [points for _, points in self.iter_points(scan_id)]
+        return np.concatenate(chunks) if chunks else np.zeros((0, 3))
+
+    def _index_rows(self, scan_id, seqs, points):
+        """
+        Function to grow the index blocks covering newly stored points
+        Input: scan_id, seqs (ascending seq per point), points (N x 3)
+        Output: Block boxes widened or added, inside the caller's transaction
+        """
+        import numpy as np
+
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        blocks = np.asarray(seqs, dtype=np.int64) // INDEX_BLOCK
+        starts = np.flatnonzero(np.diff(blocks, prepend=-1))
+        mins = np.minimum.reduceat(points, starts)
+        maxs = np.maximum.reduceat(points, starts)
+
+        for block, low, high in zip(blocks[starts].tolist(), mins.tolist(), maxs.tolist()):
+            key = scan_id * INDEX_KEYS + block
+            # Only a block left part filled by the previous insert exists already
+            old = self.conn.execute(
+                "SELECT min_x, max_x, min_y, max_y, min_z, max_z FROM scan_index WHERE id = ?", (key,)
+            ).fetchone()
+            if old:
+                low = [min(low[i], old[2 * i]) for i in range(3)]
+                high = [max(high[i], old[2 * i + 1]) for i in range(3)]
+            self.conn.execute(
+                "INSERT OR REPLACE INTO scan_index VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, scan_id, scan_id, low[0], high[0], low[1], high[1], low[2], high[2])
+            )
+
+    def _clear_index(self, scan_id):
+        if self.indexed:
+            self.conn.execute(
+                "DELETE FROM scan_index WHERE id IN "
+                "(SELECT id FROM scan_index WHERE min_scan <= ? AND max_scan >= ?)",
+                (scan_id, scan_id)
+            )
+
+    def reindex_scan(self, scan_id, chunk_size=65536):
+        """
+        Function to rebuild the spatial index of one scan
+        Input: scan_id, chunk_size
+        Output: Index entries of the scan replaced from scan_points
+        """
+        import numpy as np
+
+        if not self.indexed:
+            return
+        with self.conn:
+            self._clear_index(scan_id)
+            cursor = self.conn.execute(
+                "SELECT seq, x, y, z FROM scan_points WHERE scan_id = ? ORDER BY seq", (scan_id,)
+            )
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                chunk = np.asarray(rows, dtype=np.float64)
+                self._index_rows(scan_id, chunk[:, 0].astype(np.int64), chunk[:, 1:])
+
+    def _seq_ranges(self, scan_id, mins, maxs):
+        """
+        Function to find the seq ranges whose blocks overlap a box
+        Input: scan_id, mins and maxs (box corners)
+        Output: List of (first seq, last seq), adjacent blocks merged
+        """
+        blocks = sorted(key % INDEX_KEYS for (key,) in self.conn.execute(
+            """
+            SELECT id FROM scan_index
+            WHERE min_scan <= ? AND max_scan >= ?
+              AND min_x <= ? AND max_x >= ? AND min_y <= ? AND max_y >= ? AND min_z <= ? AND max_z >= ?
+            """,
+            (scan_id, scan_id, maxs[0], mins[0], maxs[1], mins[1], maxs[2], mins[2])
+        ))
+        ranges = []
+        for block in blocks:
+            if ranges and ranges[-1][1] == block * INDEX_BLOCK - 1:
+                ranges[-1][1] = (block + 1) * INDEX_BLOCK - 1
+            else:
+                ranges.append([block * INDEX_BLOCK, (block + 1) * INDEX_BLOCK - 1])
+        return ranges
+
+    def iter_box(self, scan_id, mins, maxs, chunk_size=65536):
+        """
+        Function to read the points of a scan inside a box
+        Input: scan_id, mins and maxs (box corners, inclusive), chunk_size
+        Output: Yields N x 3 float64 arrays in seq order
+
+        With the index only the blocks overlapping the box are read,
+        otherwise the whole scan is filtered.
+        """
+        import numpy as np
+
+        mins = [float(value) for value in mins]
+        maxs = [float(value) for value in maxs]
+        ranges = self._seq_ranges(scan_id, mins, maxs) if self.indexed else [(0, 2 ** 62)]
+        for first, last in ranges:
+            cursor = self.conn.execute(
+                """
+                SELECT x, y, z FROM scan_points
+                WHERE scan_id = ? AND seq BETWEEN ? AND ?
+                  AND x BETWEEN ? AND ? AND y BETWEEN ? AND ? AND z BETWEEN ? AND ?
+                ORDER BY seq
+                """,
+                (scan_id, first, last, mins[0], maxs[0], mins[1], maxs[1], mins[2], maxs[2])
+            )
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield np.asarray(rows, dtype=np.float64)
+
+    def query_box(self, scan_id, mins, maxs):
+        """
+        Function to load the points of a scan inside a box
+        Input: scan_id, mins and maxs (box corners, inclusive)
+        Output: N x 3 float64 array
+        """
+        import numpy as np
+
+        chunks = list(self.iter_box(scan_id, mins, maxs))
+        return np.concatenate(chunks) if chunks else np.zeros((0, 3))
+
+    def scan_bounds(self, scan_id):
+        """
+        Function to get the bounding box of a scan
+        Input: scan_id
+        Output: (mins, maxs) arrays, None for an empty scan. From the index
+                the box may be slightly larger than the points.
+        """
+        import numpy as np
+
+        if self.indexed:
+            row = self.conn.execute(
+                """
+                SELECT MIN(min_x), MIN(min_y), MIN(min_z), MAX(max_x), MAX(max_y), MAX(max_z)
+                FROM scan_index WHERE min_scan <= ? AND max_scan >= ?
+                """, (scan_id, scan_id)
+            ).fetchone()
+        else:
+            row = self.conn.execute(
+                "SELECT MIN(x), MIN(y), MIN(z), MAX(x), MAX(y), MAX(z) FROM scan_points WHERE scan_id = ?",
+                (scan_id,)
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return np.array(row[:3], dtype=np.float64), np.array(row[3:], dtype=np.float64)
+
+    def nearest(self, scan_id, point, k=1, radius=1.0):
+        """
+        Function to find the stored points closest to a position
+        Input: scan_id, point (x, y, z), k (how many), radius (first search
+               half width in mm, doubled until the box holds k points)
+        Output: (M x 3 points, M distances) nearest first, M = min(k, points in scan)
+        """
+        import numpy as np
+
+        point = np.asarray(point, dtype=np.float64).reshape(3)
+        k = max(1, int(k))
+        radius = max(float(radius), 1e-6)
+        bounds = None
+        while True:
+            found = self.query_box(scan_id, point - radius, point + radius)
+            distances = np.sqrt(((found - point) ** 2).sum(axis=1))
+            if len(found) >= k:
+                order = np.argsort(distances, kind="stable")[:k]
+                if distances[order[-1]] <= radius:
+                    return found[order], distances[order]
+                # Points nearer than the k-th so far may sit in the corners
+                # left out, one more box that holds its sphere settles it
+                radius = float(distances[order[-1]])
+                continue
+
+            if bounds is None:
+                bounds = self.scan_bounds(scan_id)
+                if bounds is None:
+                    return np.zeros((0, 3)), np.zeros(0)
+            if np.all(point - radius <= bounds[0]) and np.all(point + radius >= bounds[1]):
+                # The box covers the whole scan, fewer than k points exist
+                order = np.argsort(distances, kind="stable")
+                return found[order], distances[order]
+            radius *= 2.0
+
+    def close(self):
+        """
+        Function to close the connection
+        Input: None
+        Output: Connection closed
+        """
+        self.conn.close()
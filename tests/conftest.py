@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Modules live at the repository root, Qt never needs a display here
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
@@ -0,0 +1,51 @@
+import numpy as np
+
+import mesh
+from exporter import MeshExporter
+from store import ScanStore
+
+
+def cylinder_scan(db_path, rings=6, steps=200, radius=50.0):
+    store = ScanStore(db_path)
+    store.create_schema()
+    scan_id = store.create_scan()
+    angles = np.linspace(0, 2 * np.pi, steps, endpoint=False)
+    rows = [(radius * np.cos(a), radius * np.sin(a), float(ring), 0.0)
+            for ring in range(rings) for a in angles]
+    store.insert_points(scan_id, 0, rows)
+    store.close()
+    return scan_id
+
+
+def run_exporter(exporter):
+    errors, done, stopped = [], [], []
+    exporter.error_text.connect(errors.append)
+    exporter.finished.connect(done.append)
+    exporter.stopped.connect(lambda: stopped.append(True))
+    exporter.run()
+    return errors, done, stopped
+
+
+def test_mesh_export_in_spawned_workers(tmp_path):
+    db_path = str(tmp_path / "scan.db")
+    scan_id = cylinder_scan(db_path)
+    filename = str(tmp_path / "scan.stl")
+
+    errors, done, stopped = run_exporter(MeshExporter(db_path, scan_id, filename, segments=36, workers=2))
+    assert errors == []
+    assert done == [filename]
+    assert stopped == [True]
+
+
+def test_mesh_export_reports_any_error_and_stops(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "scan.db")
+    scan_id = cylinder_scan(db_path)
+
+    def broken(*args):
+        raise RuntimeError("mesh failed")
+    monkeypatch.setattr(mesh, "grid_mesh", broken)
+
+    errors, done, stopped = run_exporter(MeshExporter(db_path, scan_id, str(tmp_path / "scan.stl"), segments=36))
+    assert errors == ["Export Error: mesh failed"]
+    assert done == []
+    assert stopped == [True]
@@ -0,0 +1,31 @@
+import numpy as np
+
+from filters import RollingMedian
+
+
+def ring(count, radius, z, jitter=0.0, seed=0):
+    angle = np.linspace(0, 2 * np.pi, count, endpoint=False)
+    heights = z + np.random.default_rng(seed).uniform(-jitter, jitter, count)
+    return np.column_stack((radius * np.cos(angle), radius * np.sin(angle), heights))
+
+
+def test_rolling_median_rejects_spikes_on_a_jittered_ring():
+    # Calibrated heights are never exactly equal within a ring
+    points = ring(40, 80.0, 10.0, jitter=0.01)
+    spikes = [10, 25]
+    points[spikes, :2] *= 2.0
+
+    keep = RollingMedian(window=9, threshold=25.0)(points)
+
+    assert not keep[spikes].any()
+    assert keep.sum() == len(points) - len(spikes)
+
+
+def test_rolling_median_restarts_on_the_next_ring():
+    first = ring(20, 80.0, 10.0, jitter=0.01)
+    # Next ring is much wider, still kept as its window only holds its own readings
+    second = ring(20, 150.0, 11.0, jitter=0.01, seed=1)
+
+    keep = RollingMedian(window=9, threshold=25.0)(np.concatenate((first, second)))
+
+    assert keep.all()
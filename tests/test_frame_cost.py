@@ -0,0 +1,87 @@
+import configparser
+import os
+import time
+
+import numpy as np
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+from grapher import DataGrapher
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+config = configparser.ConfigParser()
+config.read(os.path.join(ROOT, "Config", "config.ini"))
+
+# Fixed size batches, a frame's cost is timed over SAMPLES of them at each mark
+BATCH = 2048
+SAMPLES = 5
+EARLY, LATE = 100000, 1000000
+
+
+def scan_points(count, steps_per_rev=200, radius=80.0, ring_height=0.5):
+    # Rings of a noisy cylinder climbing in z, like a real scan
+    index = np.arange(count)
+    angle = (index % steps_per_rev) * (2 * np.pi / steps_per_rev)
+    radii = radius + np.random.default_rng(1).normal(0.0, 0.5, count)
+    return np.column_stack((
+        radii * np.cos(angle), radii * np.sin(angle), (index // steps_per_rev) * ring_height
+    )).astype(np.float32)
+
+
+def frame_drawer(backend):
+    """ Draw one published frame the way the backend does, blocking until done """
+    if backend == "matplotlib":
+        from viewer import MatplotlibViewer
+        viewer = MatplotlibViewer()
+
+        def draw(points, mins, maxs):
+            viewer.set_points(points, mins, maxs)
+            viewer.canvas.draw()
+        return draw, lambda: None
+
+    from render import RENDERERS
+    renderer_name = {"agg": "agg", "raster": "splat"}.get(backend)
+    if renderer_name is None:
+        pytest.skip(f"{backend} draws on the GPU, nothing to time here")
+    renderer = RENDERERS[renderer_name]()
+    return (lambda points, mins, maxs: renderer.render(points, mins, maxs, 640, 480, 0.6, 0.4),
+            getattr(renderer, "close", lambda: None))
+
+
+@pytest.mark.parametrize("backend", sorted({config.get("Display", "backend", fallback="matplotlib"), "matplotlib"}))
+def test_frame_cost_stays_flat_past_a_million_points(backend):
+    app = QApplication.instance() or QApplication([])  # noqa: F841
+    draw, close = frame_drawer(backend)
+
+    grapher = DataGrapher(
+        ":memory:", 0,
+        point_budget=config.getint("Display", "point_budget", fallback=100000),
+        voxel_size=config.getfloat("Display", "voxel_size", fallback=1.0)
+    )
+    grapher.running = True
+    frames = []
+    grapher.pointsReady.connect(lambda *frame: frames.append(frame))
+
+    points = scan_points(LATE + SAMPLES * BATCH)
+    costs = {EARLY: [], LATE: []}
+    try:
+        # Start-up (figure, helper process) is not part of a frame
+        draw(points[:BATCH], points[:BATCH].min(axis=0), points[:BATCH].max(axis=0))
+        for start in range(0, len(points), BATCH):
+            grapher.data_queue.put(points[start:start + BATCH])
+            mark = next((mark for mark in costs if mark <= start < mark + SAMPLES * BATCH), None)
+            if mark is None:
+                grapher.updateModel([])
+                continue
+
+            # One frame: publish the batch, then draw what was published
+            begin = time.perf_counter()
+            grapher.updateModel([])
+            draw(*frames[-1])
+            costs[mark].append(time.perf_counter() - begin)
+    finally:
+        close()
+
+    early, late = np.median(costs[EARLY]), np.median(costs[LATE])
+    print(f"{backend}: {early * 1000:.1f} ms per frame at 100k points, {late * 1000:.1f} ms at 1M")
+    assert late <= 3.0 * early
@@ -0,0 +1,45 @@
+import errno
+import json
+import queue
+import time
+
+import headless
+from test_worker import FakePort
+
+
+class BrokenPort(FakePort):
+    """ Hung up port where even the stop command fails """
+
+    def write(self, data):
+        raise OSError(errno.EIO, "Input/output error")
+
+
+def test_reader_ends_stream_on_oserror(monkeypatch):
+    port = BrokenPort(hangup_after=0)
+    monkeypatch.setattr(headless.serial, "serial_for_url", lambda *args, **kwargs: port)
+    batches = queue.Queue()
+    reader = headless.SerialReader("fake", 115200, batches, settle=0.0)
+
+    reader.run()
+
+    assert batches.get(timeout=1.0) is None
+    assert reader.error and "Input/output error" in reader.error
+    assert not port.is_open
+
+
+def test_capture_without_metrics_interval_sleeps(tmp_path, capsys, monkeypatch):
+    # Leave pytest's own Ctrl-C handling in place
+    monkeypatch.setattr(headless.signal, "signal", lambda *args: None)
+    # Nothing arrives on loop://, the main loop has only the duration to wait for
+    wall, cpu = time.monotonic(), time.process_time()
+    code = headless.main([
+        "capture", "--port", "loop://", "--out", str(tmp_path / "scan.csv"),
+        "--duration", "1", "--interval", "0", "--settle", "0", "--config", str(tmp_path / "none.ini"),
+    ])
+    wall, cpu = time.monotonic() - wall, time.process_time() - cpu
+
+    assert code == 0
+    assert 1.0 <= wall < 3.0
+    assert cpu < 0.5
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["event"] for line in lines] == ["done"]
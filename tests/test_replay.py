@@ -0,0 +1,56 @@
+import sqlite3
+
+import numpy as np
+
+from replay import Recording
+from store import ScanStore
+
+
+def legacy_scan(db_path, count):
+    # Table the app wrote before scans existed, no usable times
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE scan_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            x REAL,
+            y REAL,
+            z REAL,
+            timestamp TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO scan_data (x, y, z, timestamp) VALUES (?, ?, ?, ?)",
+        ((float(i), 2.0 * i, 0.5 * i, "2025-03-01 12:00:00") for i in range(count))
+    )
+    # Reading the old app stored without a position, dropped by the migration
+    conn.execute("INSERT INTO scan_data (x, y, z, timestamp) VALUES (1.0, NULL, 2.0, '2025-03-01 12:00:00')")
+    conn.commit()
+    conn.close()
+
+    store = ScanStore(db_path)
+    store.create_schema()
+    scan_id = store.latest_scan()
+    store.close()
+    return scan_id
+
+
+def test_migrated_scan_replays_at_synthetic_rate(tmp_path):
+    db_path = str(tmp_path / "legacy.db")
+    scan_id = legacy_scan(db_path, 1000)
+
+    store = ScanStore(db_path)
+    point_count = store.conn.execute("SELECT point_count FROM scans WHERE id = ?", (scan_id,)).fetchone()[0]
+    assert point_count == store.next_seq(scan_id) == 1000
+    store.close()
+
+    recording = Recording.from_store(db_path, scan_id, rate=500.0)
+    assert len(recording) == 1000
+    assert np.isfinite(recording.times).all()
+    assert recording.duration == 999 / 500.0
+
+    # Batches fill up to the count or the interval, not one row each
+    ranges = recording.batches(batch_count=256, batch_interval=0.05)
+    assert sum(end - start for start, end in ranges) == 1000
+    # 0.05 s at 500 rows/s is about 25 rows a batch
+    assert all(24 <= end - start <= 26 for start, end in ranges[:-1])
+    assert 38 <= len(ranges) <= 42
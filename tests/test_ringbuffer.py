@@ -0,0 +1,81 @@
+import threading
+import time
+
+import numpy as np
+
+from ringbuffer import RingBuffer
+
+
+def test_block_write_times_out_and_drops():
+    ring = RingBuffer(4, columns=1)
+    stalled = ring.subscribe("capture", "block")
+    ring.write(np.arange(4.0))
+
+    start = time.monotonic()
+    ring.write(np.arange(2.0), timeout=0.1)
+
+    assert time.monotonic() - start < 1.0
+    assert stalled.dropped == 2
+    assert stalled.read().ravel().tolist() == [2.0, 3.0, 0.0, 1.0]
+
+
+def test_close_releases_blocked_writer():
+    ring = RingBuffer(4, columns=1)
+    ring.subscribe("storage", "block")
+    ring.write(np.arange(4.0))
+
+    writer = threading.Thread(target=ring.write, args=(np.arange(2.0),))
+    writer.start()
+    time.sleep(0.05)
+    assert writer.is_alive()
+
+    ring.close()
+    writer.join(1.0)
+    assert not writer.is_alive()
+
+
+def test_detached_cursor_does_not_block():
+    ring = RingBuffer(4, columns=1)
+    cursor = ring.subscribe("capture", "block")
+    ring.write(np.arange(4.0))
+    cursor.detach()
+
+    ring.write(np.arange(4.0), timeout=None)
+    assert ring.written == 8
+
+
+def test_detached_cursor_with_unread_rows_has_none_available():
+    ring = RingBuffer(8, columns=4)
+    cursor = ring.subscribe("storage", "block")
+    ring.write(np.ones((5, 4)))
+    assert cursor.available == 5
+
+    cursor.detach()
+    assert cursor.available == 0
+    assert len(cursor.read()) == 0
+
+
+def test_writer_stops_after_its_cursor_is_detached(tmp_path):
+    from ingest import DataWriter
+    from store import ScanStore
+
+    db_path = str(tmp_path / "scan.db")
+    store = ScanStore(db_path)
+    store.create_schema()
+    scan_id = store.create_scan()
+    store.close()
+
+    # Cleanup gave up waiting and detached the cursor with rows still unread
+    ring = RingBuffer(8, columns=4)
+    cursor = ring.subscribe("storage", "block")
+    ring.write(np.ones((5, 4)))
+    cursor.detach()
+
+    writer = DataWriter(db_path, scan_id, flush_interval=0.05, cursor=cursor)
+    thread = threading.Thread(target=writer.run)
+    thread.start()
+    while not writer.running:
+        time.sleep(0.01)
+    writer.stop()
+    thread.join(2.0)
+    assert not thread.is_alive()
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+from PyQt5.QtWidgets import QApplication, QInputDialog, QMessageBox
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+app = QApplication.instance() or QApplication([])
+
+import scanner  # noqa: E402, loads the form from the repo's Assets
+from store import ScanStore  # noqa: E402
+
+
+@pytest.fixture
+def window(tmp_path, monkeypatch):
+    # Fresh Data folder, no config so every setting falls back
+    monkeypatch.chdir(tmp_path)
+    os.mkdir("Data")
+    store = ScanStore(os.path.join("Data", "scan_data.db"))
+    store.create_schema()
+    for count in (300, 500):
+        scan_id = store.create_scan(f"{count} points")
+        store.insert_points(scan_id, 0, [(float(i % 20), float(i // 20), float(i % 7), 0.0) for i in range(count)])
+    store.close()
+
+    window = scanner.MainWindow()
+    yield window
+    window.close()
+    # The port scanner's quit is queued to this thread, run it before the window goes
+    while not window.port_thread.wait(10):
+        app.processEvents()
+
+
+def menu_action(window, text):
+    menu = next(action.menu() for action in window.menuBar().actions() if action.text() == "&Scans")
+    return next(action for action in menu.actions() if action.text() == text)
+
+
+def test_open_and_drop_from_the_scans_menu(window, monkeypatch):
+    picked = []
+
+    def get_item(parent, title, label, items, current, editable):
+        picked.append(title)
+        return next(item for item in items if "300 points" in item), True
+    monkeypatch.setattr(QInputDialog, "getItem", get_item)
+    monkeypatch.setattr(QMessageBox, "question", lambda *args: QMessageBox.Yes)
+
+    menu_action(window, "&Open Scan...").trigger()
+    assert picked == ["Open Scan"]
+    assert window.scan_id == 1
+    assert window.live_frame is not None and len(window.live_frame[0]) == 300
+
+    menu_action(window, "&Drop Scan...").trigger()
+    assert [scan[0] for scan in window.store.list_scans()] == [2]
+    assert window.scan_id is None
+
+
+def test_cancelled_pick_does_nothing(window, monkeypatch):
+    monkeypatch.setattr(QInputDialog, "getItem", lambda *args: ("", False))
+    menu_action(window, "&Drop Scan...").trigger()
+    assert len(window.store.list_scans()) == 2
+
+
+def test_render_errors_reach_the_window(window):
+    window.config_file.read_string("[Display]\nbackend = raster\n")
+    window._ensure_viewer()
+
+    window.viewer.frames.error_text.emit("Render Error: out of memory")
+    assert window.serialLabel.text() == "Render Error: out of memory"
@@ -0,0 +1,22 @@
+from store import ScanStore
+
+
+def test_insert_points_counts_and_indexes_new_rows_only(tmp_path):
+    store = ScanStore(str(tmp_path / "scan.db"))
+    store.create_schema()
+    scan_id = store.create_scan()
+
+    assert store.insert_points(scan_id, 0, [(float(i), 0.0, 0.0, 0.0) for i in range(10)]) == 10
+    # Replayed batch overlapping the stored rows, e.g. after a resume
+    assert store.insert_points(scan_id, 5, [(100.0 + i, 0.0, 0.0, 0.0) for i in range(10)]) == 5
+    assert store.insert_points(scan_id, 0, [(0.0, 0.0, 0.0, 0.0)]) == 0
+
+    point_count = store.conn.execute("SELECT point_count FROM scans WHERE id = ?", (scan_id,)).fetchone()[0]
+    assert point_count == store.next_seq(scan_id) == 15
+
+    # Skipped rows never widened the index, nothing is found where only they were
+    assert len(store.query_box(scan_id, (100.0, -1.0, -1.0), (104.5, 1.0, 1.0))) == 0
+    assert len(store.query_box(scan_id, (104.5, -1.0, -1.0), (110.0, 1.0, 1.0))) == 5
+    mins, maxs = store.scan_bounds(scan_id)
+    assert mins[0] == 0.0 and maxs[0] == 109.0
+    store.close()
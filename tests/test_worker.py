@@ -0,0 +1,69 @@
+import errno
+
+import worker as worker_module
+from worker import Worker
+
+
+class FakePort:
+    """ Stands in for a serial port, in_waiting fails like a USB / pty hangup """
+
+    def __init__(self, hangup_after=None, on_read=None):
+        self.is_open = True
+        self.name = "fake"
+        self.timeout = 0.05
+        self.hangup_after = hangup_after
+        self.on_read = on_read
+        self.polls = 0
+        self.written = b""
+
+    @property
+    def in_waiting(self):
+        self.polls += 1
+        if self.hangup_after is not None and self.polls > self.hangup_after:
+            raise OSError(errno.EIO, "Input/output error")
+        return 0
+
+    def read(self, size=1):
+        if self.on_read:
+            self.on_read()
+        return b""
+
+    def write(self, data):
+        self.written += data
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+
+def test_in_waiting_oserror_marks_port_unplugged():
+    worker = Worker("fake", 115200, 1)
+    worker.open_port = FakePort(hangup_after=0)
+    worker.running = True
+    errors = []
+    worker.error_text.connect(errors.append)
+
+    worker._run_data_loop()
+
+    assert worker.unplugged == 1
+    assert any("Serial communication error" in text for text in errors)
+
+
+def test_in_waiting_oserror_reconnects(monkeypatch):
+    worker = Worker("fake", 115200, 1, settle=0.0, backoff=0.05)
+    ports = [FakePort(hangup_after=3), FakePort(on_read=worker.stop)]
+    monkeypatch.setattr(worker_module.serial, "serial_for_url", lambda *args, **kwargs: ports.pop(0))
+
+    attempts, reconnected, stopped = [], [], []
+    worker.reconnecting.connect(attempts.append)
+    worker.reconnected.connect(lambda: reconnected.append(True))
+    worker.stopped.connect(lambda: stopped.append(True))
+
+    worker.run()
+
+    assert attempts == [1]
+    assert reconnected == [True]
+    assert stopped == [True]
+    assert not ports
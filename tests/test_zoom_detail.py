@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+from grapher import DataGrapher
+from store import ScanStore
+from viewer import RasterViewer
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def scan(tmp_path):
+    # Dense solid block, far more points than the preview budget
+    count = 200000
+    points = np.random.default_rng(7).uniform((-80, -80, 0), (80, 80, 50), (count, 3))
+    db_path = str(tmp_path / "scan.db")
+    store = ScanStore(db_path)
+    store.create_schema()
+    scan_id = store.create_scan()
+    for start in range(0, count, 5000):
+        store.insert_points(scan_id, start, [(x, y, z, 0.0) for x, y, z in points[start:start + 5000].tolist()])
+    store.close()
+    return db_path, scan_id, points
+
+
+def test_zoom_loads_region_at_full_detail(app, scan):
+    db_path, scan_id, points = scan
+    grapher = DataGrapher(db_path, scan_id, point_budget=5000, voxel_size=1.0)
+    frames, regions = [], []
+    grapher.pointsReady.connect(lambda *frame: frames.append(frame))
+    grapher.regionReady.connect(lambda *region: regions.append(region))
+    grapher.run()
+    preview, mins, maxs = frames[-1]
+    preview = np.array(preview)
+
+    viewer = RasterViewer()
+    try:
+        requested = []
+        viewer.region_callback = lambda *box: requested.append(box)
+        viewer.set_points(preview, mins, maxs)
+        viewer.zoom_by(8)
+        box = requested[-1]
+    finally:
+        viewer.close()
+
+    # The zoomed-in box is the centre of the cloud, much smaller than it
+    assert np.max(np.asarray(box[1]) - np.asarray(box[0])) < np.max(np.asarray(maxs) - np.asarray(mins)) / 5
+
+    grapher.loadRegion(*box)
+    region = regions[-1][0]
+    inside = np.all((points >= box[0]) & (points <= box[1]), axis=1)
+    preview_inside = np.all((preview >= box[0]) & (preview <= box[1]), axis=1)
+
+    # Every stored point in the box comes back, not just the preview's share
+    assert len(region) == inside.sum() > preview_inside.sum()
+    grapher.stop()
+
+
+def test_zoom_out_returns_to_live_view(app):
+    viewer = RasterViewer()
+    try:
+        requested = []
+        viewer.region_callback = lambda *box: requested.append(box)
+        viewer.set_points(np.zeros((1, 3), dtype=np.float32), np.zeros(3), np.ones(3))
+        viewer.zoom_by(2)
+        viewer.zoom_by(-5)
+    finally:
+        viewer.close()
+    assert requested[-1] == (None, None)
+    assert viewer.zoom == 1.0
@@ -0,0 +1,73 @@
+import hashlib
+import importlib.util
+import io
+import os
+import re
+
+
+def _read_stamp(module_path):
+    """
+    Function to read the source hash line of a compiled form
+    Input: module_path (compiled .py path)
+    Output: First line of the file or None if it does not exist
+    """
+    try:
+        with open(module_path, "r", encoding="utf-8") as file:
+            return file.readline()
+    except OSError:
+        return None
+
+
+def _compile(ui_path, module_path, stamp):
+    """
+    Function to compile a .ui file to Python
+    Input: ui_path, module_path (output), stamp (hash line to put on top)
+    Output: Compiled module written atomically
+    """
+    import PyQt5.uic
+
+    source = io.StringIO()
+    with open(ui_path, "r", encoding="utf-8") as ui_file:
+        PyQt5.uic.compileUi(ui_file, source)
+
+    os.makedirs(os.path.dirname(module_path), exist_ok=True)
+    temp_path = module_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        file.write(stamp)
+        file.write(source.getvalue())
+    os.replace(temp_path, module_path)
+
+
+def load_form_class(ui_path, cache_dir=None):
+    """
+    Function to load a Qt Designer form through a cached compiled module
+    Input: ui_path (.ui file), cache_dir (defaults to __uicache__ next to it)
+    Output: (form_class, base_class) like PyQt5.uic.loadUiType
+
+    The compiled module is rebuilt only when the .ui file's hash changes.
+    If the cache cannot be written it falls back to loadUiType.
+    """
+    with open(ui_path, "rb") as file:
+        ui_bytes = file.read()
+    stamp = f"# source-sha1: {hashlib.sha1(ui_bytes).hexdigest()}\n"
+
+    cache_dir = cache_dir or os.path.join(os.path.dirname(ui_path), "__uicache__")
+    module_name = os.path.splitext(os.path.basename(ui_path))[0] + "_ui"
+    module_path = os.path.join(cache_dir, module_name + ".py")
+
+    if _read_stamp(module_path) != stamp:
+        try:
+            _compile(ui_path, module_path, stamp)
+        except OSError:
+            import PyQt5.uic
+            return PyQt5.uic.loadUiType(ui_path)
+
+    spec = importlib.util.spec_from_file_location(module_name, module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    form_class = next(getattr(module, name) for name in dir(module) if name.startswith("Ui_"))
+
+    # Base class is the top level widget class named in the form
+    from PyQt5 import QtWidgets
+    base_name = re.search(rb'<widget class="(\w+)"', ui_bytes).group(1).decode("ascii")
+    return form_class, getattr(QtWidgets, base_name)
@@ -0,0 +1,249 @@
+from PyQt5.QtCore import QThread
+import numpy as np
+
+# Mouse wheel zoom, per notch and at most. Zoom 1 shows the whole cloud.
+ZOOM_STEP = 1.25
+MAX_ZOOM = 1000.0
+
+
+def zoom_box(mins, maxs, zoom):
+    """
+    Function to get the box a zoomed-in view shows
+    Input: mins and maxs (bounds of the whole cloud), zoom (1 shows all of it)
+    Output: (mins, maxs) of a cube around the cloud's centre
+    """
+    mins = np.asarray(mins, dtype=np.float64)
+    maxs = np.asarray(maxs, dtype=np.float64)
+    center = (mins + maxs) / 2.0
+    half = max(float(np.max(maxs - mins)) / 2.0, 1e-6) / zoom
+    return center - half, center + half
+
+
+class ZoomRegion:
+    """ Wheel zoom shared by the viewers, zooming in asks for the shown box at full detail """
+
+    def _init_zoom(self):
+        self.zoom = 1.0
+        # Whole cloud bounds, taken from frames shown at zoom 1
+        self.bounds = None
+        # Called with (mins, maxs) of the shown box when zooming in, and
+        # (None, None) when back at the whole cloud, e.g. MainWindow.requestDetail
+        self.region_callback = None
+
+    def _shown_bounds(self, mins, maxs):
+        """
+        Function to pick the bounds to draw a frame with
+        Input: mins and maxs that came with the frame
+        Output: The frame's own bounds at zoom 1, else the zoomed box
+        """
+        if self.zoom <= 1.0:
+            self.bounds = (np.array(mins, dtype=np.float64), np.array(maxs, dtype=np.float64))
+            return mins, maxs
+        return zoom_box(*self.bounds, self.zoom)
+
+    def zoom_by(self, steps):
+        """
+        Function to zoom in or out around the cloud's centre
+        Input: steps (wheel notches, positive zooms in)
+        Output: Current points redrawn with the new box, region_callback told
+        """
+        if self.bounds is None:
+            return
+        zoom = min(max(self.zoom * ZOOM_STEP ** steps, 1.0), MAX_ZOOM)
+        if zoom == self.zoom:
+            return
+        self.zoom = zoom
+
+        box = zoom_box(*self.bounds, zoom) if zoom > 1.0 else self.bounds
+        self._show_box(*box)
+        if self.region_callback is not None:
+            self.region_callback(*(box if zoom > 1.0 else (None, None)))
+
+    def _show_box(self, mins, maxs):
+        """ Redraw the current points with new bounds, per backend """
+
+
+class MatplotlibViewer(ZoomRegion):
+    """ 3D scatter viewer built on matplotlib mplot3d (fallback backend) """
+    name = "matplotlib"
+
+    def __init__(self, parent=None):
+        import matplotlib
+        matplotlib.use('Qt5Agg')  # Use Qt5 backend for matplotlib
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+
+        # Setup the figure and axis for model
+        self.fig = Figure()
+        self.ax = self.fig.add_subplot(projection='3d')
+
+        # Initial plot data for 0 point
+        self.scatter = self.ax.scatter(0, 0, 0, color='blue', marker='o', s=10)
+        self.ax.set_aspect('equal')
+        self.placeholder = True
+
+        # Create the canvas to render on
+        self.canvas = FigureCanvas(self.fig)
+        self.widget = self.canvas
+
+        self._init_zoom()
+        self.canvas.mpl_connect('scroll_event', lambda event: self.zoom_by(event.step))
+
+    def set_points(self, points, mins, maxs):
+        """
+        Function to show a new point cloud
+        Input: points (N x 3 array), mins and maxs (per axis bounds)
+        Output: Scatter offsets and axis limits updated in place
+        """
+        xs, ys, zs = points[:, 0], points[:, 1], points[:, 2]
+
+        if self.placeholder:
+            # First frame drops the placeholder point and creates the artist
+            self.ax.clear()
+            self.scatter = self.ax.scatter(xs, ys, zs, color='blue')
+            self.placeholder = False
+        else:
+            # Swap the offsets on the existing artist, no clear or rebuild
+            self.scatter._offsets3d = (xs, ys, zs)
+
+        self._show_box(*self._shown_bounds(mins, maxs))
+
+    def _show_box(self, mins, maxs):
+        self.ax.set_xlim3d(mins[0], maxs[0])
+        self.ax.set_ylim3d(mins[1], maxs[1])
+        self.ax.set_zlim3d(mins[2], maxs[2])
+
+        # Update the plot
+        self.canvas.draw_idle()
+
+
+class PyQtGraphViewer(ZoomRegion):
+    """ 3D scatter viewer built on pyqtgraph's OpenGL scatter item """
+    name = "pyqtgraph"
+
+    def __init__(self, parent=None):
+        import pyqtgraph.opengl as gl
+
+        viewer = self
+
+        class ZoomView(gl.GLViewWidget):
+            # The camera zooms itself, the viewer only tracks the box for detail
+            def wheelEvent(self, event):
+                super().wheelEvent(event)
+                viewer.zoom_by(event.angleDelta().y() / 120.0)
+
+        self._init_zoom()
+        self.widget = ZoomView(parent)
+        self.scatter = gl.GLScatterPlotItem(
+            pos=np.zeros((1, 3), dtype=np.float32),
+            color=(0.2, 0.4, 1.0, 1.0), size=2, pxMode=True
+        )
+        self.widget.addItem(self.scatter)
+        self.framed = False
+
+    def set_points(self, points, mins, maxs):
+        """
+        Function to show a new point cloud
+        Input: points (N x 3 array), mins and maxs (per axis bounds)
+        Output: Vertex data uploaded to the scatter item
+        """
+        self.scatter.setData(pos=points)
+        self._shown_bounds(mins, maxs)
+
+        # Frame the camera on the first data, then leave it to the user
+        if not self.framed:
+            from pyqtgraph import Vector
+            center = (np.asarray(mins) + np.asarray(maxs)) / 2.0
+            extent = float(np.max(np.asarray(maxs) - np.asarray(mins)))
+            self.widget.setCameraPosition(
+                pos=Vector(*center.tolist()), distance=max(extent, 1.0) * 2.0
+            )
+            self.framed = True
+
+
+class OffscreenViewer(ZoomRegion):
+    """ Viewer whose frames are rendered on a background thread """
+    name = None
+    renderer = None
+
+    def __init__(self, parent=None, max_fps=30.0, min_fps=2.0, max_points=200000, metrics=None):
+        from render import FrameRenderer, ImageWidget
+
+        self.widget = ImageWidget(parent)
+        self.frames = FrameRenderer(self.renderer, max_fps, min_fps, max_points=max_points, metrics=metrics)
+        self.thread = QThread()
+        self.frames.moveToThread(self.thread)
+        self.thread.started.connect(self.frames.run)
+
+        # Only finished images come back to the GUI thread
+        self.frames.frameReady.connect(self.widget.setImage)
+        # Render errors, connected by the owner, e.g. to MainWindow.error_handler
+        self.error_text = self.frames.error_text
+        self.widget.sizeChanged.connect(self.frames.sizeChanged)
+        self.widget.viewChanged.connect(self.frames.viewChanged)
+        self.thread.start()
+
+        # Last cloud handed over, redrawn when the zoom changes
+        self.points = np.zeros((0, 3), dtype=np.float32)
+        self._init_zoom()
+        self.widget.zoomed.connect(self.zoom_by)
+
+    def set_points(self, points, mins, maxs):
+        """
+        Function to show a new point cloud
+        Input: points (N x 3 array), mins and maxs (per axis bounds)
+        Output: Cloud queued to the render thread, older pending clouds are skipped
+        """
+        self.points = points
+        self.frames.pointsChanged.emit(points, *self._shown_bounds(mins, maxs))
+
+    def _show_box(self, mins, maxs):
+        self.frames.pointsChanged.emit(self.points, mins, maxs)
+
+    def close(self):
+        """
+        Function to stop the render thread
+        Input: None
+        Output: Thread finished
+        """
+        self.frames.stopRequested.emit()
+        self.thread.quit()
+        self.thread.wait()
+
+
+class RasterViewer(OffscreenViewer):
+    """ GPU-free viewer, NumPy point splatting on the render thread """
+    name = "raster"
+    renderer = "splat"
+
+
+class AggViewer(OffscreenViewer):
+    """ matplotlib look, drawn on an offscreen Agg figure on the render thread """
+    name = "agg"
+    renderer = "agg"
+
+
+# Backends selectable from [Display] backend in config.ini
+BACKENDS = {
+    MatplotlibViewer.name: MatplotlibViewer,
+    PyQtGraphViewer.name: PyQtGraphViewer,
+    RasterViewer.name: RasterViewer,
+    AggViewer.name: AggViewer,
+}
+
+
+def create_viewer(name, parent=None, **options):
+    """
+    Function to build the configured viewer backend
+    Input: name (backend name), parent (placeholder widget), options for the
+           offscreen backends (max_fps, min_fps, max_points, metrics)
+    Output: Viewer instance, matplotlib if the backend is unknown or unavailable
+    """
+    backend = BACKENDS.get(name.strip().lower(), MatplotlibViewer)
+    try:
+        if issubclass(backend, OffscreenViewer):
+            return backend(parent, **options)
+        return backend(parent)
+    except ImportError as e:
+        print(f"Viewer backend '{name}' unavailable ({e}), using matplotlib")
+        return MatplotlibViewer(parent)
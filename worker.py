@@ -1,25 +1,59 @@
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+from PyQt5.QtCore import QObject, Qt, pyqtSignal, pyqtSlot
 import serial
-import re
 import time
+import asyncio
+import threading
+import numpy as np
+
+from protocol import parse_frame, parse_position, FrameReader, DATA
+from calibration import Calibration
+from filters import OverlapFilter
+
+# Longest a blocking read may wait, bounds how quickly a stop is noticed
+READ_TIMEOUT = 0.05
+
+# Serial read strategies selectable from [Communication] transport
+TRANSPORTS = ("blocking", "asyncio")
+
+# Newest readings kept to find the overlap after a reconnect
+RECENT_SIZE = 4096
 
 class Worker(QObject):
     """ Worker thread for running loops """
     # Signal to send distance reading
     distance_reading = pyqtSignal(tuple)
 
+    # Signal to send a window of readings as an N x 3 float64 array
+    distance_batch = pyqtSignal(object)
+
+    # Signal that new rows are in the ring buffer, at most one is queued
+    batch_ready = pyqtSignal()
+
+    # Signal to send RAW readings as an N x 3 array of distance, step, z step
+    raw_batch = pyqtSignal(object)
+
+    # Signal with the filter counters (accepted and rejected per stage)
+    filter_stats = pyqtSignal(object)
+
     # Signal to send messages
     message_received = pyqtSignal(str)
 
     # Any returned errors
     error_text = pyqtSignal([str])
 
+    # Signals about a lost connection, attempt number while retrying
+    reconnecting = pyqtSignal(int)
+    reconnected = pyqtSignal()
+
     # Signals to stop the worker
     stopRequested = pyqtSignal() 
     stopped = pyqtSignal()
 
-    def __init__(self, port_name, baud, timeout, *args, **kwargs):
+    def __init__(self, port_name, baud, timeout, *args, emit_points=False,
+                 batch_count=256, batch_interval=0.05, calibration=None, filters=None,
+                 transport="blocking", reconnect=True, max_reconnects=0, backoff=0.5,
+                 max_backoff=10.0, settle=2.0, resume_points=None, resume_raws=None, metrics=None,
+                 ring=None, ring_timeout=2.0, **kwargs):
         super(Worker, self).__init__()
         self.args = args
         self.kwargs = kwargs
@@ -30,13 +64,76 @@ class Worker(QObject):
         self.timeout = timeout if timeout > 0 else 0.1 # sets a default timeout
         self.open_port = None
 
+        # Reusable receive buffer and frame splitter
+        self.reader = FrameReader()
+
+        # Also emit distance_reading once per point for older consumers
+        self.emit_points = emit_points
+
+        # Batch window, emit when either the count or the age is reached
+        self.batch_count = max(1, int(batch_count))
+        self.batch_interval = max(0.0, float(batch_interval))
+        self.pending_points = []
+        self.pending_raws = []
+        self.batch_started = 0.0
+
+        # Geometry for RAW frames, converted per batch instead of per line
+        self.calibration = calibration or Calibration()
+
+        # Streaming filters run here, so junk never reaches storage or the plot
+        self.filters = filters
+
+        # blocking polls the port with a short timeout, asyncio waits on its fd
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unsupported transport: {transport}")
+        self.transport = transport
+        self.loop = None
+
         # Flags for connection errors
         self.unplugged = 0
 
+        # Reconnect with exponential backoff after a lost connection
+        # (max_reconnects 0 retries until stopped)
+        self.reconnect = reconnect
+        self.max_reconnects = max(0, int(max_reconnects))
+        self.backoff = max(0.05, float(backoff))
+        self.max_backoff = max(self.backoff, float(max_backoff))
+        # Longest wait for the board to report in after the port opens
+        self.settle = max(0.0, float(settle))
+        # Set by stop() so backoff and settle waits end at once
+        self.wake = threading.Event()
+
+        # Readings already stored are dropped when the scan resumes, DATA
+        # points by position and RAW readings by (step, z step)
+        self.overlap = OverlapFilter()
+        self.raw_overlap = OverlapFilter(tolerance=0.5, voxel_size=1.0)
+        self.recent_points = np.zeros((0, 3))
+        self.recent_raws = np.zeros((0, 3))
+        # Last height the firmware reported in a STAT message
+        self.device_z = None
+        # Continuing a stored scan, skip what it already holds
+        if resume_points is not None and len(resume_points):
+            self.overlap.arm(resume_points)
+        if resume_raws is not None and len(resume_raws):
+            self.raw_overlap.arm(self._raw_positions(np.asarray(resume_raws, dtype=np.float64)))
+
+        # Optional metrics.Metrics, None keeps the hot path free of timing
+        self.metrics = metrics
+
+        # With a ringbuffer.RingBuffer, batches go there as x, y, z, t rows
+        # instead of distance_batch, and batch_ready wakes the GUI. The
+        # consumer clears ready_pending before reading so no wake-up is lost.
+        self.ring = ring
+        # Longest wait on a stalled block consumer per write, so a stuck
+        # reader costs it rows instead of hanging the serial thread
+        self.ring_timeout = ring_timeout
+        self.ready_pending = False
+
         # Flag to check if the thread is running
         self.running = False
 
-        self.stopRequested.connect(self.stop)
+        # The read loop never returns to the event loop, so stop directly
+        self.stopRequested.connect(self.stop, Qt.DirectConnection)
 
     @pyqtSlot()
     def run(self):
@@ -47,6 +144,7 @@ class Worker(QObject):
         """
         # Set running Flag to true
         self.running = True
+        self.wake.clear()
 
         # Open the serial port
         if not self._open_serial_port():
@@ -58,12 +156,59 @@ class Worker(QObject):
             self._cleanup_and_stop()
             return
 
-        # Main data reading loop
-        self._run_data_loop()
+        # Main data reading loop, reconnecting while the cable is out
+        while True:
+            self._run_data_loop()
+            if not (self.running and self.reconnect and self.unplugged):
+                break
+            if not self._reconnect():
+                break
 
         # Cleanup
         self._cleanup_and_stop()
 
+    def _reconnect(self):
+        """
+        Reopen the port with exponential backoff after a lost connection
+        Input: Called from run() when the data loop ended on a serial error
+        Output: True once the port is back and the scan was restarted,
+                False if stopped or out of attempts
+        """
+        # Remember where the stored scan ends before the device restarts
+        self.overlap.arm(self.recent_points)
+        self.raw_overlap.arm(self.recent_raws)
+
+        try:
+            self.open_port.close()
+        except Exception:
+            pass
+
+        attempt = 0
+        while self.running:
+            attempt += 1
+            if self.max_reconnects and attempt > self.max_reconnects:
+                self.error_text.emit(f"Connection lost, gave up after {self.max_reconnects} attempts")
+                return False
+
+            delay = min(self.backoff * 2 ** (attempt - 1), self.max_backoff)
+            self.reconnecting.emit(attempt)
+            self.error_text.emit(f"Connection lost, reconnecting in {delay:.1f} s (attempt {attempt})")
+            if self.wake.wait(delay):
+                return False
+
+            self.unplugged = 0
+            if self._open_serial_port() and self._send_start_signal():
+                where = f" above z={self.overlap.resume_z:g}" if self.overlap.armed else ""
+                self.error_text.emit(f"Reconnected, resuming scan{where}")
+                self.reconnected.emit()
+                return True
+            if self.open_port:
+                try:
+                    self.open_port.close()
+                except Exception:
+                    pass
+        return False
+
     def _open_serial_port(self):
         """
         Open serial port with error handling
@@ -71,21 +216,25 @@ class Worker(QObject):
         Output: True if successful, False if failed
         """
         try:
-            self.open_port = serial.Serial(
-                port=self.port_name,
+            # Accepts device names and pyserial URLs (loop://, socket://)
+            self.open_port = serial.serial_for_url(
+                self.port_name,
                 baudrate=self.baudrate,
                 timeout=self.timeout
             )
             
             if self.open_port.is_open:
                 self.error_text.emit(f"Port {self.port_name} opened successfully!")
-                time.sleep(2)  # Allow port to stabilize
+                # Nothing from an earlier connection belongs to this stream
+                self.reader.reset()
+                self._wait_until_ready()
                 return True
             else:
                 self.error_text.emit("Failed to open port")
                 return False
                 
-        except serial.SerialException as e:
+        # A pulled USB cable shows up as a plain OSError (EIO) on Linux
+        except (serial.SerialException, OSError) as e:
             self.error_text.emit(f"Serial port error: {str(e)}")
             self.unplugged = 1
             return False
@@ -93,6 +242,23 @@ class Worker(QObject):
             self.error_text.emit(f"Unexpected error opening port: {str(e)}")
             return False
 
+    def _wait_until_ready(self):
+        """
+        Wait for the board to report in instead of a fixed delay
+        Input: Called from _open_serial_port()
+        Output: Returns on the first complete frame, or after settle seconds
+
+        Opening the port resets an Uno, which prints a STAT line once its
+        setup is done. A board that was not reset is usually already
+        sending, so either way the first frame means it is ready.
+        """
+        self.open_port.timeout = READ_TIMEOUT
+        deadline = time.monotonic() + self.settle
+        while self.running and time.monotonic() < deadline:
+            chunk = self.open_port.read(self.open_port.in_waiting or 1)
+            if chunk and self._handle_chunk(chunk):
+                return
+
     def _send_start_signal(self):
         """
         Send start signal to Arduino with error handling
@@ -109,55 +275,238 @@ class Worker(QObject):
             time.sleep(0.1)  # Give Arduino time to process
             return True
             
-        except serial.SerialException as e:
+        except (serial.SerialException, OSError) as e:
             self.error_text.emit(f"Failed to send start signal: {str(e)}")
             self.unplugged = 1
             return False
 
     def _run_data_loop(self):
         """
-        Main data reading loop with non-blocking reads
+        Main data reading loop with blocking bulk reads
         Input: Called from run() method
         Output: Reads data from the serial port and emits signals
         """
+        if self.transport == "asyncio":
+            if self._run_async_loop():
+                return
+            self.error_text.emit("asyncio transport unavailable for this port, using blocking reads")
+
+        # Block on the port for at most READ_TIMEOUT instead of busy sleeping
+        self.open_port.timeout = READ_TIMEOUT
+
         while self.running and self.open_port and self.open_port.is_open:
-            # print("Worker loop running, self.running =", self.running)
-            QApplication.processEvents()
             try:
-                # Use a short timeout to prevent blocking
-                if self.open_port.in_waiting > 0:
-                    serial_returned = self.open_port.readline().decode("utf-8").strip()
-                    
-                    if serial_returned:  # Only process non-empty strings
-                        # Check for STAT() message
-                        stat_match = re.match(r"STAT\((.*)\)", serial_returned)
-                        if stat_match:
-                            self.message_received.emit(stat_match.group(1))
-                        else:
-                            # Check for DATA(x,y,z) format
-                            xyz_tuple = self.is_valid_xyz_data(serial_returned)
-                            if xyz_tuple:
-                                self.distance_reading.emit(xyz_tuple)
-                else:
-                    # Small delay when buffer is empty
-                    for _ in range(15):  # 10 iterations of 1ms each = 10ms total
-                        if not self.running:
-                            break
-                        time.sleep(0.001)
+                # Drain everything waiting, or wait for the next byte
+                chunk = self.open_port.read(self.open_port.in_waiting or 1)
+                if chunk:
+                    self._handle_chunk(chunk)
+
+                # Checked on empty reads too so a quiet port still flushes
+                pending = len(self.pending_points) + len(self.pending_raws)
+                if pending and (
+                        pending >= self.batch_count or
+                        time.monotonic() - self.batch_started >= self.batch_interval):
+                    self._emit_batch()
                             
-            # Improved error handling
-            except serial.SerialException as e:
+            # Lost connection, in_waiting raises OSError (EIO) on a hangup
+            except (serial.SerialException, OSError) as e:
                 self.error_text.emit(f"Serial communication error: {str(e)}")
                 self.unplugged = 1
                 break
-            except UnicodeDecodeError as e:
-                self.error_text.emit(f"Data decode error: {str(e)}")
-                continue
             except Exception as e:
                 self.error_text.emit(f"Unexpected error in data loop: {str(e)}")
                 break
 
-        print("Exiting data loop, running =", self.running)
+        # Hand over anything left in the window
+        self._emit_batch()
+
+    def _run_async_loop(self):
+        """
+        Event driven data loop, the thread sleeps until the port is readable
+        Input: Called from _run_data_loop() when transport is asyncio
+        Output: True once the loop ran, False if the port has no pollable
+                file descriptor (e.g. Windows COM ports)
+        """
+        try:
+            fd = self.open_port.fileno()
+            loop = asyncio.new_event_loop()
+        except (AttributeError, OSError, ValueError, NotImplementedError):
+            return False
+
+        # Non-blocking reads, the selector only wakes us when bytes arrived
+        self.open_port.timeout = 0
+        flush_timer = None
+
+        def flush():
+            nonlocal flush_timer
+            flush_timer = None
+            self._emit_batch()
+
+        def on_readable():
+            nonlocal flush_timer
+            try:
+                chunk = self.open_port.read(self.open_port.in_waiting or 1)
+            except (serial.SerialException, OSError) as e:
+                self.error_text.emit(f"Serial communication error: {str(e)}")
+                self.unplugged = 1
+                loop.stop()
+                return
+            if not chunk:
+                return
+            self._handle_chunk(chunk)
+
+            pending = len(self.pending_points) + len(self.pending_raws)
+            if pending >= self.batch_count:
+                if flush_timer:
+                    flush_timer.cancel()
+                flush()
+            elif pending and flush_timer is None:
+                # A quiet port still flushes once the window ages out
+                flush_timer = loop.call_later(self.batch_interval, flush)
+
+        try:
+            loop.add_reader(fd, on_readable)
+        except (OSError, ValueError, NotImplementedError):
+            loop.close()
+            return False
+
+        self.loop = loop
+        try:
+            # stop() may have run before the loop existed
+            if self.running:
+                loop.run_forever()
+        finally:
+            self.loop = None
+            loop.remove_reader(fd)
+            loop.close()
+
+        # Hand over anything left in the window
+        self._emit_batch()
+        return True
+
+    def _handle_chunk(self, chunk):
+        """
+        Parse received bytes and queue the readings for the next batch
+        Input: chunk (bytes read from the port)
+        Output: STAT messages emitted, readings added to the pending window,
+                number of complete frames returned
+        """
+        metrics = self.metrics
+        if metrics is not None:
+            start = time.perf_counter()
+            rejected = self.reader.rejected
+
+        messages, points = self.reader.feed(chunk)
+        raws = self.reader.take_raws()
+
+        if metrics is not None:
+            metrics.since("worker.parse", start)
+            metrics.count("worker.bytes", len(chunk))
+            metrics.count("worker.lines", len(messages) + len(points) + len(raws))
+            metrics.count("worker.parse_errors", self.reader.rejected - rejected)
+
+        for message in messages:
+            self.message_received.emit(message)
+            self._track_position(message)
+
+        if points or raws:
+            if not self.pending_points and not self.pending_raws:
+                self.batch_started = time.monotonic()
+            self.pending_points.extend(points)
+            self.pending_raws.extend(raws)
+            if self.emit_points:
+                for point in points:
+                    self.distance_reading.emit(point)
+        return len(messages) + len(points) + len(raws)
+
+    def _track_position(self, message):
+        """
+        Follow the height the firmware reports while scanning
+        Input: STAT message text
+        Output: device_z updated, a resume overlap ends once the device is past it
+        """
+        z = parse_position(message).get("z")
+        if z is None:
+            return
+        self.device_z = z
+        if self.overlap.armed and z > self.overlap.resume_z + self.overlap.tolerance:
+            self.error_text.emit(f"Device at z={z:g}, past the resumed scan")
+            self.overlap.disarm()
+
+    def _emit_batch(self):
+        """
+        Emit the pending readings as one array
+        Input: Called from the data loop
+        Output: raw_batch with any RAW readings, distance_batch with an N x 3
+                array of the points that pass the filters, pending lists cleared,
+                number of points handed on
+        """
+        metrics = self.metrics
+        if metrics is not None:
+            start = time.perf_counter()
+
+        points = np.array(self.pending_points, dtype=np.float64).reshape(-1, 3)
+        if self.overlap.armed:
+            points = points[self.overlap(points)]
+        if self.pending_raws:
+            raws = np.array(self.pending_raws, dtype=np.float64)
+            if self.raw_overlap.armed:
+                raws = raws[self.raw_overlap(self._raw_positions(raws))]
+            if len(raws):
+                self.raw_batch.emit(raws)
+                self.recent_raws = np.concatenate((self.recent_raws, self._raw_positions(raws)))[-RECENT_SIZE:]
+                # Trig for the whole window at once, off the Arduino
+                converted, _ = self.calibration.to_cartesian(raws)
+                points = np.concatenate((points, converted)) if len(points) else converted
+        self.pending_points = []
+        self.pending_raws = []
+
+        if self.filters and len(points):
+            points = self.filters.apply(points)
+            self.filter_stats.emit(self.filters.counts())
+
+        if len(points):
+            self.recent_points = np.concatenate((self.recent_points, points))[-RECENT_SIZE:]
+            if self.ring is None:
+                self.distance_batch.emit(points)
+            else:
+                self._write_ring(points)
+
+        if metrics is not None:
+            metrics.since("worker.batch", start)
+            metrics.count("worker.points", len(points))
+        return len(points)
+
+    def _write_ring(self, points):
+        """
+        Append a batch to the ring buffer
+        Input: points (N x 3 array)
+        Output: Rows stamped and written, may wait on block consumers,
+                batch_ready emitted unless one is still queued
+        """
+        rows = np.empty((len(points), 4))
+        rows[:, :3] = points
+        rows[:, 3] = time.time()
+
+        if self.metrics is not None:
+            start = time.perf_counter()
+            self.ring.write(rows, self.ring_timeout)
+            self.metrics.since("worker.ring_write", start)
+        else:
+            self.ring.write(rows, self.ring_timeout)
+
+        if not self.ready_pending:
+            self.ready_pending = True
+            self.batch_ready.emit()
+
+    @staticmethod
+    def _raw_positions(raws):
+        """
+        Map RAW readings to (step, 0, z step) so OverlapFilter can key them
+        Input: raws (N x 3 array of distance, step, z step)
+        Output: N x 3 array
+        """
+        return np.column_stack((raws[:, 1], np.zeros(len(raws)), raws[:, 2]))
 
     def _cleanup_and_stop(self):
         """
@@ -187,9 +536,17 @@ class Worker(QObject):
         """
         Function to stop the worker thread
         Input: Stop signal from main window
-        Output: Set running flag to false
+        Output: Set running flag to false, an asyncio loop is woken to exit
         """
         self.running = False
+        self.wake.set()
+        loop = self.loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(loop.stop)
+            except RuntimeError:
+                # Loop already closed
+                pass
 
     def is_valid_xyz_data(self, data):
         """
@@ -197,19 +554,7 @@ class Worker(QObject):
         Input: data (str): The input string to validate.
         Output: tuple or None: Returns (x, y, z) as floats if valid, or None if invalid.
         """
-        try:
-            # Match pattern like DATA(1.0,2.0,3.0)
-            pattern = r"^DATA\(\s*(-?\d+(\.\d+)?),\s*(-?\d+(\.\d+)?),\s*(-?\d+(\.\d+)?)\s*\)$"
-            match = re.match(pattern, data.strip())
-            if match:
-                # Extract numbers from inside the parentheses
-                nums = match.groups()
-                x = float(nums[0])
-                y = float(nums[2])
-                z = float(nums[4])
-                return x, y, z
-            else:
-                return None
-        except Exception as e:
-            self.error_text.emit(f"Error parsing data: {data} : {e}")
-            return None
\ No newline at end of file
+        frame = parse_frame(data)
+        if frame and frame[0] == DATA:
+            return frame[1]
+        return None